@@ -0,0 +1,112 @@
+# jobs.py
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+FINAL_STATES = ("done", "error")
+
+
+def spool_upload(fileobj, ext):
+    """
+    Copy an upload to a temp file so queued jobs only cost disk, not RAM.
+    Returns the temp file path.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}", prefix="job_") as tmp_file:
+        shutil.copyfileobj(fileobj, tmp_file)
+        return tmp_file.name
+
+
+class JobStore:
+    """
+    In-memory registry + work queue for the async analysis API:
+      - jobs are plain dicts keyed by job_id
+      - job ids are queued for a fixed pool of worker tasks, which take them with
+        next_job(); a queued job's queue_position is 1 when it is next in line
+      - every change bumps `version` and wakes anyone waiting on the job
+      - finished jobs are evicted after `ttl_sec`
+    """
+
+    def __init__(self, ttl_sec=3600):
+        self.ttl_sec = float(ttl_sec)
+        self.jobs = {}
+        self.queue = asyncio.Queue()
+        self.workers = []
+        self._events = {}
+        # FIFO bookkeeping: a job's position is its ticket minus the tickets already taken
+        self._issued = 0
+        self._taken = 0
+
+    def create(self, filename, modality, path):
+        self._evict_expired()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "modality": modality,
+            "filename": filename,
+            "path": path,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "version": 0,
+            "ticket": self._issued,
+        }
+        self._issued += 1
+        self.jobs[job_id] = job
+        self._events[job_id] = asyncio.Event()
+        self.queue.put_nowait(job_id)
+        return job
+
+    async def next_job(self):
+        """Wait for the next queued job id (callers must call queue.task_done() when finished)."""
+        job_id = await self.queue.get()
+        self._taken += 1
+        return job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def public(self, job):
+        """Job view safe to return to clients (no server paths)."""
+        view = {k: v for k, v in job.items() if k not in ("path", "ticket")}
+        view["queue_position"] = job["ticket"] - self._taken + 1 if job["status"] == "queued" else 0
+        return view
+
+    def update(self, job_id, progress=None, **fields):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if progress:
+            job["progress"].update(progress)
+        job.update(fields)
+        job["version"] += 1
+        job["updated_at"] = time.time()
+        # Wake current waiters and arm a fresh event for the next change
+        event = self._events.get(job_id)
+        self._events[job_id] = asyncio.Event()
+        if event is not None:
+            event.set()
+
+    def change_event(self, job_id):
+        """
+        Event set on the next change of `job_id`. Grab it *before* reading the job
+        so a change between the read and the wait is never missed.
+        """
+        return self._events.get(job_id)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl_sec
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["status"] in FINAL_STATES and job["updated_at"] < cutoff]
+        for job_id in expired:
+            job = self.jobs.pop(job_id)
+            self._events.pop(job_id, None)
+            path = job.get("path")
+            if path and os.path.exists(path):
+                os.remove(path)
@@ -2,13 +2,20 @@
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict
 from io import BytesIO
-from pydub import AudioSegment
 import os
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Optional
 import uuid, os
 from .utils import save_upload_to_tempfile, run_detector, aggregate_results, confidence_from_prob
+from .jobs import JobStore, spool_upload, FINAL_STATES
+from common.instrumentation import span, timed, install as install_instrumentation
+import asyncio
+import itertools
+import json
+import shutil
+import tempfile
+import time
 import httpx
 class AnalyzeResponse(BaseModel):
     job_id: Optional[str] = None
@@ -16,9 +23,12 @@ class AnalyzeResponse(BaseModel):
     confidence: str 
 
 
-from audio.app import analyze_audio_bytes
+# audio.app (librosa, scikit-learn, soundfile) and pydub are imported on first use,
+# or by the warm-up task at startup, so the gateway binds without waiting on them;
+# `python -m benchmarks.importtime` keeps them out of the import path.
 
 app = FastAPI(title="Audio AI Detector")
+install_instrumentation(app, "frontend")
 
 
 app.add_middleware(
@@ -27,7 +37,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 
 @app.get("/", response_class=HTMLResponse)
 def index():
@@ -37,6 +47,7 @@ def index():
 ALLOWED_AUDIO_EXTS = ["mp3", "wav", "ogg", "flac", "m4a"]
 ALLOWED_VIDEO_EXTS = ['mp4','mov','mkv']
 ALLOWED_TEXT_EXTS = ['txt']
+@timed("wav_convert")
 def convert_to_wav(file_bytes: bytes, ext: str) -> bytes:
     """
     Convert uploaded audio to WAV if needed.
@@ -46,21 +57,40 @@ def convert_to_wav(file_bytes: bytes, ext: str) -> bytes:
         return file_bytes
 
     # Convert using pydub
+    from pydub import AudioSegment
     audio = AudioSegment.from_file(BytesIO(file_bytes), format=ext)
     out_buf = BytesIO()
     audio.export(out_buf, format="wav")
     return out_buf.getvalue()
 
-async def analyze_audio(file: UploadFile = File(...)) -> Dict:
+# Load tests (benchmarks/loadtest.py --stub) set AUDIO_STUB=1 to measure gateway overhead alone
+AUDIO_STUB = os.environ.get("AUDIO_STUB") == "1"
+# Import the audio stack in the background at startup (0: on the first audio request)
+AUDIO_WARMUP = os.environ.get("AUDIO_WARMUP", "1") != "0"
 
-    ext = file.filename.split(".")[-1].lower()
-    if ext not in ALLOWED_AUDIO_EXTS:
-        raise HTTPException(status_code=400, detail="Unsupported audio format")
-
-    
-    file_bytes = await file.read()
 
+def warm_audio():
+    """
+    Import the audio scorer and pydub, then run one MFCC pass over a second of
+    silence so librosa's numba kernels are compiled before the first upload.
+    """
+    t0 = time.time()
+    try:
+        import numpy as np
+        from pydub import AudioSegment  # noqa: F401
+        from audio.app import extract_mfcc_features
+        extract_mfcc_features(np.zeros(16000, dtype=np.float32), 16000)
+        print(f"Audio stack warmed up in {time.time() - t0:.2f}s")
+    except Exception as e:
+        print(f"Audio warm-up failed: {e}")
 
+def score_audio_bytes(file_bytes: bytes, ext: str):
+    """
+    Convert to WAV and run the in-process audio scorer.
+    Returns (probability, confidence, explanation).
+    """
+    if AUDIO_STUB:
+        return (0.5, "Low", "stub")
     try:
         wav_bytes = convert_to_wav(file_bytes, ext)
     except Exception as e:
@@ -68,6 +98,7 @@ async def analyze_audio(file: UploadFile = File(...)) -> Dict:
 
     print("Converted to .wav")
     try:
+        from audio.app import analyze_audio_bytes
         e =  analyze_audio_bytes(wav_bytes)
         print(e)
         prob, conf,explanation = e
@@ -77,6 +108,18 @@ async def analyze_audio(file: UploadFile = File(...)) -> Dict:
     
     return (prob,conf,explanation)
 
+async def analyze_audio(file: UploadFile = File(...)) -> Dict:
+
+    ext = file.filename.split(".")[-1].lower()
+    if ext not in ALLOWED_AUDIO_EXTS:
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+
+    
+    with span("upload_read"):
+        file_bytes = await file.read()
+
+    return score_audio_bytes(file_bytes, ext)
+
 TEXT_SERVICE_URL = "http://localhost:8002/analyze_text"  # Change to your text service URL
 
 async def analyze_text(file: UploadFile = File(...)) -> Dict:
@@ -85,15 +128,22 @@ async def analyze_text(file: UploadFile = File(...)) -> Dict:
     if ext not in {"txt", "csv"}:  # Allowed text extensions
         raise HTTPException(status_code=400, detail="Unsupported text format")
     
-    text_bytes = await file.read()
+    with span("upload_read"):
+        text_bytes = await file.read()
     text_str = text_bytes.decode("utf-8")  # Assuming UTF-8 text
-    
+    return await classify_text(text_str)
+
+async def classify_text(text_str: str):
+    """
+    Send text to the text service. Returns [probability, confidence, explanation].
+    """
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                TEXT_SERVICE_URL,
-                json={"text": text_str}  # Send text as JSON
-            )
+        with span("proxy_text"):
+            async with httpx.AsyncClient(timeout=30) as client:
+                response = await client.post(
+                    TEXT_SERVICE_URL,
+                    json={"text": text_str}  # Send text as JSON
+                )
         response.raise_for_status()
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=response.status_code, detail=f"Text service error: {response.text}")
@@ -112,7 +162,116 @@ async def analyze_text(file: UploadFile = File(...)) -> Dict:
     
     return [prob,conf,explanation]
 
+TEXT_BATCH_URL = "http://localhost:8002/analyze_text_batch"
+# Rows forwarded per request to the text service (it batches them again for the model)
+TEXT_BATCH_ROWS = int(os.environ.get("TEXT_BATCH_ROWS", 256))
+
+
+def read_text_rows(fileobj, ext, column=None, header=True):
+    """
+    Yield (row_number, text) from an uploaded .csv or .txt without decoding it all at once.
+    csv: `column` is a header name or 0-based index (default: a "text" column, else the first)
+    txt: every non-empty line is a row, numbered by its 0-based line in the file
+    """
+    import csv
+    import io
+
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+    if ext == "txt":
+        for n, line in enumerate(stream):
+            if line.strip():
+                yield n, line.rstrip("\r\n")
+        return
+
+    reader = csv.reader(stream)
+    index = 0
+    if header:
+        names = [h.strip() for h in next(reader, [])]
+        if column is None:
+            index = names.index("text") if "text" in names else 0
+        elif column in names:
+            index = names.index(column)
+        elif column.isdigit():
+            index = int(column)
+        else:
+            raise ValueError(f"Column '{column}' not found in CSV header")
+    elif column is not None:
+        if not column.isdigit():
+            raise ValueError("Without a header row, column must be a 0-based index")
+        index = int(column)
+
+    for n, fields in enumerate(reader):
+        yield n, fields[index] if index < len(fields) else ""
+
+
+def stream_text_batch(fileobj, ext, column=None, header=True):
+    """
+    Forward rows to the text service TEXT_BATCH_ROWS at a time and relay its
+    per-row NDJSON; ends with a summary event.
+    """
+    t0 = time.time()
+    scored = errors = 0
+    rows = read_text_rows(fileobj, ext, column, header)
+    try:
+        with httpx.Client(timeout=httpx.Timeout(30, read=300)) as client:
+            while True:
+                chunk = list(itertools.islice(rows, TEXT_BATCH_ROWS))
+                if not chunk:
+                    break
+                # txt skips blank lines, so row numbers are not contiguous: send them explicitly
+                payload = {"rows": [n for n, _ in chunk], "texts": [text for _, text in chunk]}
+                with span("proxy_text_batch"), client.stream("POST", TEXT_BATCH_URL, json=payload) as response:
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"Text service error: {response.read().decode(errors='replace')}")
+                    for line in response.iter_lines():
+                        if not line.strip():
+                            continue
+                        result = json.loads(line)
+                        if "error" in result:
+                            errors += 1
+                        else:
+                            scored += 1
+                        yield json.dumps(dict(result, event="row")) + "\n"
+    except Exception as e:
+        yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    elapsed = time.time() - t0
+    yield json.dumps({
+        "event": "done",
+        "rows_scored": scored,
+        "rows_skipped": errors,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(scored / elapsed, 1) if elapsed > 0 else None,
+    }) + "\n"
+
+
+@app.post("/analyze_text_batch")
+async def analyze_text_batch(file: UploadFile = File(...), column: Optional[str] = None, header: bool = True):
+    """
+    Score every row of a .csv (one text column) or .txt (one text per line).
+    Streams NDJSON: {"event": "row", "row", "probability", "confidence"} per row
+    (row = 0-based data row of a csv, or 0-based line of a txt; blank lines get no
+    event; rows arrive grouped by batch, not strictly in order),
+    then {"event": "done", ...} with totals and throughput.
+    """
+    ext = file.filename.split(".")[-1].lower()
+    if ext not in {"txt", "csv"}:
+        raise HTTPException(status_code=400, detail="Unsupported text format")
+    # the upload may be closed once this handler returns; the stream reads its own copy
+    spool = tempfile.TemporaryFile()
+    with span("temp_write"):
+        shutil.copyfileobj(file.file, spool)
+    spool.seek(0)
+
+    def stream():
+        try:
+            yield from stream_text_batch(spool, ext, column, header)
+        finally:
+            spool.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 VIDEO_SERVICE_URL = "http://localhost:8003/analyze_video"  # Change to your text service URL
+VIDEO_STREAM_URL = "http://localhost:8003/analyze_video_stream"  # progress-streaming variant used by jobs
 
 
 async def analyze_video(file: UploadFile = File(...)) -> dict:
@@ -125,7 +284,7 @@ async def analyze_video(file: UploadFile = File(...)) -> dict:
     try:
         import tempfile, shutil, os
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as tmp_file:
+        with span("temp_write"), tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as tmp_file:
             shutil.copyfileobj(file.file, tmp_file)
             tmp_path = tmp_file.name
     except Exception as e:
@@ -135,12 +294,13 @@ async def analyze_video(file: UploadFile = File(...)) -> dict:
     try:
         import httpx
 
-        async with httpx.AsyncClient(timeout=60) as client:
-            with open(tmp_path, "rb") as f:
-                response = await client.post(
-                    VIDEO_SERVICE_URL,
-                    files={"file": (file.filename, f, f"video/{ext}")}
-                )
+        with span("proxy_video"):
+            async with httpx.AsyncClient(timeout=60) as client:
+                with open(tmp_path, "rb") as f:
+                    response = await client.post(
+                        VIDEO_SERVICE_URL,
+                        files={"file": (file.filename, f, f"video/{ext}")}
+                    )
         response.raise_for_status()
     except httpx.HTTPStatusError:
         raise HTTPException(status_code=response.status_code, detail=f"Video service error: {response.text}")
@@ -186,3 +346,171 @@ async def analyze(file: UploadFile = File(...), detectors: Optional[str] = None)
     except Exception as e: 
         print(f"Exception :{e}")
 
+
+# --- Async job API ---
+# POST /jobs spools the upload and returns immediately; a fixed pool of workers
+# drains the queue, so bursts wait on disk instead of holding HTTP connections.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", os.cpu_count() or 2))
+jobs = JobStore(ttl_sec=float(os.environ.get("JOB_TTL_SEC", 3600)))
+
+
+def modality_for_ext(ext: str) -> Optional[str]:
+    if ext in ALLOWED_AUDIO_EXTS:
+        return "audio"
+    if ext in ALLOWED_VIDEO_EXTS:
+        return "video"
+    if ext in ALLOWED_TEXT_EXTS:
+        return "text"
+    return None
+
+
+async def run_audio_job(job):
+    ext = job["filename"].split(".")[-1].lower()
+    jobs.update(job["job_id"], progress={"stage": "decode"})
+    with open(job["path"], "rb") as f:
+        file_bytes = f.read()
+    # MFCC extraction + SVM is CPU bound; keep it off the event loop
+    jobs.update(job["job_id"], progress={"stage": "detect", "detectors_completed": 0, "detectors_total": 1})
+    results = await asyncio.to_thread(score_audio_bytes, file_bytes, ext)
+    jobs.update(job["job_id"], progress={"detectors_completed": 1})
+    return results
+
+
+async def run_text_job(job):
+    with open(job["path"], "rb") as f:
+        text_str = f.read().decode("utf-8")
+    jobs.update(job["job_id"], progress={"stage": "detect", "detectors_completed": 0, "detectors_total": 1})
+    results = await classify_text(text_str)
+    jobs.update(job["job_id"], progress={"detectors_completed": 1})
+    return results
+
+
+async def run_video_job(job):
+    """
+    Stream the video through the video service's NDJSON endpoint, mirroring
+    its progress events (frames decoded, detectors completed) into the job.
+    """
+    ext = job["filename"].split(".")[-1].lower()
+    result = None
+    # No overall deadline: the read timeout only bounds the gap between events
+    timeout = httpx.Timeout(60, read=300)
+    with span("proxy_video"), open(job["path"], "rb") as f:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream(
+                "POST",
+                VIDEO_STREAM_URL,
+                files={"file": (job["filename"], f, f"video/{ext}")}
+            ) as response:
+                if response.status_code >= 400:
+                    body = await response.aread()
+                    raise HTTPException(status_code=response.status_code,
+                                        detail=f"Video service error: {body.decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    kind = event.pop("event", None)
+                    if kind == "progress":
+                        jobs.update(job["job_id"], progress=event)
+                    elif kind == "result":
+                        result = event
+
+    if result is None:
+        raise HTTPException(status_code=502, detail="Video service closed the stream without a result")
+    if result.get("status") != "success":
+        raise HTTPException(status_code=500, detail=result.get("details") or "Video analysis failed")
+    return [result.get("ai_probability"), result.get("confidence"), result.get("explanation", "")]
+
+
+JOB_RUNNERS = {"audio": run_audio_job, "video": run_video_job, "text": run_text_job}
+
+
+async def job_worker():
+    while True:
+        job_id = await jobs.next_job()
+        job = jobs.get(job_id)
+        try:
+            if job is None:
+                continue
+            jobs.update(job_id, status="running")
+            results = await JOB_RUNNERS[job["modality"]](job)
+            jobs.update(job_id, status="done", progress={"stage": "done"},
+                        result={"score": results[0], "confidence": results[1], "explanation": results[2]})
+        except HTTPException as e:
+            jobs.update(job_id, status="error", error=str(e.detail))
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            jobs.update(job_id, status="error", error=str(e))
+        finally:
+            if job is not None and os.path.exists(job["path"]):
+                os.remove(job["path"])
+            jobs.queue.task_done()
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    for _ in range(max(1, JOB_WORKERS)):
+        jobs.workers.append(asyncio.create_task(job_worker()))
+
+
+@app.on_event("startup")
+async def start_audio_warmup():
+    if AUDIO_WARMUP and not AUDIO_STUB:
+        app.state.audio_warmup = asyncio.create_task(asyncio.to_thread(warm_audio))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """
+    Queue an upload for analysis and return its job id immediately.
+    Poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events for progress.
+    """
+    ext = file.filename.split(".")[-1].lower()
+    modality = modality_for_ext(ext)
+    if modality is None:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+    try:
+        with span("temp_write"):
+            path = await asyncio.to_thread(spool_upload, file.file, ext)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save upload: {e}")
+    job = jobs.create(file.filename, modality, path)
+    return {"job_id": job["job_id"], "status": job["status"], "modality": modality}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return jobs.public(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events: one `data:` message per job change, closing after
+    the final result or error. Idle streams get a keep-alive comment.
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+
+    async def stream():
+        version = -1
+        while True:
+            changed = jobs.change_event(job_id)
+            job = jobs.get(job_id)
+            if job is None or changed is None:
+                return
+            if job["version"] != version:
+                version = job["version"]
+                yield f"event: {job['status']}\ndata: {json.dumps(jobs.public(job))}\n\n"
+                if job["status"] in FINAL_STATES:
+                    return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -6,6 +6,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC
 import soundfile as sf
 from pathlib import Path
+from common.instrumentation import span, timed
 
 
 
@@ -25,6 +26,22 @@ def compute_confidence(p1, p2, threshold_high=0.85, threshold_medium=0.65):
     else:
         return "Low"
 
+@timed("mfcc")
+def extract_mfcc_features(audio_data, sr, n_mfcc=13, n_fft=2048, hop_length=512):
+    """
+    Extract MFCC features from a float32 signal already in memory.
+    """
+    # If stereo, convert to mono
+    if len(audio_data.shape) > 1:
+        audio_data = np.mean(audio_data, axis=1)
+
+    mfccs = librosa.feature.mfcc(
+        y=audio_data, sr=sr,
+        n_mfcc=n_mfcc, n_fft=n_fft,
+        hop_length=hop_length
+    )
+    return np.mean(mfccs.T, axis=0)
+
 def extract_mfcc_features_from_bytes(file_bytes, n_mfcc=13, n_fft=2048, hop_length=512):
     """
     Extract MFCC features from an audio file provided as bytes.
@@ -32,17 +49,7 @@ def extract_mfcc_features_from_bytes(file_bytes, n_mfcc=13, n_fft=2048, hop_leng
     try:
         # Load from bytes
         audio_data, sr = sf.read(io.BytesIO(file_bytes), dtype="float32")
-
-        # If stereo, convert to mono
-        if len(audio_data.shape) > 1:
-            audio_data = np.mean(audio_data, axis=1)
-
-        mfccs = librosa.feature.mfcc(
-            y=audio_data, sr=sr,
-            n_mfcc=n_mfcc, n_fft=n_fft,
-            hop_length=hop_length
-        )
-        return np.mean(mfccs.T, axis=0)
+        return extract_mfcc_features(audio_data, sr, n_mfcc, n_fft, hop_length)
 
     except Exception as e:
         print(f"Error extracting features: {e}")
@@ -58,10 +65,32 @@ def analyze_audio_bytes(file_bytes, model_path="./audio/svm_model.pkl", scaler_p
     mfcc_features = extract_mfcc_features_from_bytes(file_bytes)
     if mfcc_features is None:
         return "Error: Unable to process the input audio."
+    return score_mfcc_features(mfcc_features, model_path, scaler_path)
+
+
+def analyze_audio_array(audio_data, sr, model_path="./audio/svm_model.pkl", scaler_path="./audio/scaler.pkl"):
+    """
+    Analyze audio already decoded to a float32 signal (e.g. demuxed from a video upload).
+    Same return values as analyze_audio_bytes.
+    """
+    try:
+        mfcc_features = extract_mfcc_features(audio_data, sr)
+    except Exception as e:
+        print(f"Error extracting features: {e}")
+        return "Error: Unable to process the input audio."
+    return score_mfcc_features(mfcc_features, model_path, scaler_path)
+
+
+def score_mfcc_features(mfcc_features, model_path="./audio/svm_model.pkl", scaler_path="./audio/scaler.pkl"):
+    """
+    Run the scaler + SVM on an MFCC feature vector.
+    Returns (deepfake_probability, confidence, explanation) or an error string.
+    """
     try:
-        scaler = joblib.load(scaler_path)
+        with span("audio_model_load"):
+            scaler = joblib.load(scaler_path)
+            svm_classifier = joblib.load(model_path)
         mfcc_features_scaled = scaler.transform(mfcc_features.reshape(1, -1))
-        svm_classifier = joblib.load(model_path)
         print("Loaded audio model")
 
     except Exception as e:
@@ -69,7 +98,8 @@ def analyze_audio_bytes(file_bytes, model_path="./audio/svm_model.pkl", scaler_p
 
     try:
         
-        probabilities = svm_classifier.predict_proba(mfcc_features_scaled)[0]
+        with span("audio_inference"):
+            probabilities = svm_classifier.predict_proba(mfcc_features_scaled)[0]
 
         genuine_prob, deepfake_prob = probabilities[0], probabilities[1]
         p1, p2 = sorted([genuine_prob, deepfake_prob], reverse=True)
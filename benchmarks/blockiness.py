@@ -0,0 +1,148 @@
+# benchmarks/blockiness.py
+"""
+FrameDetector blockiness engines: "fft" (low/high frequency energy ratio) vs
+"grid" (8x8 block-boundary discontinuities).
+
+    python -m benchmarks.blockiness                       # synthetic scenes
+    python -m benchmarks.blockiness a.mp4 b.mov           # plus frames of real clips
+
+Every source image is JPEG-compressed at several qualities (JPEG codes 8x8 DCT
+blocks, as H.264/MPEG intra frames do) and, like the preprocessor, resized to
+640x360 from 360p, 720p and 1080p sources. Reports per-frame cost of each
+engine, their correlation with each other over all samples, and how
+monotonically each one rises as quality drops (Spearman vs 100 - quality,
+averaged per source).
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from video.models.frame_detector import FrameDetector
+
+QUALITIES = (95, 80, 60, 40, 25, 10)
+SOURCE_SIZES = ((640, 360), (1280, 720), (1920, 1080))
+TARGET = (640, 360)
+
+
+def synthetic_scenes(n, seed=0):
+    """Noisy gradients with random shapes, rendered at 1920x1080."""
+    rng = np.random.default_rng(seed)
+    w, h = SOURCE_SIZES[-1]
+    scenes = []
+    for _ in range(n):
+        x = np.linspace(0, 1, w, dtype=np.float32)
+        y = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+        frame = np.stack([255 * (a * x + b * y) % 256 for a, b in rng.random((3, 2))], axis=-1).astype(np.uint8)
+        for _ in range(12):
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+            if rng.random() < 0.5:
+                cv2.circle(frame, center, int(rng.integers(20, 200)), color, -1)
+            else:
+                size = rng.integers(40, 400, 2)
+                cv2.rectangle(frame, center, (center[0] + int(size[0]), center[1] + int(size[1])), color, -1)
+        frame = cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8))
+        scenes.append(cv2.GaussianBlur(frame, (3, 3), 0))
+    return scenes
+
+
+def clip_frames(path, count=4):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    frames = []
+    for k in range(count):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int((k + 0.5) * total / count))
+        ret, frame = cap.read()
+        if ret and frame is not None:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def variants(source):
+    """(source size, quality, 640x360 gray frame) for every size and JPEG quality."""
+    out = []
+    for size in SOURCE_SIZES:
+        scaled = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        for q in QUALITIES:
+            ok, buf = cv2.imencode(".jpg", scaled, [cv2.IMWRITE_JPEG_QUALITY, q])
+            frame = cv2.resize(cv2.imdecode(buf, cv2.IMREAD_COLOR), TARGET, interpolation=cv2.INTER_AREA)
+            out.append((size, q, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+    return out
+
+
+def ranks(values):
+    order = np.argsort(values, kind="stable")
+    r = np.empty(len(values))
+    r[order] = np.arange(len(values))
+    return r
+
+
+def spearman(a, b):
+    return float(np.corrcoef(ranks(np.asarray(a)), ranks(np.asarray(b)))[0, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blockiness engine benchmark and correlation study")
+    parser.add_argument("videos", nargs="*", help="Clips to take real frames from")
+    parser.add_argument("--scenes", type=int, default=8, help="Synthetic source images")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sources = [("synthetic", s) for s in synthetic_scenes(args.scenes)]
+    for path in args.videos:
+        sources.extend((path, f) for f in clip_frames(path))
+
+    detectors = {engine: FrameDetector(blockiness=engine) for engine in ("fft", "grid")}
+    samples = []  # (source index, kind, size, quality, {engine: score})
+    grays = []
+    for i, (kind, source) in enumerate(sources):
+        for size, q, gray in variants(source):
+            scores = {e: d._blockiness(gray) for e, d in detectors.items()}
+            samples.append((i, kind, size, q, scores))
+            grays.append(gray)
+
+    for engine, det in detectors.items():
+        fn = det._blockiness_grid if engine == "grid" else det._blockiness_fft
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for gray in grays:
+                fn(gray)
+        per_frame = (time.perf_counter() - t0) / (args.repeat * len(grays))
+        print(json.dumps({"engine": engine, "frames": len(grays), "us_per_frame": round(per_frame * 1e6, 1)}))
+
+    for kind in sorted({s[1] for s in samples}):
+        rows = [s for s in samples if s[1] == kind]
+        fft = [s[4]["fft"] for s in rows]
+        grid = [s[4]["grid"] for s in rows]
+        by_source = {}
+        for src, _, size, q, scores in rows:
+            by_source.setdefault((src, size), []).append((q, scores))
+        mono = {}
+        for engine in ("fft", "grid"):
+            rhos = [spearman([100 - q for q, _ in group], [sc[engine] for _, sc in group])
+                    for group in by_source.values()]
+            mono[engine] = round(float(np.nanmean(rhos)), 3)
+        print(json.dumps({
+            "samples": kind,
+            "n": len(rows),
+            "pearson_fft_grid": round(float(np.corrcoef(fft, grid)[0, 1]), 3),
+            "spearman_fft_grid": round(spearman(fft, grid), 3),
+            "spearman_vs_compression": mono,
+        }))
+
+    # how each engine moves with quality, per source resolution (synthetic means)
+    for size in SOURCE_SIZES:
+        row = {"source": f"{size[0]}x{size[1]}"}
+        for engine in ("fft", "grid"):
+            row[engine] = {q: round(float(np.mean([s[4][engine] for s in samples
+                                                  if s[2] == size and s[3] == q and s[1] == "synthetic"])), 3)
+                           for q in QUALITIES}
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/cascade.py
+"""
+Cheap-first cascade vs BART-only on a local corpus.
+
+    python -m benchmarks.cascade corpus.txt
+    python -m benchmarks.cascade comments.csv --column body --model text/cascade.npz
+
+Every text is scored by bart-large-mnli first (the reference, and its timing is the
+BART-only throughput). Without --model the first stage is trained on the first
+--train-fraction of the (shuffled) corpus against those scores and evaluated on
+the rest. Reports the escalation rate, throughput of both paths and how often the
+cascade's label (p >= 0.5) matches BART's.
+
+Needs torch, transformers and the facebook/bart-large-mnli weights (fetched from
+the Hugging Face hub on first use, ~1.6 GB), like the text service itself.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from text.cascade import CascadeModel, read_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade escalation / agreement report")
+    parser.add_argument("corpus", help=".txt (one text per line) or .csv")
+    parser.add_argument("--column", help="CSV text column")
+    parser.add_argument("--model", help="Trained cascade (.npz); default: train one here")
+    parser.add_argument("--train-fraction", type=float, default=0.5)
+    parser.add_argument("--min-agreement", type=float, default=0.97)
+    parser.add_argument("--min-support", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    from text.main import zero_shot_scores
+
+    texts, _ = read_corpus(args.corpus, args.column)
+    order = np.random.default_rng(0).permutation(len(texts))
+    texts = [texts[i] for i in order]
+
+    def bart(batch):
+        out = []
+        for k in range(0, len(batch), args.batch_size):
+            out.extend(zero_shot_scores(batch[k:k + args.batch_size], args.batch_size))
+        return np.asarray(out)
+
+    if args.model:
+        model = CascadeModel.load(args.model)
+        train, test = [], texts
+    else:
+        n_train = int(len(texts) * args.train_fraction)
+        train, test = texts[:n_train], texts[n_train:]
+        model = CascadeModel.fit(train, bart(train), min_agreement=args.min_agreement,
+                                 min_support=args.min_support)
+
+    t0 = time.perf_counter()
+    reference = bart(test)
+    bart_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    probs = model.predict(test)
+    sure = model.confident(probs)
+    escalated = [t for t, s in zip(test, sure) if not s]
+    cascade = probs.astype(np.float64)
+    if escalated:
+        cascade[~sure] = bart(escalated)
+    cascade_sec = time.perf_counter() - t0
+
+    agree = (cascade >= 0.5) == (reference >= 0.5)
+    direct_agree = agree[sure].mean() if sure.any() else None
+    print(json.dumps({
+        "train_texts": len(train),
+        "eval_texts": len(test),
+        "band": [round(model.low, 3), round(model.high, 3)],
+        "escalation_rate": round(1 - float(sure.mean()), 4),
+        "bart_only_texts_per_sec": round(len(test) / bart_sec, 2),
+        "cascade_texts_per_sec": round(len(test) / cascade_sec, 2),
+        "throughput_gain": round(bart_sec / cascade_sec, 2),
+        "agreement": round(float(agree.mean()), 4),
+        "agreement_direct_answers": round(float(direct_agree), 4) if direct_agree is not None else None,
+        "mean_abs_prob_diff": round(float(np.abs(cascade - reference).mean()), 4),
+    }))
+
+
+if __name__ == "__main__":
+    main()
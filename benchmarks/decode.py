@@ -0,0 +1,69 @@
+# benchmarks/decode.py
+"""
+Compare VideoPreprocessor decoders (OpenCV seek+resize vs PyAV keyframes).
+
+    python -m benchmarks.decode                 # synthetic 720p/1080p/4K clips
+    python -m benchmarks.decode a.mp4 b.mov     # your own files
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import write_synthetic_clip
+from video.preprocessor import VideoPreprocessor, _av
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+def time_decoder(path, decoder, repeat):
+    pre = VideoPreprocessor(decoder=decoder)
+    best = None
+    frames = 0
+    used = decoder
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res, msg = pre.process(path)
+        elapsed = time.perf_counter() - t0
+        if res is None:
+            return {"decoder": decoder, "error": msg}
+        frames = len(res[0])
+        used = res[1].get("decoder", decoder)
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "decoder": decoder,
+        "decoder_used": used,
+        "seconds": round(best, 4),
+        "frames": frames,
+        "frames_per_sec": round(frames / best, 1) if best else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VideoPreprocessor decoders")
+    parser.add_argument("videos", nargs="*", help="Video files (default: generate synthetic clips)")
+    parser.add_argument("--seconds", type=float, default=10, help="Length of synthetic clips")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per decoder (best time is reported)")
+    args = parser.parse_args()
+
+    if _av is None:
+        print("warning: PyAV not installed, 'keyframes' falls back to OpenCV")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = args.videos or [
+            write_synthetic_clip(os.path.join(tmp, f"{name}.mp4"), size, args.seconds)
+            for name, size in RESOLUTIONS.items()
+        ]
+        results = []
+        for path in videos:
+            for decoder in ("opencv", "keyframes"):
+                row = {"video": os.path.basename(path)}
+                row.update(time_decoder(path, decoder, args.repeat))
+                results.append(row)
+                print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/fixtures.py
+"""
+Deterministic synthetic media for benchmarks. Same seed -> same bytes, so numbers
+from different commits are comparable.
+  - videos: moving shapes / static frames / hard-cut montages at several resolutions and lengths
+  - audio: tones and noise at several sample rates (16-bit PCM WAV)
+  - text: word-salad corpora of several lengths
+"""
+import io
+import os
+import random
+import wave
+
+import numpy as np
+
+VIDEOS = {
+    # name: (width, height, seconds, fps, kind)
+    "shapes_360p_5s": (640, 360, 5, 30, "shapes"),
+    "shapes_720p_10s": (1280, 720, 10, 30, "shapes"),
+    "static_720p_10s": (1280, 720, 10, 30, "static"),
+    "shapes_1080p_5s": (1920, 1080, 5, 30, "shapes"),
+    "cuts_360p_30s": (640, 360, 30, 30, "cuts"),
+}
+
+AUDIO = {
+    # name: (sample_rate, seconds, kind)
+    "tone_16k_5s": (16000, 5, "tone"),
+    "noise_44k_5s": (44100, 5, "noise"),
+    "tone_noise_48k_10s": (48000, 10, "tone+noise"),
+}
+
+TEXTS = {
+    # name: (documents, words per document)
+    "short_x64": (64, 30),
+    "long_x16": (16, 400),
+}
+
+_WORDS = ("the model data video frame signal human written generated text audio sample "
+          "result score noise tone system network language paper people time world "
+          "system would could after before large small quickly never always because").split()
+
+
+def write_synthetic_clip(path, size, seconds=10, fps=30, kind="shapes", seed=0, shot_sec=2.0):
+    """
+    Moving rectangle over a noisy gradient ("shapes"), one repeated frame ("static"),
+    or "shapes" shots of `shot_sec` seconds in different colours joined by hard cuts ("cuts"), mp4v.
+    """
+    import cv2
+
+    w, h = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    rng = np.random.default_rng(seed)
+    base = np.tile(np.linspace(0, 255, w, dtype=np.uint8), (h, 1))
+    shot_len = max(1, int(shot_sec * fps))
+    static = None
+    for i in range(int(seconds * fps)):
+        if kind == "static" and static is not None:
+            writer.write(static)
+            continue
+        frame = cv2.merge([base, np.roll(base, i * 4, axis=1), base[::-1]])
+        if kind == "cuts":
+            # each shot gets its own palette and darkness
+            shot = i // shot_len
+            frame = frame[:, :, [(shot + c) % 3 for c in range(3)]]
+            frame = cv2.convertScaleAbs(frame, alpha=0.35 + 0.3 * (shot % 3))
+        frame = cv2.add(frame, rng.integers(0, 16, frame.shape, dtype=np.uint8))
+        x = (i * 13) % max(1, w - w // 8)
+        cv2.rectangle(frame, (x, h // 3), (x + w // 8, h // 3 + h // 6), (0, 200, 255), -1)
+        cy = h // 2 + int(h // 4 * np.sin(i / 10.0))
+        cv2.circle(frame, (w // 2, cy), h // 10, (255, 80, 40), -1)
+        writer.write(frame)
+        static = frame
+    writer.release()
+    return path
+
+
+def synthetic_wav_bytes(sample_rate, seconds, kind="tone", seed=0):
+    """16-bit mono WAV bytes."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sample_rate * seconds)) / float(sample_rate)
+    signal = np.zeros_like(t)
+    if "tone" in kind:
+        # a few harmonics with a slow vibrato so MFCCs are not constant
+        f0 = 220.0 * (1.0 + 0.01 * np.sin(2 * np.pi * 5 * t))
+        for k in (1, 2, 3):
+            signal += np.sin(2 * np.pi * k * f0 * t) / k
+    if "noise" in kind:
+        signal += 0.3 * rng.standard_normal(len(t))
+    signal = signal / (np.max(np.abs(signal)) + 1e-9) * 0.8
+    pcm = (signal * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def synthetic_corpus(documents, words, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        sentence = [rng.choice(_WORDS) for _ in range(words)]
+        corpus.append(" ".join(sentence).capitalize() + ".")
+    return corpus
+
+
+def ensure_fixtures(directory):
+    """
+    Generate every fixture into `directory` (skipping files that already exist).
+    Returns {"videos": {name: path}, "audio": {name: path}, "texts": {name: [str]}}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fixtures = {"videos": {}, "audio": {}, "texts": {}}
+    for name, (w, h, seconds, fps, kind) in VIDEOS.items():
+        path = os.path.join(directory, f"{name}.mp4")
+        if not os.path.exists(path):
+            write_synthetic_clip(path, (w, h), seconds, fps, kind)
+        fixtures["videos"][name] = path
+    for name, (sr, seconds, kind) in AUDIO.items():
+        path = os.path.join(directory, f"{name}.wav")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(synthetic_wav_bytes(sr, seconds, kind))
+        fixtures["audio"][name] = path
+    for name, (documents, words) in TEXTS.items():
+        fixtures["texts"][name] = synthetic_corpus(documents, words)
+    return fixtures
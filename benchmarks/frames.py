@@ -0,0 +1,69 @@
+# benchmarks/frames.py
+"""
+Peak RSS and time per video: list of frames vs contiguous FrameBuffer.
+Each run happens in a fresh process so ru_maxrss is not polluted by earlier runs.
+
+    python -m benchmarks.frames                 # synthetic 720p clip
+    python -m benchmarks.frames a.mp4 b.mov
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.fixtures import write_synthetic_clip
+
+
+def _run(path, contiguous, queue):
+    from video.preprocessor import VideoPreprocessor
+    from video.detectors import VideoDetector
+
+    t0 = time.perf_counter()
+    res, msg = VideoPreprocessor(contiguous=contiguous).process(path)
+    t1 = time.perf_counter()
+    if res is None:
+        queue.put({"error": msg})
+        return
+    frames, _ = res
+    VideoDetector().run_detection(frames)
+    t2 = time.perf_counter()
+    queue.put({
+        "frames": len(frames),
+        "decode_sec": round(t1 - t0, 3),
+        "detect_sec": round(t2 - t1, 3),
+        "total_sec": round(t2 - t0, 3),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def measure(path, contiguous):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(path, contiguous, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare frame containers")
+    parser.add_argument("videos", nargs="*", help="Video files (default: a synthetic 720p clip)")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic clip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = args.videos or [write_synthetic_clip(os.path.join(tmp, "720p.mp4"), (1280, 720), args.seconds)]
+        for path in videos:
+            for contiguous in (False, True):
+                row = {"video": os.path.basename(path), "container": "FrameBuffer" if contiguous else "list"}
+                row.update(measure(path, contiguous))
+                print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/fusion.py
+"""
+Score fusion for many videos: VideoDetector.finish() per video vs fuse_batch().
+
+    python -m benchmarks.fusion --videos 100000
+
+Inputs are random detector outputs (frame/temporal scores, face flags, ~120 flow
+magnitudes per video), so no decoding is involved. Reports time per video and the
+memory held by the results (list of dicts vs one structured array).
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from video.detectors import VideoDetector, FEATURE_DTYPE, feature_row, fuse_batch
+
+
+def synthetic_outputs(n, pairs, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = rng.random(n)
+    temporal = rng.random(n)
+    face = rng.random(n) < 0.4
+    mags = rng.gamma(2.0, 0.3, size=(n, pairs))
+    return [(float(frame[i]), bool(face[i]), float(temporal[i]), mags[i].tolist()) for i in range(n)]
+
+
+def timed(fn):
+    """(result, seconds, bytes still allocated by the result); timing runs untraced."""
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    del out
+    tracemalloc.start()
+    out = fn()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch score fusion benchmark")
+    parser.add_argument("--videos", type=int, default=100000)
+    parser.add_argument("--pairs", type=int, default=120, help="Flow magnitudes per video")
+    args = parser.parse_args()
+
+    outputs = synthetic_outputs(args.videos, args.pairs)
+    detector = VideoDetector()
+
+    dicts, scalar_sec, scalar_mem = timed(
+        lambda: [detector.finish(f, face, t, mags, {}) for f, face, t, mags in outputs])
+    features, features_sec, _ = timed(
+        lambda: np.array([feature_row(*o) for o in outputs], dtype=FEATURE_DTYPE))
+    fused, batch_sec, batch_mem = timed(lambda: fuse_batch(features))
+
+    diff = max(abs(float(fused["ai_probability"][i]) - dicts[i]["ai_probability"]) for i in range(len(dicts)))
+    for row in (
+        {"path": "finish_per_video", "sec": scalar_sec, "result_bytes": scalar_mem},
+        {"path": "fuse_batch", "sec": batch_sec, "result_bytes": batch_mem,
+         "feature_build_sec": round(features_sec, 4), "feature_bytes": features.nbytes},
+    ):
+        row.update({
+            "videos": args.videos,
+            "us_per_video": round(row["sec"] / args.videos * 1e6, 3),
+            "sec": round(row["sec"], 4),
+        })
+        print(json.dumps(row))
+    print(json.dumps({"max_abs_diff_ai_probability": round(diff, 6)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/handoff.py
+"""
+Cost of handing decoded frames to another process: pickling through a
+multiprocessing.Queue vs slot numbers over a SharedFrameRing.
+
+    python -m benchmarks.handoff
+    python -m benchmarks.handoff --frames 2000 --size 1280x720 --slots 16
+
+Both transports carry a BGR frame plus its gray plane and have the same number
+of frames in flight; the consumer reads one pixel of each so the data is touched
+in the receiving process. Reported times run from the first send until the consumer
+has seen the last frame.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from video.shm import SharedFrameRing
+
+
+def _pickle_consumer(q, done):
+    seen = 0
+    checksum = 0
+    while True:
+        item = q.get()
+        if item is None:
+            break
+        position, frame, gray = item
+        checksum += int(frame[0, 0, 0]) + int(gray[-1, -1])
+        seen += 1
+    done.put((seen, checksum, time.perf_counter()))
+
+
+def _ring_consumer(ring, done):
+    seen = 0
+    checksum = 0
+    while True:
+        slot = ring.get(0)
+        if slot is None:
+            break
+        checksum += int(ring.frame(slot)[0, 0, 0]) + int(ring.gray(slot)[-1, -1])
+        ring.release(slot)
+        seen += 1
+    done.put((seen, checksum, time.perf_counter()))
+    ring.close()
+
+
+def _frames(n, width, height):
+    rng = np.random.default_rng(0)
+    # a handful of distinct frames, reused, so generation stays out of the timing
+    pool = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    grays = [f[:, :, 1].copy() for f in pool]
+    return [(pool[i % 4], grays[i % 4]) for i in range(n)]
+
+
+def bench_pickle(ctx, frames, slots):
+    q = ctx.Queue(maxsize=slots)
+    done = ctx.Queue()
+    proc = ctx.Process(target=_pickle_consumer, args=(q, done))
+    proc.start()
+    q.put((-1, *frames[0]))  # warm-up: consumer is running
+    t0 = time.perf_counter()
+    for k, (frame, gray) in enumerate(frames[1:], start=1):
+        q.put((k, frame, gray))
+    q.put(None)
+    seen, _, t_end = done.get()
+    proc.join()
+    return seen - 1, t_end - t0
+
+
+def bench_ring(ctx, frames, slots):
+    height, width = frames[0][0].shape[:2]
+    ring = SharedFrameRing(slots, height, width, consumers=1, ctx=ctx)
+    done = ctx.Queue()
+    proc = ctx.Process(target=_ring_consumer, args=(ring, done))
+    proc.start()
+    try:
+        slot = ring.acquire()  # warm-up, as above
+        ring.write(slot, *frames[0])
+        ring.publish(slot, -1, [0])
+        t0 = time.perf_counter()
+        for k, (frame, gray) in enumerate(frames[1:], start=1):
+            slot = ring.acquire()
+            ring.write(slot, frame, gray)
+            ring.publish(slot, k, [0])
+        ring.signal(0, None)
+        seen, _, t_end = done.get()
+        proc.join()
+    finally:
+        ring.close()
+    return seen - 1, t_end - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame handoff microbenchmark")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--size", default="640x360", help="WIDTHxHEIGHT")
+    parser.add_argument("--slots", type=int, default=16, help="Frames in flight")
+    parser.add_argument("--start-method", default="spawn", choices=mp.get_all_start_methods())
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    ctx = mp.get_context(args.start_method)
+    frames = _frames(args.frames + 1, width, height)
+    frame_bytes = width * height * 4
+    for name, bench in (("pickle_queue", bench_pickle), ("shared_memory_ring", bench_ring)):
+        n, elapsed = bench(ctx, frames, args.slots)
+        print(json.dumps({
+            "transport": name,
+            "frames": n,
+            "size": args.size,
+            "slots": args.slots,
+            "elapsed_sec": round(elapsed, 4),
+            "us_per_frame": round(elapsed / max(n, 1) * 1e6, 1),
+            "frames_per_sec": round(n / elapsed, 1) if elapsed > 0 else None,
+            "mb_per_sec": round(n * frame_bytes / elapsed / 1e6, 1) if elapsed > 0 else None,
+        }))
+
+
+if __name__ == "__main__":
+    main()
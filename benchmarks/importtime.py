@@ -0,0 +1,93 @@
+# benchmarks/importtime.py
+"""
+Import cost of the service entry points, from `python -X importtime`.
+
+    python -m benchmarks.importtime                              # Frontend.main
+    python -m benchmarks.importtime video.main --top 20
+    python -m benchmarks.importtime --budget-ms 1000             # exit 1 over budget
+
+Each module is imported in a fresh interpreter from the repo root. Prints the
+total, the heaviest modules by self and cumulative time, and how many top-level
+packages were pulled in. For the gateway, the heavy audio stack (FORBIDDEN) must
+not appear: it is loaded on first use or by the startup warm-up, and importing
+it again at module level fails the run.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages each entry point must not import at module level
+FORBIDDEN = {
+    "Frontend.main": ("audio", "librosa", "sklearn", "soundfile", "joblib", "numba", "pydub"),
+}
+
+
+def import_profile(module, python=sys.executable):
+    """
+    Import `module` in a fresh interpreter under -X importtime.
+    returns (wall seconds, [(name, self_us, cumulative_us, depth)])
+    """
+    code = f"import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)"
+    out = subprocess.run([python, "-X", "importtime", "-c", code], cwd=ROOT,
+                         capture_output=True, text=True, timeout=300)
+    if out.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {out.stderr.strip().splitlines()[-1:]}")
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package" (indent = nesting)
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return float(out.stdout.strip().splitlines()[-1]), rows
+
+
+def report(module, top=10):
+    wall, rows = import_profile(module)
+    packages = sorted({name.split(".")[0] for name, *_ in rows})
+    total_us = next((cum for name, _, cum, _ in reversed(rows) if name == module), sum(r[1] for r in rows))
+    forbidden = [p for p in FORBIDDEN.get(module, ()) if p in packages]
+    return {
+        "module": module,
+        "wall_ms": round(wall * 1000, 1),
+        "importtime_ms": round(total_us / 1000, 1),
+        "modules": len(rows),
+        "top_cumulative": [(name, round(cum / 1000, 1)) for name, _, cum, depth in
+                           sorted(rows, key=lambda r: -r[2]) if depth <= 1][:top],
+        "top_self": [(name, round(own / 1000, 1)) for name, own, _, _ in sorted(rows, key=lambda r: -r[1])][:top],
+        "packages": len(packages),
+        "forbidden_imported": forbidden,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for service entry points")
+    parser.add_argument("modules", nargs="*", default=["Frontend.main"], help="Modules to import")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if any module's import takes longer")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        row = report(module, args.top)
+        print(json.dumps(row))
+        if row["forbidden_imported"]:
+            print(f"{module}: imports {', '.join(row['forbidden_imported'])} at module level", file=sys.stderr)
+            failed = True
+        if args.budget_ms is not None and row["wall_ms"] > args.budget_ms:
+            print(f"{module}: import took {row['wall_ms']} ms, over the {args.budget_ms} ms budget", file=sys.stderr)
+            failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
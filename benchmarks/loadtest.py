@@ -0,0 +1,208 @@
+# benchmarks/loadtest.py
+"""
+Async load generator for the gateway's /analyze endpoint (local targets only).
+
+    python -m benchmarks.loadtest --rps 20 --duration 30 --mix audio=1,video=1,text=2
+    python -m benchmarks.loadtest --concurrency 16 --duration 30
+    python -m benchmarks.loadtest --stub --rps 50      # stub text/video services + AUDIO_STUB gateway
+
+Reports p50/p95/p99 latency, error rate and throughput per modality.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from benchmarks.fixtures import synthetic_corpus, synthetic_wav_bytes, write_synthetic_clip
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_payloads():
+    """One upload per modality: (filename, bytes, content_type)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), (640, 360), seconds=5)
+        with open(path, "rb") as f:
+            video = f.read()
+    text = "\n".join(synthetic_corpus(4, 60)).encode("utf-8")
+    return {
+        "audio": ("load.wav", synthetic_wav_bytes(16000, 5, "tone+noise"), "audio/wav"),
+        "video": ("load.mp4", video, "video/mp4"),
+        "text": ("load.txt", text, "text/plain"),
+    }
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {"audio", "video", "text"}
+    if unknown:
+        raise SystemExit(f"unknown modalities in --mix: {sorted(unknown)}")
+    return weights
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+async def send(client, url, modality, payload, samples):
+    name, data, ctype = payload
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        response = await client.post(url, files={"file": (name, data, ctype)})
+        # /analyze answers 200 with a null body when analysis fails
+        body = response.json() if response.status_code == 200 else None
+        ok = isinstance(body, dict) and body.get("score") is not None
+    except Exception:
+        ok = False
+    samples.append((modality, time.perf_counter() - t0, ok))
+
+
+async def run_load(url, payloads, weights, duration, rps=None, concurrency=None, max_inflight=1000, seed=0):
+    rng = random.Random(seed)
+    names = list(weights)
+    choices = [weights[n] for n in names]
+    samples = []
+    limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        if rps:
+            # Open loop: arrivals on a fixed schedule, independent of response times
+            tasks = set()
+            interval = 1.0 / rps
+            next_t = start
+            while next_t < deadline:
+                await asyncio.sleep(max(0.0, next_t - time.perf_counter()))
+                if len(tasks) < max_inflight:
+                    modality = rng.choices(names, choices)[0]
+                    task = asyncio.create_task(send(client, url, modality, payloads[modality], samples))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                else:
+                    samples.append(("dropped", 0.0, False))
+                next_t += interval
+            if tasks:
+                await asyncio.gather(*tasks)
+        else:
+            # Closed loop: `concurrency` clients each send back-to-back requests
+            async def worker():
+                while time.perf_counter() < deadline:
+                    modality = rng.choices(names, choices)[0]
+                    await send(client, url, modality, payloads[modality], samples)
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def summarize(samples, elapsed):
+    report = {"elapsed_sec": round(elapsed, 3), "modalities": {}}
+    groups = {}
+    for modality, latency, ok in samples:
+        groups.setdefault(modality, []).append((latency, ok))
+        groups.setdefault("all", []).append((latency, ok))
+    for modality, rows in sorted(groups.items()):
+        ok_latencies = sorted(lat for lat, ok in rows if ok)
+        errors = sum(1 for _, ok in rows if not ok)
+        report["modalities"][modality] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "throughput_rps": round(len(ok_latencies) / elapsed, 3) if elapsed > 0 else None,
+            "p50_ms": _ms(percentile(ok_latencies, 50)),
+            "p95_ms": _ms(percentile(ok_latencies, 95)),
+            "p99_ms": _ms(percentile(ok_latencies, 99)),
+        }
+    return report
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _wait_for_port(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise SystemExit(f"service on port {port} did not come up")
+
+
+def start_stub_stack(gateway_port):
+    """Stub text/video services on 8002/8003 and a gateway with AUDIO_STUB=1."""
+    env = dict(os.environ, AUDIO_STUB="1")
+    specs = [
+        ("benchmarks.stubs:text_app", 8002, os.environ),
+        ("benchmarks.stubs:video_app", 8003, os.environ),
+        ("Frontend.main:app", gateway_port, env),
+    ]
+    procs = []
+    for target, port, proc_env in specs:
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=proc_env))
+    for _, port, _ in specs:
+        _wait_for_port(port)
+    return procs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the gateway /analyze endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8001/analyze")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="Fixed arrival rate (open loop)")
+    mode.add_argument("--concurrency", type=int, help="Concurrent clients (closed loop)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to generate load")
+    parser.add_argument("--mix", default="audio=1,video=1,text=1", help="Modality weights, e.g. audio=1,text=3")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--stub", action="store_true", help="Launch stub services + gateway locally first")
+    parser.add_argument("--output", help="Write the JSON report here as well")
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    if target.hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"refusing to load-test non-local host {target.hostname!r}")
+    if not args.rps and not args.concurrency:
+        args.concurrency = 8
+
+    procs = start_stub_stack(target.port or 80) if args.stub else []
+    try:
+        payloads = build_payloads()
+        samples, elapsed = asyncio.run(run_load(
+            args.url, payloads, parse_mix(args.mix), args.duration,
+            rps=args.rps, concurrency=args.concurrency, max_inflight=args.max_inflight))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=10)
+
+    report = summarize(samples, elapsed)
+    report.update({"url": args.url, "rps": args.rps, "concurrency": args.concurrency,
+                   "mix": args.mix, "stub": args.stub})
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
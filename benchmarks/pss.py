@@ -0,0 +1,120 @@
+# benchmarks/pss.py
+"""
+Proportional set size of a server and its workers (Linux, /proc/<pid>/smaps_rollup).
+PSS splits each shared page between the processes mapping it, so the PSS sum is
+what the whole process tree really costs, unlike the RSS sum.
+
+    python -m benchmarks.pss --pid <master pid>       # an already running server
+    python -m benchmarks.pss --spawn 4                # start text.serve --workers 4, measure, stop
+    python -m benchmarks.pss --spawn 4 --uvicorn      # same with uvicorn --workers 4 for comparison
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def smaps(pid):
+    """{field: MiB} from smaps_rollup."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                out[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    return out
+
+
+def children(pid):
+    """Direct children of pid (scans /proc; the per-task children file is not always built in)."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the comm field may contain spaces; ppid is the 2nd field after it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return sorted(found)
+
+
+def report(master):
+    rows = []
+    for role, pid in [("master", master)] + [("worker", c) for c in children(master)]:
+        try:
+            mem = smaps(pid)
+        except OSError:
+            continue
+        rows.append(dict({"role": role, "pid": pid}, **{k.lower() + "_mb": round(v, 1) for k, v in mem.items()}))
+    for row in rows:
+        print(json.dumps(row))
+    print(json.dumps({
+        "processes": len(rows),
+        "workers": sum(r["role"] == "worker" for r in rows),
+        "rss_sum_mb": round(sum(r.get("rss_mb", 0) for r in rows), 1),
+        "pss_sum_mb": round(sum(r.get("pss_mb", 0) for r in rows), 1),
+    }))
+
+
+def wait_ready(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return True
+        except Exception:
+            time.sleep(1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-process PSS of a pre-fork server")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--pid", type=int, help="Master process to inspect")
+    group.add_argument("--spawn", type=int, metavar="WORKERS", help="Start the text service with this many workers")
+    parser.add_argument("--uvicorn", action="store_true", help="With --spawn: plain uvicorn --workers instead")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--requests", type=int, default=8, help="With --spawn: warm-up requests before measuring")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the model to load")
+    args = parser.parse_args()
+
+    if args.pid:
+        report(args.pid)
+        return
+
+    if args.uvicorn:
+        cmd = [sys.executable, "-m", "uvicorn", "text.main:app", "--port", str(args.port),
+               "--workers", str(args.spawn)]
+    else:
+        cmd = [sys.executable, "-m", "text.serve", "--port", str(args.port), "--workers", str(args.spawn)]
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        if not wait_ready(base + "/", args.timeout):
+            sys.exit("server did not come up")
+        # touch every worker's inference path so its lazily allocated buffers count too
+        body = json.dumps({"text": "A short warm-up sentence for the zero-shot model."}).encode()
+        for k in range(args.requests):
+            req = urllib.request.Request(base + "/analyze_text", data=body,
+                                         headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                resp.read()
+        report(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
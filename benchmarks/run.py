@@ -0,0 +1,230 @@
+# benchmarks/run.py
+"""
+Benchmark suite over deterministic synthetic fixtures.
+
+    python -m benchmarks.run                           # all cases -> benchmarks/results/<commit>.json
+    python -m benchmarks.run --cases frame_detect mfcc --repeat 10
+    python -m benchmarks.run --compare benchmarks/results/<old>.json
+
+Each case runs in a fresh process so its peak RSS is its own. Cases whose
+dependencies are missing are recorded as skipped instead of failing the run.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import traceback
+import wave
+
+from benchmarks.fixtures import ensure_fixtures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(ROOT, "benchmarks", ".fixtures")
+DEFAULT_RESULTS = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure(fn, repeat, units=1):
+    """Latency stats over `repeat` calls; throughput is `units` per second at the median."""
+    fn()  # warm-up (lazy imports, cascade loading, caches)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "repeat": repeat,
+        "min_sec": round(times[0], 5),
+        "median_sec": round(median, 5),
+        "p95_sec": round(times[min(len(times) - 1, int(0.95 * len(times)))], 5),
+        "throughput_per_sec": round(units / median, 3) if median > 0 else None,
+    }
+
+
+# --- cases ---
+# Each case yields (fixture_name, unit_name, units, fn); setup work stays untimed.
+
+def case_video_preprocess(fixtures):
+    from video.preprocessor import VideoPreprocessor
+
+    pre = VideoPreprocessor()
+    for name, path in fixtures["videos"].items():
+        res, _ = pre.process(path)
+        n = len(res[0]) if res else 0
+        yield name, "frames", n, lambda path=path: pre.process(path)
+
+
+def _decoded(fixtures):
+    from video.preprocessor import VideoPreprocessor
+
+    pre = VideoPreprocessor()
+    for name, path in fixtures["videos"].items():
+        res, msg = pre.process(path)
+        if res is None:
+            raise RuntimeError(f"{name}: {msg}")
+        yield name, res[0]
+
+
+def case_frame_detect(fixtures):
+    from video.models.frame_detector import FrameDetector
+
+    fd = FrameDetector()
+    for name, frames in _decoded(fixtures):
+        n = len(fd.sample(frames))
+        # a fresh list each call so no gray cache carries over between runs
+        yield name, "frames", n, lambda frames=frames: fd.detect(list(frames))
+
+
+def case_temporal_detect(fixtures):
+    from video.models.temporal_detector import TemporalDetector
+
+    td = TemporalDetector()
+    for name, frames in _decoded(fixtures):
+        n = max(0, len(td.sample(frames)) - 1)
+        # a fresh list each call so no gray cache carries over between runs
+        yield name, "pairs", n, lambda frames=frames: td.detect(list(frames))
+
+
+def case_mfcc(fixtures):
+    from audio.app import extract_mfcc_features_from_bytes
+
+    for name, path in fixtures["audio"].items():
+        with open(path, "rb") as f:
+            data = f.read()
+        with wave.open(path) as w:
+            seconds = w.getnframes() / float(w.getframerate())
+        yield name, "audio_sec", seconds, lambda data=data: extract_mfcc_features_from_bytes(data)
+
+
+def case_text_classifier(fixtures):
+    from text.main import classifier
+
+    labels = ["AI-generated", "Human-written"]
+    for name, corpus in fixtures["texts"].items():
+        yield name, "docs", len(corpus), lambda corpus=corpus: [classifier(t, candidate_labels=labels) for t in corpus]
+
+
+def case_gateway_import(fixtures):
+    from benchmarks.importtime import import_profile
+
+    # a fresh interpreter per call; the audio stack must stay out of this path
+    yield "Frontend.main", "imports", 1, lambda: import_profile("Frontend.main")
+
+
+CASES = {
+    "video_preprocess": case_video_preprocess,
+    "frame_detect": case_frame_detect,
+    "temporal_detect": case_temporal_detect,
+    "mfcc": case_mfcc,
+    "text_classifier": case_text_classifier,
+    "gateway_import": case_gateway_import,
+}
+
+# Cases that are too slow to repeat many times get their own cap
+MAX_REPEAT = {"text_classifier": 2}
+
+
+def _run_case(name, fixtures, repeat, queue):
+    rows = []
+    try:
+        repeat = min(repeat, MAX_REPEAT.get(name, repeat))
+        for fixture, unit, units, fn in CASES[name](fixtures):
+            row = {"case": name, "fixture": fixture, "unit": unit, "units": units}
+            row.update(measure(fn, repeat, units))
+            # process high-water mark so far (includes this case's setup)
+            row["peak_rss_mb"] = round(_rss_mb(), 1)
+            rows.append(row)
+    except ImportError as e:
+        rows.append({"case": name, "skipped": f"missing dependency: {e}"})
+    except Exception as e:
+        rows.append({"case": name, "error": f"{e}", "traceback": traceback.format_exc(limit=3)})
+    queue.put(rows)
+
+
+def run_case(name, fixtures, repeat):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(name, fixtures, repeat, queue))
+    proc.start()
+    rows = queue.get()
+    proc.join()
+    return rows
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(old_path, new_report, threshold=0.10):
+    """Print median latency ratios new/old per (case, fixture); flag regressions above threshold."""
+    with open(old_path) as f:
+        old = json.load(f)
+    old_rows = {(r["case"], r.get("fixture")): r for r in old["results"] if "median_sec" in r}
+    regressions = 0
+    for row in new_report["results"]:
+        key = (row["case"], row.get("fixture"))
+        if "median_sec" not in row or key not in old_rows:
+            continue
+        ratio = row["median_sec"] / max(old_rows[key]["median_sec"], 1e-9)
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        regressions += flag == "REGRESSION"
+        print(f"{key[0]:<18} {key[1]:<22} {old_rows[key]['median_sec']:>9.4f}s -> {row['median_sec']:>9.4f}s "
+              f"x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="Subset of cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per fixture (after one warm-up)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture cache directory")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    fixtures = ensure_fixtures(args.fixtures)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    for name in args.cases or list(CASES):
+        rows = run_case(name, fixtures, max(1, args.repeat))
+        for row in rows:
+            print(json.dumps(row))
+        report["results"].extend(rows)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS, f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+    if args.compare:
+        regressions = compare(args.compare, report)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/segments.py
+"""
+Decode scaling of VideoPreprocessor(decode_workers=K) on long videos.
+
+    python -m benchmarks.segments                          # synthetic 3-minute 720p clip
+    python -m benchmarks.segments long.mp4 --workers 1 2 4 8
+
+Rows: the serial decoder (one capture, a seek per sampled frame), then the segment
+decoder with each worker count. Worker pools are started and warmed up before
+timing; their start-up cost is reported separately. Speedups are relative to the
+serial decoder; they cannot exceed the machine's core count (cpu_count is printed).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import write_synthetic_clip
+
+
+def best_of(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def bench(path, worker_counts, repeat, max_frames):
+    from video.preprocessor import VideoPreprocessor
+    from video import segments
+
+    pre = VideoPreprocessor(max_frames=max_frames)
+    (res, msg), serial = best_of(lambda: pre.process(path), repeat)
+    if res is None:
+        print(json.dumps({"video": os.path.basename(path), "error": msg}))
+        return
+    frames = len(res[0])
+    print(json.dumps({"video": os.path.basename(path), "mode": "serial", "workers": 1, "frames": frames,
+                      "seconds": round(serial, 3), "frames_per_sec": round(frames / serial, 1)}))
+
+    for k in worker_counts:
+        t0 = time.perf_counter()
+        segments.get_pool(k)
+        # one untimed run so every worker has imported cv2 and opened a capture
+        pre.process_segments(path, workers=k)
+        startup = time.perf_counter() - t0
+        (res, msg), elapsed = best_of(lambda: pre.process_segments(path, workers=k), repeat)
+        if res is None:
+            print(json.dumps({"video": os.path.basename(path), "mode": "segments", "workers": k, "error": msg}))
+            continue
+        n = len(res[0])
+        print(json.dumps({
+            "video": os.path.basename(path),
+            "mode": "segments",
+            "workers": k,
+            "frames": n,
+            "seconds": round(elapsed, 3),
+            "frames_per_sec": round(n / elapsed, 1),
+            "speedup_vs_serial": round(serial / elapsed, 2),
+            "pool_startup_sec": round(startup, 2),
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment-parallel decode scaling")
+    parser.add_argument("videos", nargs="*", help="Video files (default: a synthetic clip)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=180, help="Length of the synthetic clip")
+    parser.add_argument("--size", default="1280x720", help="Synthetic clip WIDTHxHEIGHT")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is reported)")
+    args = parser.parse_args()
+
+    print(json.dumps({"cpu_count": os.cpu_count()}))
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = args.videos
+        if not videos:
+            size = tuple(int(v) for v in args.size.lower().split("x"))
+            videos = [write_synthetic_clip(os.path.join(tmp, "long.mp4"), size, args.seconds)]
+        for path in videos:
+            bench(path, args.workers, args.repeat, args.max_frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/stubs.py
+"""
+Instant-answer stand-ins for the text (8002) and video (8003) services, so load
+tests can isolate gateway overhead:
+
+    uvicorn benchmarks.stubs:text_app --port 8002
+    uvicorn benchmarks.stubs:video_app --port 8003
+
+Start the gateway with AUDIO_STUB=1 to skip the in-process audio model as well.
+"""
+import json
+
+from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import StreamingResponse
+
+text_app = FastAPI(title="Text AI Detector (stub)")
+video_app = FastAPI(title="AI Video Detector (stub)")
+
+
+@text_app.post("/analyze_text")
+def analyze_text(payload: dict):
+    return {"probability": 0.5, "confidence": "Low", "explanation": "stub"}
+
+
+@text_app.post("/analyze_text_batch")
+def analyze_text_batch(payload: dict):
+    texts = payload.get("texts", [])
+    rows = payload.get("rows") or [payload.get("start", 0) + i for i in range(len(texts))]
+    lines = (json.dumps({"row": row, "probability": 0.5, "confidence": "Low"}) + "\n" for row in rows)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+VIDEO_RESULT = {
+    "status": "success",
+    "ai_probability": 0.5,
+    "confidence": 0.5,
+    "explanation": "stub",
+    "processing_time": 0.0,
+}
+
+
+@video_app.post("/analyze_video")
+async def analyze_video(file: UploadFile = File(...)):
+    await file.read()  # still pay for receiving the upload
+    return dict(VIDEO_RESULT, video_file=file.filename)
+
+
+@video_app.post("/analyze_video_stream")
+async def analyze_video_stream(file: UploadFile = File(...)):
+    await file.read()
+
+    async def stream():
+        yield json.dumps({"event": "progress", "stage": "decode", "frames_decoded": 1, "frames_total": 1}) + "\n"
+        yield json.dumps(dict(VIDEO_RESULT, event="result", video_file=file.filename)) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
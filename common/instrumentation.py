@@ -0,0 +1,131 @@
+# instrumentation.py
+"""
+Shared timing instrumentation for the frontend, text and video services.
+
+    with span("decode"):
+        ...
+
+    @timed("sharpness")
+    def _sharpness(self, gray): ...
+
+Every span is observed into the `b2b_stage_seconds{service, stage}` Prometheus
+histogram, served at /metrics by install(app, service). With SERVER_TIMING=1 the
+spans recorded while handling a request are also returned as a `Server-Timing` header.
+With DEBUG_PROFILE_TOKEN set, GET /debug/profile?seconds=N returns a sampled
+collapsed-stack profile of the process (see common.profiler).
+"""
+import contextvars
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+
+# prometheus_client is optional; without it spans still feed Server-Timing
+try:
+    from prometheus_client import Histogram, CONTENT_TYPE_LATEST, generate_latest
+except Exception:
+    Histogram = None
+
+SERVICE = os.environ.get("B2B_SERVICE", "unknown")
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+if Histogram is not None:
+    STAGE_SECONDS = Histogram(
+        "b2b_stage_seconds",
+        "Time spent in each pipeline stage",
+        ["service", "stage"],
+        buckets=BUCKETS,
+    )
+else:
+    STAGE_SECONDS = None
+
+# Per-request list of (stage, seconds); set by the Server-Timing middleware
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+
+def observe(stage, seconds):
+    if STAGE_SECONDS is not None:
+        STAGE_SECONDS.labels(SERVICE, stage).observe(seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - t0)
+
+
+def timed(stage):
+    """Decorator form of span() for plain and async functions."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(spans):
+    """Aggregate repeated stages (e.g. per-frame features) into one entry each."""
+    totals = {}
+    for stage, seconds in spans:
+        total, count = totals.get(stage, (0.0, 0))
+        totals[stage] = (total + seconds, count + 1)
+    parts = []
+    for stage, (total, count) in totals.items():
+        entry = f"{stage};dur={total * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="x{count}"'
+        parts.append(entry)
+    return ", ".join(parts)
+
+
+def install(app, service):
+    """
+    Label this process's spans with `service`, add /metrics, the Server-Timing
+    middleware and the token-guarded /debug/profile sampler (common.profiler).
+    """
+    global SERVICE
+    SERVICE = service
+
+    from fastapi import Response
+    from common import profiler
+
+    profiler.install(app)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        if STAGE_SECONDS is None:
+            return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    if SERVER_TIMING:
+        @app.middleware("http")
+        async def server_timing(request, call_next):
+            spans = []
+            token = _request_spans.set(spans)
+            try:
+                with span("request"):
+                    response = await call_next(request)
+            finally:
+                _request_spans.reset(token)
+            # Streaming bodies are still running here; their spans only reach /metrics
+            if spans:
+                response.headers["Server-Timing"] = server_timing_header(spans)
+            return response
@@ -0,0 +1,147 @@
+# profiler.py
+"""
+On-demand sampling profiler, served by every app at GET /debug/profile?seconds=N
+(added by common.instrumentation.install).
+
+    DEBUG_PROFILE_TOKEN=secret uvicorn video.main:app --port 8003
+    curl -H "X-Debug-Token: secret" "localhost:8003/debug/profile?seconds=10" > video.folded
+    flamegraph.pl video.folded > video.svg        # or load it in speedscope
+
+A daemon thread snapshots every Python thread's stack (sys._current_frames) at
+`hz` and counts identical stacks; the result is in collapsed-stack format, one
+"thread;outer;...;inner count" line per stack. Only Python frames are seen: time
+inside C extensions (OpenCV, NumPy, torch) is charged to the Python function that
+called them. The endpoint is disabled (404) unless DEBUG_PROFILE_TOKEN is set.
+"""
+import collections
+import hmac
+import os
+import sys
+import threading
+import time
+
+MAX_SECONDS = 120
+DEFAULT_HZ = 100
+
+# Leaf frames of threads that are parked, not working
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("selectors.py", "EpollSelector.select"),
+    ("threading.py", "wait"),
+    ("threading.py", "Condition.wait"),
+    ("queue.py", "get"),
+    ("queue.py", "Queue.get"),
+    ("thread.py", "_worker"),
+}
+
+_busy = threading.Lock()
+# sys.path entries, longest first, stripped from file names ("" is the working directory)
+_roots = sorted({os.path.abspath(p or os.getcwd()) for p in sys.path if os.path.isdir(p or os.getcwd())},
+                key=len, reverse=True)
+
+
+def _label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    path = os.path.abspath(code.co_filename)
+    for root in _roots:
+        if path.startswith(root + os.sep):
+            path = path[len(root) + 1:]
+            break
+    return f"{path}:{name}"
+
+
+def _is_idle(frame):
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name)) in _IDLE_LEAVES
+
+
+class StackSampler:
+    """
+    Counts the stacks of all threads (except its own) every 1/hz seconds:
+      - start() / stop() bracket the window; collapsed() renders the counts
+      - idle=False drops samples of threads parked in select/wait/queue get
+    """
+
+    def __init__(self, hz=DEFAULT_HZ, idle=False):
+        self.interval = 1.0 / max(1, min(int(hz), 1000))
+        self.idle = bool(idle)
+        self.counts = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self, names, own):
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.idle and _is_idle(frame)):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        own = threading.get_ident()
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample(names, own)
+            self.samples += 1
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_at = time.perf_counter()  # fell behind; don't burst to catch up
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+def authorized(token):
+    """True if profiling is enabled and `token` matches DEBUG_PROFILE_TOKEN."""
+    expected = os.environ.get("DEBUG_PROFILE_TOKEN")
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+def install(app):
+    """Add GET /debug/profile to a FastAPI app."""
+    import asyncio
+    from fastapi import Header, HTTPException, Query
+    from fastapi.responses import PlainTextResponse
+
+    @app.get("/debug/profile", include_in_schema=False)
+    async def debug_profile(seconds: float = Query(10.0, gt=0, le=MAX_SECONDS),
+                            hz: int = Query(DEFAULT_HZ, ge=1, le=1000),
+                            idle: bool = False,
+                            x_debug_token: str = Header(None)):
+        if not os.environ.get("DEBUG_PROFILE_TOKEN"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        if not authorized(x_debug_token):
+            raise HTTPException(status_code=403, detail="Bad or missing X-Debug-Token")
+        if not _busy.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        try:
+            sampler = StackSampler(hz=hz, idle=idle)
+            sampler.start()
+            try:
+                # the event loop keeps serving (and being sampled) meanwhile
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+        finally:
+            _busy.release()
+        return PlainTextResponse(sampler.collapsed(), headers={
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Stacks": str(len(sampler.counts)),
+        })
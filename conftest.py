@@ -0,0 +1,3 @@
+# conftest.py
+# Puts the repository root on sys.path for pytest: the services are imported as
+# top-level packages (video, text, Frontend, common), as when they are run from here.
@@ -0,0 +1,228 @@
+# tests/test_admission.py
+"""MemoryBudget queuing/timeout/cancellation, and how rejections reach HTTP clients."""
+import asyncio
+
+import pytest
+
+from video.admission import MB, AdmissionRejected, MemoryBudget
+
+
+async def _hold(budget, nbytes):
+    """Enter a reservation without leaving it; returns the context manager to __aexit__ later."""
+    cm = budget.reserve(nbytes)
+    await cm.__aenter__()
+    return cm
+
+
+def test_admits_while_budget_fits():
+    async def main():
+        budget = MemoryBudget(100 * MB)
+        async with budget.reserve(40 * MB):
+            async with budget.reserve(60 * MB):
+                assert budget.reserved == 100 * MB
+                assert budget.active == 2
+        assert budget.reserved == 0 and budget.active == 0
+
+    asyncio.run(main())
+
+
+def test_queues_until_memory_is_released():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5)
+        held = await _hold(budget, 80 * MB)
+        started = asyncio.Event()
+
+        async def waiter():
+            async with budget.reserve(50 * MB):
+                started.set()
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.01)
+        assert not started.is_set()
+        assert budget.snapshot()["waiting"] == 1
+
+        await held.__aexit__(None, None, None)
+        await task
+        assert started.is_set()
+        assert budget.reserved == 0 and budget.active == 0 and budget.snapshot()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_waiters_are_served_in_order():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5)
+        held = await _hold(budget, 60 * MB)
+        order = []
+
+        async def request(name, nbytes):
+            async with budget.reserve(nbytes):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        big = asyncio.create_task(request("big", 90 * MB))
+        await asyncio.sleep(0)
+        # fits next to the held 60 MB, but must not overtake the queued request
+        small = asyncio.create_task(request("small", 30 * MB))
+        await asyncio.sleep(0.01)
+        assert order == []
+
+        await held.__aexit__(None, None, None)
+        await asyncio.gather(big, small)
+        assert order == ["big", "small"]
+
+    asyncio.run(main())
+
+
+def test_timeout_rejects_with_retry_hint():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=0.05)
+        held = await _hold(budget, 80 * MB)
+        with pytest.raises(AdmissionRejected) as e:
+            async with budget.reserve(50 * MB):
+                pass
+        assert e.value.retry_after is not None and e.value.retry_after >= 1
+        assert budget.reserved == 80 * MB and budget.snapshot()["waiting"] == 0
+        await held.__aexit__(None, None, None)
+        assert budget.reserved == 0
+
+    asyncio.run(main())
+
+
+def test_too_large_is_rejected_without_retry():
+    async def main():
+        budget = MemoryBudget(100 * MB)
+        with pytest.raises(AdmissionRejected) as e:
+            async with budget.reserve(101 * MB):
+                pass
+        assert e.value.retry_after is None
+        assert budget.reserved == 0 and budget.snapshot()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5, max_waiting=1)
+        held = await _hold(budget, 100 * MB)
+        queued = asyncio.create_task(_hold(budget, 10 * MB))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as e:
+            async with budget.reserve(10 * MB):
+                pass
+        assert e.value.retry_after is not None
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        await held.__aexit__(None, None, None)
+        assert budget.reserved == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5)
+        held = await _hold(budget, 80 * MB)
+        task = asyncio.create_task(_hold(budget, 50 * MB))
+        await asyncio.sleep(0.01)
+        assert budget.snapshot()["waiting"] == 1
+
+        task.cancel()  # client went away while queued
+        await asyncio.gather(task, return_exceptions=True)
+        assert budget.snapshot()["waiting"] == 0
+        await held.__aexit__(None, None, None)
+        assert budget.reserved == 0 and budget.active == 0
+
+    asyncio.run(main())
+
+
+def test_cancel_racing_admission_gives_memory_back():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5)
+        held = await _hold(budget, 80 * MB)
+        task = asyncio.create_task(_hold(budget, 50 * MB))
+        await asyncio.sleep(0.01)
+
+        # the cancellation is delivered first, but the release admits the waiter
+        # before the waiter runs again: it must hand the admitted bytes back
+        task.cancel()
+        await held.__aexit__(None, None, None)
+        assert budget.reserved == 50 * MB
+        await asyncio.gather(task, return_exceptions=True)
+        assert task.cancelled()
+        assert budget.reserved == 0 and budget.active == 0 and budget.snapshot()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancel_after_admission_never_leaks():
+    async def main():
+        budget = MemoryBudget(100 * MB, timeout=5)
+        held = await _hold(budget, 80 * MB)
+        task = asyncio.create_task(_hold(budget, 50 * MB))
+        await asyncio.sleep(0.01)
+
+        # admitted first, cancelled second: depending on the Python version the
+        # cancellation is honoured or the request simply goes ahead
+        await held.__aexit__(None, None, None)
+        task.cancel()
+        (result,) = await asyncio.gather(task, return_exceptions=True)
+        if not isinstance(result, BaseException):
+            assert budget.reserved == 50 * MB
+            await result.__aexit__(None, None, None)
+        assert budget.reserved == 0 and budget.active == 0 and budget.snapshot()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_request_releases_its_reservation():
+    async def main():
+        budget = MemoryBudget(100 * MB)
+        running = asyncio.Event()
+
+        async def request():
+            async with budget.reserve(70 * MB):
+                running.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(request())
+        await running.wait()
+        assert budget.reserved == 70 * MB
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert budget.reserved == 0 and budget.active == 0
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def video_client(tmp_path, monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from benchmarks.fixtures import write_synthetic_clip
+    import video.main
+
+    clip = write_synthetic_clip(str(tmp_path / "clip.mp4"), (160, 120), seconds=1)
+    monkeypatch.setattr(video.main, "fingerprints", None)
+
+    def post(budget):
+        monkeypatch.setattr(video.main, "admission", budget)
+        with TestClient(video.main.app) as client, open(clip, "rb") as f:
+            return client.post("/analyze_video", files={"file": ("clip.mp4", f, "video/mp4")})
+
+    return post
+
+
+def test_endpoint_returns_413_when_request_can_never_fit(video_client):
+    response = video_client(MemoryBudget(1 * MB))
+    assert response.status_code == 413
+    assert "Retry-After" not in response.headers
+    assert response.json()["status"] == "error"
+
+
+def test_endpoint_returns_503_with_retry_after_on_timeout(video_client):
+    budget = MemoryBudget(1024 * MB, timeout=0.1)
+    budget.reserved = budget.budget  # as if other requests held all of it
+    response = video_client(budget)
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,48 @@
+# tests/test_cascade.py
+"""CascadeModel confidence band: only a calibrated band answers anything directly."""
+import numpy as np
+import pytest
+
+from text.cascade import CascadeModel, HASH_DIMS, STAT_NAMES
+
+
+def model(**kwargs):
+    dims = HASH_DIMS + len(STAT_NAMES)
+    return CascadeModel(np.zeros(dims), 0.0, np.zeros(len(STAT_NAMES)), np.ones(len(STAT_NAMES)), **kwargs)
+
+
+def test_uncalibrated_model_escalates_everything():
+    # float32 sigmoids saturate to exactly 0 and 1; those must not count as sure either
+    probs = np.array([0.0, 1e-9, 0.3, 0.5, 0.7, 1.0], dtype=np.float32)
+    assert not model().confident(probs).any()
+
+
+def test_calibration_picks_the_narrowest_band_that_agrees():
+    rng = np.random.default_rng(0)
+    probs = rng.uniform(0, 1, 1000)
+    teacher = probs.copy()
+    # the student is wrong near 0.5 only
+    near = np.abs(probs - 0.5) < 0.1
+    teacher[near] = 1 - teacher[near]
+    low, high = model().calibrate(probs, teacher, min_agreement=0.97)
+    assert 0.35 < low < 0.42 and high == pytest.approx(1 - low)
+
+
+def test_calibration_without_enough_evidence_escalates_everything():
+    m = model()
+    rng = np.random.default_rng(1)
+    probs = rng.uniform(0, 1, 40)
+    assert m.calibrate(probs, probs, min_support=50) == CascadeModel.ESCALATE_ALL
+    # a student that disagrees with its teacher everywhere
+    probs = rng.uniform(0, 1, 1000)
+    assert m.calibrate(probs, 1 - probs) == CascadeModel.ESCALATE_ALL
+
+
+def test_fit_without_holdout_keeps_escalate_all(tmp_path):
+    texts = ["the model writes a very even sentence.", "lol ok whatever i guess!!"] * 10
+    fitted = CascadeModel.fit(texts, [1.0, 0.0] * 10, holdout=0.0, epochs=20)
+    assert (fitted.low, fitted.high) == CascadeModel.ESCALATE_ALL
+
+    path = str(tmp_path / "cascade.npz")
+    fitted.save(path)
+    assert not CascadeModel.load(path).confident(fitted.predict(texts)).any()
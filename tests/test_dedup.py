@@ -0,0 +1,80 @@
+# tests/test_dedup.py
+"""NearDuplicateIndex: MinHash estimates, LSH candidate lookup and LRU bounds."""
+import random
+
+import numpy as np
+import pytest
+
+from text.dedup import NearDuplicateIndex, shingles
+
+WORDS = ("model river stone quiet paper light orange window signal market garden winter "
+         "number bridge shadow engine letter forest coffee planet").split()
+
+
+def essay(seed, n=120):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(n))
+
+
+def jaccard(a, b):
+    sa, sb = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_exact_copy_is_a_hit_with_similarity_one():
+    index = NearDuplicateIndex()
+    text = essay(0)
+    index.add(text, 0.91)
+    assert index.lookup(text) == (0.91, 1.0)
+
+
+def test_case_and_punctuation_do_not_matter():
+    index = NearDuplicateIndex()
+    text = essay(1)
+    index.add(text, 0.3)
+    assert index.lookup(text.upper().replace(" ", ", ")) == (0.3, 1.0)
+
+
+def test_light_edit_hits_and_unrelated_text_misses():
+    index = NearDuplicateIndex(threshold=0.8)
+    text = essay(2)
+    index.add(text, 0.42)
+    words = text.split()
+    words[60] = "edited"
+    hit = index.lookup(" ".join(words))
+    assert hit is not None and hit[0] == 0.42 and hit[1] >= 0.8
+    assert index.lookup(essay(3)) is None
+    assert index.stats["hits"] == 1 and index.stats["misses"] == 1
+
+
+def test_signature_estimates_jaccard():
+    index = NearDuplicateIndex(num_perm=256, bands=64)
+    base = essay(4).split()
+    errors = []
+    for cut in (10, 30, 60, 90):
+        other = base[:cut] + essay(5 + cut).split()[cut:]
+        a, b = " ".join(base), " ".join(other)
+        estimate = float(np.mean(index.signature(a) == index.signature(b)))
+        errors.append(abs(estimate - jaccard(a, b)))
+    # 256 permutations: standard error <= 0.031 per estimate
+    assert max(errors) < 0.12
+    assert np.mean(errors) < 0.06
+
+
+def test_lru_eviction_keeps_recently_used():
+    index = NearDuplicateIndex(capacity=2)
+    a, b, c = essay(10), essay(11), essay(12)
+    index.add(a, 0.1)
+    index.add(b, 0.2)
+    assert index.lookup(a) is not None  # a is now the most recently used
+    index.add(c, 0.3)
+    assert len(index) == 2 and index.stats["evictions"] == 1
+    assert index.lookup(b) is None
+    assert index.lookup(a)[0] == 0.1 and index.lookup(c)[0] == 0.3
+    # evicted ids are gone from the LSH buckets too
+    assert all(ids <= set(index._entries) for band in index._buckets for ids in band.values())
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
@@ -0,0 +1,52 @@
+# tests/test_demux_av.py
+"""VideoPreprocessor.demux_av: decoder tails are flushed and the whole audio track is kept."""
+import numpy as np
+import pytest
+
+from video.preprocessor import VideoPreprocessor
+
+av = pytest.importorskip("av")
+
+
+def write_av_clip(path, seconds=2, fps=30, size=(160, 120), rate=44100):
+    """H.264 with B-frames (the decoder holds frames back until flushed) + stereo AAC."""
+    container = av.open(path, "w")
+    video = container.add_stream("libx264", rate=fps)
+    video.width, video.height = size
+    video.pix_fmt = "yuv420p"
+    video.options = {"preset": "medium", "bf": "3"}
+    audio = container.add_stream("aac", rate=rate)
+    audio.layout = "stereo"
+    w, h = size
+    for i in range(int(seconds * fps)):
+        img = np.full((h, w, 3), (i * 7) % 255, np.uint8)
+        img[:, (i * 5) % w] = 255
+        container.mux(video.encode(av.VideoFrame.from_ndarray(img, format="bgr24")))
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    for k in range(0, len(tone), 1024):
+        frame = av.AudioFrame.from_ndarray(np.stack([tone[k:k + 1024]] * 2), format="fltp", layout="stereo")
+        frame.sample_rate, frame.pts = rate, k
+        container.mux(audio.encode(frame))
+    container.mux(video.encode(None))
+    container.mux(audio.encode(None))
+    container.close()
+    return path
+
+
+def test_every_frame_and_the_whole_audio_track(tmp_path):
+    clip = write_av_clip(str(tmp_path / "av.mp4"))
+    (frames, metadata, audio), msg = VideoPreprocessor(
+        sample_fps=1000, max_frames=1000, resize=(160, 120)).demux_av(clip)
+    assert msg == "Success"
+    assert len(frames) == metadata["frame_count"] == 60  # the frames held back for B-frames too
+    samples, rate = audio
+    assert rate == 44100 and samples.dtype == np.float32
+    assert abs(len(samples) / rate - 2.0) < 0.1
+
+
+def test_audio_is_complete_when_video_stops_early(tmp_path):
+    clip = write_av_clip(str(tmp_path / "av.mp4"))
+    (frames, metadata, audio), _ = VideoPreprocessor(sample_fps=1000, max_frames=3).demux_av(clip)
+    assert len(frames) == 3
+    assert abs(metadata["audio_sec"] - 2.0) < 0.1
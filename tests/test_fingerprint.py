@@ -0,0 +1,110 @@
+# tests/test_fingerprint.py
+"""BKTree radius search and FingerprintIndex matching, bounds and persistence."""
+import json
+import random
+
+from video.fingerprint import BKTree, FingerprintIndex, hamming
+
+INFO = {"frame_count": 300, "duration_sec": 10.0}
+
+
+def test_bktree_search_matches_brute_force():
+    rng = random.Random(0)
+    keys = [rng.getrandbits(64) for _ in range(500)]
+    # a few keys close to each other, so small radii have hits
+    keys += [keys[0] ^ (1 << b) for b in range(5)]
+    tree = BKTree()
+    for n, key in enumerate(keys):
+        tree.add(key, n)
+    assert len(tree) == len(keys)
+
+    for query in keys[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 1, 4, 20, 32):
+            expected = sorted((hamming(query, k), n) for n, k in enumerate(keys) if hamming(query, k) <= radius)
+            found = tree.search(query, radius)
+            assert sorted(found) == expected
+            assert [d for d, _ in found] == sorted(d for d, _ in found)  # nearest first
+
+
+def test_bktree_keeps_values_of_identical_keys():
+    tree = BKTree()
+    tree.add(0b1010, "a")
+    tree.add(0b1010, "b")
+    assert sorted(v for _, v in tree.search(0b1010, 0)) == ["a", "b"]
+    assert tree.search(0b0101, 3) == []
+
+
+def test_index_requires_same_duration():
+    index = FingerprintIndex(radius=4)
+    fp = random.Random(1).getrandbits(320)
+    index.add(fp, INFO, {"ai_probability": 0.1}, "orig.mp4")
+
+    distance, entry = index.lookup(fp ^ 0b11, INFO)
+    assert distance == 2 and entry["video_file"] == "orig.mp4"
+    assert index.lookup(fp ^ 0b11111, INFO) is None  # outside the radius
+    # another frame rate, or a frame dropped in the re-encode: same clip
+    assert index.lookup(fp, {"frame_count": 250, "duration_sec": 10.0}) is not None
+    assert index.lookup(fp, {"frame_count": 299, "duration_sec": 9.967}) is not None
+    assert index.lookup(fp, dict(INFO, duration_sec=10.5)) is None  # trimmed
+    assert index.lookup(fp, dict(INFO, duration_sec=None)) is None
+    assert index.lookup(fp, None) is None
+
+
+def test_reencode_at_another_frame_rate_is_found(tmp_path):
+    import cv2
+    from benchmarks.fixtures import write_synthetic_clip
+    from video.fingerprint import fingerprint
+
+    source = write_synthetic_clip(str(tmp_path / "src.mp4"), (160, 120), 10, 30)
+    cap = cv2.VideoCapture(source)
+    frames = []
+    ok, frame = cap.read()
+    while ok:
+        frames.append(frame)
+        ok, frame = cap.read()
+    cap.release()
+    copy = str(tmp_path / "copy25.mp4")
+    writer = cv2.VideoWriter(copy, cv2.VideoWriter_fourcc(*"mp4v"), 25, (160, 120))
+    for k in range(250):
+        writer.write(frames[k * 30 // 25])
+    writer.release()
+
+    index = FingerprintIndex(radius=4)
+    index.add(*fingerprint(source), {"ai_probability": 0.7}, "src.mp4")
+    fp, info = fingerprint(copy)
+    assert info["frame_count"] == 250
+    assert index.lookup(fp, info)[1]["video_file"] == "src.mp4"
+
+
+def test_index_is_bounded_and_persisted(tmp_path):
+    path = str(tmp_path / "fingerprints.jsonl")
+    rng = random.Random(2)
+    index = FingerprintIndex(path, capacity=20)
+    fps = [rng.getrandbits(320) for _ in range(50)]
+    for n, fp in enumerate(fps):
+        index.add(fp, INFO, {"n": n})
+
+    assert len(index) <= 20
+    assert index.snapshot()["evictions"] == 50 - len(index)
+    with open(path) as f:
+        stored = [json.loads(line) for line in f]
+    assert len(stored) == len(index)
+    assert index.lookup(fps[-1], INFO)[1]["result"] == {"n": 49}
+    assert index.lookup(fps[0], INFO) is None  # oldest went first
+
+    reloaded = FingerprintIndex(path, capacity=5)
+    assert len(reloaded) == 5
+    assert reloaded.lookup(fps[-1], INFO) is not None
+    with open(path) as f:
+        assert sum(1 for _ in f) == 5
+
+
+def test_index_skips_torn_last_line(tmp_path):
+    path = tmp_path / "fingerprints.jsonl"
+    index = FingerprintIndex(str(path))
+    index.add(12345, INFO, {"ai_probability": 0.2})
+    with open(path, "a") as f:
+        f.write('{"fingerprint": "ab')
+    reloaded = FingerprintIndex(str(path))
+    assert len(reloaded) == 1
+    assert reloaded.lookup(12345, INFO) is not None
@@ -0,0 +1,23 @@
+# tests/test_jobs.py
+"""JobStore queue positions."""
+import asyncio
+
+from Frontend.jobs import JobStore
+
+
+def test_queue_position_is_each_jobs_place_in_line():
+    async def main():
+        store = JobStore()
+        ids = [store.create(f"f{n}.wav", "audio", f"/tmp/f{n}.wav")["job_id"] for n in range(3)]
+        assert [store.public(store.get(i))["queue_position"] for i in ids] == [1, 2, 3]
+
+        taken = await store.next_job()
+        assert taken == ids[0]
+        store.update(taken, status="running")
+        assert [store.public(store.get(i))["queue_position"] for i in ids] == [0, 1, 2]
+
+        later = store.create("g.wav", "audio", "/tmp/g.wav")
+        assert store.public(later)["queue_position"] == 3
+        assert "path" not in store.public(later) and "ticket" not in store.public(later)
+
+    asyncio.run(main())
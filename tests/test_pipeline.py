@@ -0,0 +1,35 @@
+# tests/test_pipeline.py
+"""ProcessPipeline workers score frames with the parent detector's configuration."""
+import pytest
+
+from benchmarks.fixtures import write_synthetic_clip
+from video.detectors import VideoDetector
+from video.models.frame_detector import FrameDetector
+from video.models.temporal_detector import TemporalDetector
+from video.pipeline import ProcessPipeline
+from video.preprocessor import VideoPreprocessor
+
+
+def test_settings_rebuild_the_detectors():
+    fd = FrameDetector(blockiness="grid", weights=(0.6, 0.2, 0.2))
+    rebuilt = FrameDetector(**fd.settings())
+    assert (rebuilt.blockiness, rebuilt.weights) == ("grid", (0.6, 0.2, 0.2))
+    assert FrameDetector().weights == FrameDetector.WEIGHTS
+    td = TemporalDetector(winsize=21, levels=2)
+    assert TemporalDetector(**td.settings()).fb_params == td.fb_params
+
+
+def test_process_pipeline_matches_batch_with_custom_detector(tmp_path):
+    clip = write_synthetic_clip(str(tmp_path / "clip.mp4"), (160, 120), 20, 10)
+    preprocessor = VideoPreprocessor(resize=(160, 120))
+    detector = VideoDetector(blockiness="grid")
+    detector.frame_detector.weights = (0.6, 0.2, 0.2)
+
+    with ProcessPipeline(preprocessor, detector) as pipeline:
+        piped, msg = pipeline.run(clip)
+    assert msg == "Success"
+    (frames, metadata), _ = preprocessor.process(clip)
+    batch = detector.run_detection(frames, cuts=metadata["scene_cuts"])
+
+    assert piped["frame_score"] == pytest.approx(batch["frame_score"])
+    assert piped["temporal_score"] == pytest.approx(batch["temporal_score"])
@@ -0,0 +1,25 @@
+# tests/test_planner.py
+"""SamplingPlanner decodes every frame the detectors use, so it scores like the batch path."""
+import pytest
+
+from benchmarks.fixtures import write_synthetic_clip
+from video.detectors import VideoDetector
+from video.planner import SamplingPlanner
+from video.preprocessor import VideoPreprocessor
+
+
+@pytest.mark.parametrize("shot_sec", [2.0, 2.5])
+def test_planned_matches_batch_on_clip_with_cuts(tmp_path, shot_sec):
+    # 240 grid frames -> flow step 2; 2.5 s shots put half the cuts off the step grid
+    clip = write_synthetic_clip(str(tmp_path / "cuts.mp4"), (96, 64), 240, 2, "cuts", shot_sec=shot_sec)
+    preprocessor = VideoPreprocessor(resize=(96, 64))
+
+    planned, msg = SamplingPlanner(preprocessor).run(clip)
+    assert msg == "Success"
+    (frames, metadata), _ = preprocessor.process(clip)
+    batch = VideoDetector().run_detection(frames, cuts=metadata["scene_cuts"])
+
+    assert planned["scene_cuts"] == len(metadata["scene_cuts"]) > 0
+    assert planned["pairs_used"] == batch["pairs_used"] > 100
+    assert planned["temporal_score"] == pytest.approx(batch["temporal_score"])
+    assert planned["frames_extracted"] <= len(frames)
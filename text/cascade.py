@@ -0,0 +1,266 @@
+# cascade.py
+"""
+Cheap first stage for the text service: a linear model over hashed n-grams and
+style statistics, distilled from bart-large-mnli's own answers. Inputs it scores
+far from 0.5 are answered directly; the rest are escalated to the zero-shot model.
+
+    python -m text.cascade train corpus.txt -o text/cascade.npz            # teacher = BART
+    python -m text.cascade train comments.csv --column text --label label  # teacher = label column
+    python -m benchmarks.cascade corpus.txt                                # escalation / agreement report
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+HASH_DIMS = 2048
+_WORD = re.compile(r"[A-Za-z']+|[0-9]+")
+_SENTENCE = re.compile(r"[.!?]+(?:\s+|$)")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in is it its of on or "
+    "she so that the their them there they this to was we were what when which who will "
+    "with you your not no can do does did".split())
+STAT_NAMES = (
+    "log_words", "mean_word_len", "std_word_len", "type_token", "mean_sentence_len",
+    "sentence_burstiness", "punct_per_word", "stopword_ratio", "repeated_trigrams", "upper_ratio",
+)
+
+
+def _bucket(token):
+    # crc32 rather than hash(): stable across processes and restarts
+    return zlib.crc32(token.encode("utf-8")) % HASH_DIMS
+
+
+def style_stats(text):
+    """Length-normalised statistics that differ between generated and human text."""
+    words = _WORD.findall(text)
+    n = len(words)
+    if n == 0:
+        return np.zeros(len(STAT_NAMES), dtype=np.float32)
+    lengths = np.fromiter((len(w) for w in words), dtype=np.float32, count=n)
+    lower = [w.lower() for w in words]
+    sentences = [s for s in _SENTENCE.split(text) if s.strip()]
+    sent_lens = np.array([len(_WORD.findall(s)) for s in sentences] or [n], dtype=np.float32)
+    trigrams = list(zip(lower, lower[1:], lower[2:]))
+    punct = sum(1 for c in text if c in ",;:!?-()\"")
+    letters = sum(1 for c in text if c.isalpha())
+    return np.array([
+        math.log1p(n),
+        lengths.mean(),
+        lengths.std(),
+        len(set(lower)) / n,
+        sent_lens.mean(),
+        sent_lens.std() / max(sent_lens.mean(), 1.0),
+        punct / n,
+        sum(1 for w in lower if w in _STOPWORDS) / n,
+        1.0 - len(set(trigrams)) / len(trigrams) if trigrams else 0.0,
+        sum(1 for c in text if c.isupper()) / max(letters, 1),
+    ], dtype=np.float32)
+
+
+def ngram_vector(text):
+    """L2-normalised log counts of hashed word unigrams/bigrams."""
+    vec = np.zeros(HASH_DIMS, dtype=np.float32)
+    lower = [w.lower() for w in _WORD.findall(text)]
+    for w in lower:
+        vec[_bucket(w)] += 1.0
+    for a, b in zip(lower, lower[1:]):
+        vec[_bucket(a + " " + b)] += 1.0
+    np.log1p(vec, out=vec)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def featurize(texts):
+    """(n, HASH_DIMS) n-gram matrix and (n, len(STAT_NAMES)) raw statistics."""
+    grams = np.zeros((len(texts), HASH_DIMS), dtype=np.float32)
+    stats = np.zeros((len(texts), len(STAT_NAMES)), dtype=np.float32)
+    for i, text in enumerate(texts):
+        grams[i] = ngram_vector(text)
+        stats[i] = style_stats(text)
+    return grams, stats
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+class CascadeModel:
+    """
+    Logistic regression on [hashed n-grams, standardised style stats]:
+      - predict(texts) gives P(AI-generated) per text in one matrix product
+      - confident(p) is True outside the (low, high) band; only those answers are
+        used directly, the band itself was calibrated on held-out teacher labels
+    Until a band is calibrated it is ESCALATE_ALL, which no probability falls
+    outside: every input goes to the zero-shot model.
+    """
+
+    # No direct answers: the band for uncalibrated models and failed calibrations
+    ESCALATE_ALL = (0.0, 1.0)
+
+    def __init__(self, weights, bias, stat_mean, stat_std, low=ESCALATE_ALL[0], high=ESCALATE_ALL[1]):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.stat_mean = np.asarray(stat_mean, dtype=np.float32)
+        self.stat_std = np.asarray(stat_std, dtype=np.float32)
+        self.low = float(low)
+        self.high = float(high)
+
+    def _design(self, texts):
+        grams, stats = featurize(texts)
+        return np.hstack([grams, (stats - self.stat_mean) / self.stat_std])
+
+    def predict(self, texts):
+        return self.predict_matrix(self._design(texts))
+
+    def predict_matrix(self, X):
+        return _sigmoid(X @ self.weights + self.bias)
+
+    def confident(self, prob):
+        return (prob < self.low) | (prob > self.high)
+
+    @classmethod
+    def fit(cls, texts, targets, l2=1e-3, epochs=300, lr=0.5, holdout=0.2, min_agreement=0.97,
+            min_support=50):
+        """
+        texts: training texts; targets: teacher P(AI-generated) (soft) or 0/1 labels.
+        The last `holdout` share is kept out of training to pick the confidence band;
+        without a holdout the model keeps ESCALATE_ALL.
+        """
+        targets = np.asarray(targets, dtype=np.float32)
+        grams, stats = featurize(texts)
+        n_train = max(1, int(round(len(texts) * (1 - holdout))))
+        stat_mean = stats[:n_train].mean(axis=0)
+        stat_std = stats[:n_train].std(axis=0) + 1e-6
+        X = np.hstack([grams, (stats - stat_mean) / stat_std])
+        Xt, yt = X[:n_train], targets[:n_train]
+
+        w = np.zeros(X.shape[1], dtype=np.float32)
+        b = 0.0
+        for _ in range(epochs):
+            # full-batch gradient descent on cross-entropy against the soft targets
+            err = _sigmoid(Xt @ w + b) - yt
+            w -= lr * ((Xt.T @ err) / n_train + l2 * w)
+            b -= lr * float(err.mean())
+
+        model = cls(w, b, stat_mean, stat_std)
+        if n_train < len(texts):
+            model.calibrate(model.predict_matrix(X[n_train:]), targets[n_train:], min_agreement, min_support)
+        return model
+
+    def calibrate(self, prob, teacher, min_agreement=0.97, min_support=50):
+        """
+        Narrowest band around 0.5 whose confident answers agree with the teacher
+        >= min_agreement, measured on at least `min_support` of them. If no band
+        qualifies (too few held-out texts, or a weak model), ESCALATE_ALL.
+        """
+        prob = np.asarray(prob)
+        agree = (prob >= 0.5) == (np.asarray(teacher) >= 0.5)
+        self.low, self.high = self.ESCALATE_ALL
+        for margin in np.arange(0.05, 0.5, 0.01):
+            mask = np.abs(prob - 0.5) > margin
+            if mask.sum() < max(1, min_support):
+                break  # wider bands only have fewer confident answers
+            if agree[mask].mean() >= min_agreement:
+                self.low, self.high = 0.5 - float(margin), 0.5 + float(margin)
+                break
+        return self.low, self.high
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, bias=self.bias, stat_mean=self.stat_mean,
+                 stat_std=self.stat_std, band=np.array([self.low, self.high]), hash_dims=HASH_DIMS)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["hash_dims"]) != HASH_DIMS:
+                raise ValueError(f"{path} was trained with {int(data['hash_dims'])} hash dims, not {HASH_DIMS}")
+            low, high = data["band"]
+            return cls(data["weights"], float(data["bias"]), data["stat_mean"], data["stat_std"], low, high)
+
+    @classmethod
+    def load_if_exists(cls, path):
+        """The model, or None (cascade disabled) if it is missing or unreadable."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            print(f"Ignoring cascade model {path}: {e}")
+            return None
+
+
+def read_corpus(path, column=None, label=None):
+    """Texts (and labels, if a label column is given) from a .txt (one per line) or .csv."""
+    texts, labels = [], []
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(f)
+            column = column or ("text" if "text" in reader.fieldnames else reader.fieldnames[0])
+            for row in reader:
+                if (row.get(column) or "").strip():
+                    texts.append(row[column])
+                    if label:
+                        labels.append(float(row[label]))
+        else:
+            texts = [line.rstrip("\n") for line in f if line.strip()]
+    return texts, (labels if label else None)
+
+
+def teacher_scores(texts, batch_size=16):
+    """bart-large-mnli's P(AI-generated) for every text (imports the model)."""
+    from text.main import zero_shot_scores
+
+    out = []
+    for k in range(0, len(texts), batch_size):
+        out.extend(zero_shot_scores(texts[k:k + batch_size], batch_size))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the cascade's first-stage model")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("train")
+    p.add_argument("corpus", help=".txt (one text per line) or .csv")
+    p.add_argument("--column", help="CSV text column (default: 'text' or the first)")
+    p.add_argument("--label", help="CSV column with 0/1 labels (default: label with BART)")
+    p.add_argument("--min-agreement", type=float, default=0.97,
+                   help="Agreement with the teacher required of direct answers on the holdout")
+    p.add_argument("--min-support", type=int, default=50,
+                   help="Held-out direct answers that agreement must be measured on")
+    p.add_argument("-o", "--output", default=os.path.join(os.path.dirname(__file__), "cascade.npz"))
+    args = parser.parse_args()
+
+    texts, labels = read_corpus(args.corpus, args.column, args.label)
+    # shuffle once so the holdout is not just the end of the file
+    order = np.random.default_rng(0).permutation(len(texts))
+    texts = [texts[i] for i in order]
+    t0 = time.time()
+    if labels is None:
+        print(f"labelling {len(texts)} texts with bart-large-mnli...", file=sys.stderr)
+        targets = teacher_scores(texts)
+    else:
+        targets = [labels[i] for i in order]
+    t1 = time.time()
+    model = CascadeModel.fit(texts, targets, min_agreement=args.min_agreement, min_support=args.min_support)
+    model.save(args.output)
+    print(json.dumps({
+        "texts": len(texts),
+        "labelling_sec": round(t1 - t0, 2),
+        "training_sec": round(time.time() - t1, 2),
+        "band": [round(model.low, 3), round(model.high, 3)],
+        "output": args.output,
+    }))
+
+
+if __name__ == "__main__":
+    main()
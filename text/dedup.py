@@ -0,0 +1,119 @@
+# dedup.py
+"""
+MinHash/LSH index of already-scored texts, so lightly edited copies of the same
+text reuse the stored score instead of being classified again.
+
+    index = NearDuplicateIndex(threshold=0.8)
+    hit = index.lookup(text)          # (score, similarity) or None
+    index.add(text, score)
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text, k=3):
+    """Hashed word k-grams of the lower-cased text (the whole text if it is shorter)."""
+    words = _TOKEN.findall(text.lower())
+    if len(words) < k:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class NearDuplicateIndex:
+    """
+    Bounded MinHash/LSH index:
+      - each text gets a num_perm MinHash signature over its word 3-gram shingles
+      - signatures are split into `bands` bands; texts sharing any band bucket are
+        candidates, and a candidate is a hit if its estimated Jaccard >= threshold
+      - holds at most `capacity` texts, evicting the least recently used
+    Thread-safe; counters feed the service's /dedup endpoint.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, capacity=100000, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = float(threshold)
+        self.num_perm = int(num_perm)
+        self.bands = int(bands)
+        self.rows = self.num_perm // self.bands
+        self.capacity = int(capacity)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=self.num_perm, dtype=np.uint64)
+        self._entries = OrderedDict()  # id -> (signature, score)
+        self._buckets = [dict() for _ in range(self.bands)]  # band key -> set of ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "inserts": 0, "evictions": 0}
+
+    def signature(self, text):
+        hv = shingles(text)
+        # universal hashing per permutation; uint64 products wrap, which is still a fixed permutation
+        with np.errstate(over="ignore"):
+            phv = ((np.outer(hv, self._a) + self._b) % _PRIME) & _MAX_HASH
+        return phv.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def lookup(self, text, sig=None):
+        """(stored score, estimated Jaccard) of the closest indexed near-duplicate, or None."""
+        sig = self.signature(text) if sig is None else sig
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(band.get(key, ()))
+            best = None
+            for cid in candidates:
+                other, score = self._entries[cid]
+                sim = float(np.count_nonzero(other == sig)) / self.num_perm
+                if sim >= self.threshold and (best is None or sim > best[1]):
+                    best = (score, sim, cid)
+            if best is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best[2])
+            self.stats["hits"] += 1
+            return best[0], best[1]
+
+    def add(self, text, score, sig=None):
+        sig = self.signature(text) if sig is None else sig
+        with self._lock:
+            eid = self._next_id
+            self._next_id += 1
+            self._entries[eid] = (sig, score)
+            for band, key in zip(self._buckets, self._band_keys(sig)):
+                band.setdefault(key, set()).add(eid)
+            self.stats["inserts"] += 1
+            while len(self._entries) > self.capacity:
+                self._evict()
+
+    def _evict(self):
+        eid, (sig, _) = self._entries.popitem(last=False)
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(eid)
+                if not ids:
+                    del band[key]
+        self.stats["evictions"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self):
+        with self._lock:
+            looked_up = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, size=len(self._entries), capacity=self.capacity,
+                        threshold=self.threshold,
+                        hit_rate=round(self.stats["hits"] / looked_up, 4) if looked_up else None)
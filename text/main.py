@@ -1,8 +1,16 @@
 # text_detector_app.py
+import json
+import os
+import threading
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import torch
 from transformers import pipeline
+from common.instrumentation import span, install as install_instrumentation
+from text.cascade import CascadeModel
+from text.dedup import NearDuplicateIndex
 
 
 device = 0 if torch.cuda.is_available() else -1
@@ -12,17 +20,37 @@ classifier = pipeline(
     device=device
 )
 
+# First-stage model (python -m text.cascade train ...); without it every input goes to BART
+CASCADE_PATH = os.environ.get("TEXT_CASCADE_MODEL", os.path.join(os.path.dirname(__file__), "cascade.npz"))
+cascade = None if os.environ.get("TEXT_CASCADE", "1") == "0" else CascadeModel.load_if_exists(CASCADE_PATH)
+CASCADE_STATS = {"direct": 0, "escalated": 0}
+# Sync endpoints run in FastAPI's threadpool: counter updates must not interleave
+CASCADE_STATS_LOCK = threading.Lock()
+
+# Near-duplicates of already-scored texts reuse the stored score (TEXT_DEDUP=0 disables)
+dedup = None if os.environ.get("TEXT_DEDUP", "1") == "0" else NearDuplicateIndex(
+    threshold=float(os.environ.get("TEXT_DEDUP_THRESHOLD", 0.8)),
+    capacity=int(os.environ.get("TEXT_DEDUP_CAPACITY", 100000)),
+)
+
  
 app = FastAPI(title="Text AI Detector")
+install_instrumentation(app, "text")
 
 
 class TextInput(BaseModel):
     text: str
 
+class TextBatchInput(BaseModel):
+    texts: List[str]
+    start: int = 0  # row number of texts[0], echoed back in each result
+    rows: Optional[List[int]] = None  # explicit row number per text (overrides start)
+
 class TextAnalysisResponse(BaseModel):
     explanation: str
     probability: float
     confidence: str
+    stage: str = "zero-shot"  # "cascade" / "duplicate" when answered without BART
 
 
 def compute_confidence(prob, high=0.85, medium=0.6):
@@ -34,24 +62,154 @@ def compute_confidence(prob, high=0.85, medium=0.6):
         return "Low"
 
 
+# Rows per forward pass; each row is scored against both labels, so the model sees 2x this
+TEXT_BATCH_SIZE = int(os.environ.get("TEXT_BATCH_SIZE", 16))
+LABELS = ["AI-generated", "Human-written"]
+
+
+def zero_shot_scores(texts, batch_size=TEXT_BATCH_SIZE):
+    """bart-large-mnli P(AI-generated) for each text, as one padded batch."""
+    with span("text_inference"):
+        results = classifier(texts, candidate_labels=LABELS, batch_size=batch_size * len(LABELS))
+    if isinstance(results, dict):
+        results = [results]
+    return [r["scores"][r["labels"].index("AI-generated")] for r in results]
+
+
+def cascade_scores(texts, batch_size=TEXT_BATCH_SIZE):
+    """
+    [(ai_prob, stage), ...] for texts: the first-stage model answers the ones it is
+    confident about, only the rest reach BART (all of them if no cascade is loaded).
+    """
+    out = [None] * len(texts)
+    pending = list(range(len(texts)))
+    if cascade is not None:
+        with span("text_cascade"):
+            probs = cascade.predict(texts)
+        sure = cascade.confident(probs)
+        for i in range(len(texts)):
+            if sure[i]:
+                out[i] = (float(probs[i]), "cascade")
+        pending = [i for i in range(len(texts)) if not sure[i]]
+        with CASCADE_STATS_LOCK:
+            CASCADE_STATS["direct"] += len(texts) - len(pending)
+            CASCADE_STATS["escalated"] += len(pending)
+    if pending:
+        for i, prob in zip(pending, zero_shot_scores([texts[i] for i in pending], batch_size)):
+            out[i] = (prob, "zero-shot")
+    return out
+
+
+def score_texts(texts, batch_size=TEXT_BATCH_SIZE):
+    """
+    cascade_scores() behind the near-duplicate index: texts within the Jaccard
+    threshold of one scored earlier get its score back (stage "duplicate").
+    """
+    if dedup is None:
+        return cascade_scores(texts, batch_size)
+    out = [None] * len(texts)
+    with span("text_dedup"):
+        sigs = [dedup.signature(t) for t in texts]
+        for i, (text, sig) in enumerate(zip(texts, sigs)):
+            hit = dedup.lookup(text, sig)
+            if hit is not None:
+                out[i] = (hit[0], "duplicate")
+        # copies within this batch: score the first, the rest follow it
+        batch = NearDuplicateIndex(dedup.threshold, dedup.num_perm, dedup.bands)
+        pending, follows = [], {}
+        for i in range(len(texts)):
+            if out[i] is not None:
+                continue
+            hit = batch.lookup(texts[i], sigs[i])
+            if hit is None:
+                batch.add(texts[i], i, sigs[i])
+                pending.append(i)
+            else:
+                follows[i] = hit[0]
+    if pending:
+        for i, result in zip(pending, cascade_scores([texts[i] for i in pending], batch_size)):
+            out[i] = result
+            dedup.add(texts[i], result[0], sigs[i])
+    for i, first in follows.items():
+        out[i] = (out[first][0], "duplicate")
+    return out
+
+
 @app.post("/analyze_text", response_model=TextAnalysisResponse)
 def analyze_text(input: TextInput):
     if not input.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
     
-    labels = ["AI-generated", "Human-written"]
-    result = classifier(input.text, candidate_labels=labels)
-
-    ai_prob = result["scores"][result["labels"].index("AI-generated")]
+    (ai_prob, stage), = score_texts([input.text])
     predicted_label = "AI-generated" if ai_prob >= 0.5 else "Human-written"
     confidence = compute_confidence(ai_prob)
     print(ai_prob)
     return TextAnalysisResponse(
         explanation="explanation",
         probability=ai_prob,
-        confidence=confidence
+        confidence=confidence,
+        stage=stage
     )
 
+
+def score_batches(texts, start=0, batch_size=TEXT_BATCH_SIZE):
+    """
+    Yield (row, ai_prob, stage) for every non-empty text, scored in padded batches.
+    Rows are sorted by length first so each batch pads to similar lengths;
+    results therefore come back grouped by batch, not in row order.
+    """
+    order = sorted((i for i, t in enumerate(texts) if t.strip()), key=lambda i: len(texts[i]))
+    for k in range(0, len(order), batch_size):
+        rows = order[k:k + batch_size]
+        for i, (ai_prob, stage) in zip(rows, score_texts([texts[i] for i in rows], batch_size)):
+            yield start + i, ai_prob, stage
+
+
+@app.post("/analyze_text_batch")
+def analyze_text_batch(input: TextBatchInput):
+    """
+    Score many texts in one request. Streams one NDJSON line per row as soon as
+    its batch is done: {"row", "probability", "confidence", "stage"}, or {"row", "error"}
+    for empty rows.
+    """
+    if input.rows is not None and len(input.rows) != len(input.texts):
+        raise HTTPException(status_code=400, detail="rows must have one entry per text")
+    ids = input.rows if input.rows is not None else [input.start + i for i in range(len(input.texts))]
+
+    def stream():
+        for i, text in enumerate(input.texts):
+            if not text.strip():
+                yield json.dumps({"row": ids[i], "error": "empty text"}) + "\n"
+        for i, ai_prob, stage in score_batches(input.texts):
+            yield json.dumps({"row": ids[i], "probability": ai_prob,
+                              "confidence": compute_confidence(ai_prob), "stage": stage}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/cascade")
+def cascade_status():
+    """Whether the first stage is loaded, its band, and how many inputs it answered."""
+    with CASCADE_STATS_LOCK:
+        stats = dict(CASCADE_STATS)
+    total = stats["direct"] + stats["escalated"]
+    return {
+        "enabled": cascade is not None,
+        "model": CASCADE_PATH if cascade is not None else None,
+        "band": [cascade.low, cascade.high] if cascade is not None else None,
+        "escalation_rate": round(stats["escalated"] / total, 4) if total else None,
+        **stats,
+    }
+
+
+@app.get("/dedup")
+def dedup_status():
+    """Near-duplicate index size and hit counters."""
+    if dedup is None:
+        return {"enabled": False}
+    return dict(dedup.snapshot(), enabled=True)
+
+
 @app.get("/")
 def root():
     return {"message": "Text AI Detector is running. POST text to /analyze_text"}
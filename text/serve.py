@@ -0,0 +1,110 @@
+# serve.py
+"""
+Pre-fork server for the text service: bart-large-mnli is loaded once in a master
+process, which then forks the uvicorn workers. The weights are never written
+after loading, so the workers share the master's pages copy-on-write and N
+workers cost close to one model's RAM (uvicorn --workers N would load N copies).
+
+    python -m text.serve --workers 4 --port 8002
+    python -m benchmarks.pss --spawn 4                # per-worker PSS
+
+CPU only: CUDA cannot be used across fork(), so GPUs are hidden unless
+--workers 1 (then this is the same as plain uvicorn). Per-process state (the
+near-duplicate index, cascade counters, /metrics) is per worker.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+
+def _listen(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _worker(sock, app, threads, log_level):
+    import torch
+    import uvicorn
+
+    # each worker gets its share of the cores instead of all of them
+    torch.set_num_threads(threads)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork text service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    if workers > 1:
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    t0 = time.time()
+    from text.main import app  # loads the model (and cascade) here, once
+    # keep the garbage collector from touching (and so copying) the master's objects
+    gc.collect()
+    gc.freeze()
+    print(f"model loaded in {time.time() - t0:.1f}s; forking {workers} workers x {threads} threads")
+
+    sock = _listen(args.host, args.port)
+    children = {}
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _worker(sock, app, threads, args.log_level)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"worker {pid} exited ({status}); restarting", file=sys.stderr)
+            time.sleep(1)
+            spawn(slot)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
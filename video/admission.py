@@ -0,0 +1,198 @@
+# admission.py
+"""
+Memory-aware admission control for the video service: each request's peak memory
+is estimated from container metadata before anything is decoded, and requests
+only start while the sum of running reservations fits a budget.
+
+    budget = MemoryBudget(2 * 1024**3)
+    nbytes, info = estimate_request_bytes(path, preprocessor)
+    async with budget.reserve(nbytes):
+        ...decode + detect...
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import cv2
+
+# prometheus_client is optional, as in common.instrumentation
+try:
+    from prometheus_client import Counter, Gauge
+except Exception:
+    Counter = Gauge = None
+
+MB = 1024 * 1024
+# Full-resolution buffers the decoder holds at once (reference frames, YUV + BGR output)
+DECODE_BUFFERS = 6
+# Interpreter, detectors, flow fields and temporaries per request, independent of the video
+REQUEST_OVERHEAD = 48 * MB
+# demux_av keeps the whole audio track as float32: assume 48 kHz, held twice (chunks + joined)
+AUDIO_BYTES_PER_SEC = 48000 * 4 * 2
+
+if Gauge is not None:
+    RESERVED_BYTES = Gauge("b2b_video_memory_reserved_bytes", "Memory reserved by running video requests")
+    BUDGET_BYTES = Gauge("b2b_video_memory_budget_bytes", "Memory budget for running video requests")
+    ACTIVE = Gauge("b2b_video_admission_active", "Video requests holding a reservation")
+    WAITING = Gauge("b2b_video_admission_waiting", "Video requests queued for memory")
+    REJECTED = Counter("b2b_video_admission_rejected_total", "Video requests turned away", ["reason"])
+else:
+    RESERVED_BYTES = BUDGET_BYTES = ACTIVE = WAITING = REJECTED = None
+
+
+class AdmissionRejected(Exception):
+    """Raised by MemoryBudget.reserve(); `retry_after` is a hint in seconds (None: never fits)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def default_budget_bytes(fraction=0.5):
+    """`fraction` of physical memory (1 GiB if it cannot be read)."""
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") * fraction)
+    except (ValueError, OSError, AttributeError):
+        return 1024 * MB
+
+
+def estimate_request_bytes(video_path, preprocessor, audio=False):
+    """
+    Peak memory of decoding + detecting `video_path` with `preprocessor`, from the
+    container header only; audio=True adds the decoded audio track (/analyze_av).
+    returns (bytes, details dict)
+    """
+    width = height = frame_count = 0
+    fps = 30.0
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if cap.isOpened():
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+
+    frames = len(preprocessor._grid(frame_count, fps)) if frame_count > 0 else preprocessor.max_frames
+    frames = min(frames, preprocessor.max_frames)
+    out_w, out_h = preprocessor.resize or (width, height)
+    if not out_w or not out_h:
+        # unreadable header: assume the worst the preprocessor allows at 1080p
+        width, height = width or 1920, height or 1080
+        out_w, out_h = preprocessor.resize or (width, height)
+    # BGR frame + lazily computed gray plane per sampled frame
+    frame_bytes = frames * out_w * out_h * 4
+    decoders = max(1, getattr(preprocessor, "decode_workers", 1))
+    decode_bytes = decoders * DECODE_BUFFERS * width * height * 3
+    if decoders > 1:
+        frame_bytes += frames * out_w * out_h * 3  # shared-memory block before the merge
+    total = frame_bytes + decode_bytes + REQUEST_OVERHEAD
+    if audio:
+        total += int(frame_count / fps * AUDIO_BYTES_PER_SEC) if frame_count > 0 and fps > 0 else 0
+    return total, {
+        "source": f"{width}x{height}",
+        "frames": frames,
+        "decoders": decoders,
+        "estimated_mb": round(total / MB, 1),
+    }
+
+
+class MemoryBudget:
+    """
+    Byte budget shared by the requests of one process:
+      - reserve(n) waits (FIFO) until n bytes fit next to the running reservations,
+        up to `timeout` seconds, then raises AdmissionRejected
+      - requests larger than the whole budget, or arriving with `max_waiting`
+        already queued, are rejected at once
+      - a request alone is always admitted if it fits the budget, so nothing starves
+    Use from the event loop; the work itself can run in a thread.
+    """
+
+    def __init__(self, budget_bytes, timeout=30.0, max_waiting=32):
+        self.budget = int(budget_bytes)
+        self.timeout = float(timeout)
+        self.max_waiting = int(max_waiting)
+        self.reserved = 0
+        self.active = 0
+        self._waiters = []  # FIFO of (nbytes, future)
+        self._recent_sec = []  # durations of finished requests, for Retry-After
+        if BUDGET_BYTES is not None:
+            BUDGET_BYTES.set(self.budget)
+
+    def _publish(self):
+        if RESERVED_BYTES is not None:
+            RESERVED_BYTES.set(self.reserved)
+            ACTIVE.set(self.active)
+            WAITING.set(len(self._waiters))
+
+    def _reject(self, reason, message, retry_after):
+        if REJECTED is not None:
+            REJECTED.labels(reason).inc()
+        raise AdmissionRejected(message, retry_after)
+
+    def _retry_hint(self):
+        if not self._recent_sec:
+            return 5
+        return max(1, int(round(sum(self._recent_sec) / len(self._recent_sec))))
+
+    def _fits(self, nbytes):
+        return self.reserved + nbytes <= self.budget
+
+    def _wake(self):
+        # strictly FIFO: the head must fit before anyone behind it goes
+        while self._waiters and self._fits(self._waiters[0][0]):
+            nbytes, future = self._waiters.pop(0)
+            if not future.done():
+                self.reserved += nbytes
+                self.active += 1
+                future.set_result(True)
+        self._publish()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes):
+        nbytes = int(nbytes)
+        if nbytes > self.budget:
+            self._reject("too_large", f"Request needs ~{nbytes // MB} MB, over the {self.budget // MB} MB budget", None)
+        if not self._waiters and self._fits(nbytes):
+            self.reserved += nbytes
+            self.active += 1
+            self._publish()
+        else:
+            if len(self._waiters) >= self.max_waiting:
+                self._reject("queue_full", "Too many video requests waiting for memory", self._retry_hint())
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((nbytes, future))
+            self._publish()
+            try:
+                await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except BaseException as e:
+                # timed out, or the client went away while queued
+                if future.done() and not future.cancelled():
+                    self.reserved -= nbytes  # admitted just as we gave up: give it back
+                    self.active -= 1
+                else:
+                    self._waiters[:] = [w for w in self._waiters if w[1] is not future]
+                    future.cancel()
+                self._wake()
+                if isinstance(e, asyncio.TimeoutError):
+                    self._reject("timeout", f"No memory for this request within {self.timeout:.0f}s",
+                                 self._retry_hint())
+                raise
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            self.reserved -= nbytes
+            self.active -= 1
+            self._recent_sec = (self._recent_sec + [time.time() - t0])[-20:]
+            self._wake()
+
+    def snapshot(self):
+        return {
+            "budget_mb": round(self.budget / MB, 1),
+            "reserved_mb": round(self.reserved / MB, 1),
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "waiting_mb": round(sum(n for n, _ in self._waiters) / MB, 1),
+        }
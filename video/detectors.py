@@ -1,55 +1,169 @@
 # detectors.py
+import math
 import time
+import numpy as np
+from video.frames import gray_at
+from common.instrumentation import span
 from video.models.frame_detector import FrameDetector
 from video.models.temporal_detector import TemporalDetector
-from video.utils import compute_confidence_from_scores, generate_explanation
+from video.scenes import straddling_pairs
+from video.utils import compute_confidence_from_scores, generate_explanation, coarse_to_fine, mean_and_se
+
+# Fusion constants, shared by fused_probability (batch and streaming runs), fuse_batch
+# and the anytime scorer's stopping rule; retune them here only
+FRAME_WEIGHT = 0.65  # frame vs temporal score when faces are present
+FUSION_STEEPNESS = 12.0  # sigmoid steepness around 0.5
+MAGNITUDE_WEIGHT = 0.3  # share of the (capped) mean flow magnitude in the final probability
+
+
+def sigmoid(x, steep=10):
+    return 1 / (1 + math.exp(-steep * (x - 0.5)))
+
+
+def _probability(combined_score, mean_magnitude=None):
+    # --- Non-linear scaling for decisiveness ---
+    # Push values closer to 0 or 1
+    ai_probability = sigmoid(combined_score, steep=FUSION_STEEPNESS)  # sharper
+
+    # --- Magnitude tweak ---
+    if mean_magnitude is not None:
+        mag_factor = min(mean_magnitude, 1.0)  # avg magnitude capped at 1
+        ai_probability = ai_probability * (1.0 - MAGNITUDE_WEIGHT) + mag_factor * MAGNITUDE_WEIGHT
+    return ai_probability
+
+
+def fused_probability(frame_score, face_present, temporal_score, magnitudes):
+    """Combine detector outputs into the final ai_probability."""
+    # --- Weighted combination ---
+    if face_present:
+        # Give slightly higher weight to frame_score
+        combined_score = FRAME_WEIGHT * frame_score + (1.0 - FRAME_WEIGHT) * temporal_score
+    else:
+        combined_score = temporal_score  # only temporal
+
+    mean_magnitude = sum(magnitudes) / len(magnitudes) if magnitudes else None
+    return _probability(combined_score, mean_magnitude)
+
+
+# Per-video inputs to score fusion; mean_magnitude is NaN when no flow pair was scored
+FEATURE_DTYPE = np.dtype([
+    ("frame_score", np.float32),
+    ("face_present", np.bool_),
+    ("temporal_score", np.float32),
+    ("mean_magnitude", np.float32),
+])
+
+# Compact fused result per video (no magnitudes list, no explanation string)
+RESULT_DTYPE = np.dtype([
+    ("ai_probability", np.float32),
+    ("confidence", np.float32),
+    ("frame_score", np.float32),
+    ("temporal_score", np.float32),
+    ("face_present", np.bool_),
+])
+
+
+def feature_row(frame_score, face_present, temporal_score, magnitudes):
+    """One FEATURE_DTYPE row from detector outputs (or from a run_detection result dict)."""
+    mean_magnitude = sum(magnitudes) / len(magnitudes) if magnitudes else np.nan
+    return (frame_score or 0.0, bool(face_present), temporal_score or 0.0, mean_magnitude)
+
+
+def features_from_results(results):
+    """FEATURE_DTYPE array from run_detection result dicts."""
+    rows = [feature_row(r.get("frame_score"), r.get("face_present"), r.get("temporal_score"),
+                        r.get("magnitudes")) for r in results]
+    return np.array(rows, dtype=FEATURE_DTYPE)
+
+
+def fuse_batch(features, frame_weight=FRAME_WEIGHT, steep=FUSION_STEEPNESS, magnitude_weight=MAGNITUDE_WEIGHT):
+    """
+    Vectorized fused_probability + confidence for many videos at once.
+    features: FEATURE_DTYPE array; the keyword arguments are the fusion constants
+    used by VideoDetector (change them to re-score with other weights).
+    returns a RESULT_DTYPE array, matching finish() to float32 precision.
+    """
+    features = np.asarray(features, dtype=FEATURE_DTYPE)
+    frame = features["frame_score"].astype(np.float64)
+    temporal = features["temporal_score"].astype(np.float64)
+    face = features["face_present"]
+    mean_mag = features["mean_magnitude"].astype(np.float64)
+
+    combined = np.where(face, frame_weight * frame + (1.0 - frame_weight) * temporal, temporal)
+    prob = 1.0 / (1.0 + np.exp(-steep * (combined - 0.5)))
+    has_mag = ~np.isnan(mean_mag)
+    blended = prob * (1.0 - magnitude_weight) + np.minimum(np.where(has_mag, mean_mag, 0.0), 1.0) * magnitude_weight
+    prob = np.where(has_mag, blended, prob)
+
+    agreement = 1.0 - np.abs(frame - temporal)
+    strength = np.maximum(frame, temporal)
+    confidence = 0.5 * agreement + 0.5 * strength + 0.1 * (np.abs(prob - 0.5) * 2)
+
+    out = np.empty(len(features), dtype=RESULT_DTYPE)
+    out["ai_probability"] = prob
+    out["confidence"] = np.clip(confidence, 0.0, 1.0)
+    out["frame_score"] = frame
+    out["temporal_score"] = temporal
+    out["face_present"] = face
+    return out
+
 
 class VideoDetector:
     """
     High-level orchestrator:
       - runs frame detector (only used as additional signal when faces present)
-      - runs temporal detector on all videos
+      - runs temporal detector on all videos (flow pairs stay inside shots when
+        scene cuts are passed in)
       - combines scores conservatively
+      - optional anytime mode: scores samples coarse-to-fine and stops once the
+        probability's confidence interval is clearly on one side of 0.5
+      - keep_features: also return the raw per-frame features (see video.features)
     """
 
-    def __init__(self, face_sensitive=True):
-        self.frame_detector = FrameDetector()
+    def __init__(self, face_sensitive=True, anytime=False, anytime_z=2.0, anytime_margin=0.05,
+                 anytime_min_frames=6, anytime_min_pairs=8, keep_features=False, blockiness=None):
+        """
+        keep_features: add "frame_features" [(sharpness, color, blockiness, faces), ...]
+                       to results (full runs only; anytime stops early)
+        blockiness: FrameDetector blockiness engine ("fft" or "grid"; default from $VIDEO_BLOCKINESS)
+        anytime: enable early exit
+        anytime_z: interval half-width in standard errors
+        anytime_margin: required distance of the whole interval from 0.5
+        anytime_min_frames / anytime_min_pairs: samples scored before the first stop check
+        """
+        self.frame_detector = FrameDetector(blockiness=blockiness)
         self.temporal_detector = TemporalDetector()
         self.face_sensitive = bool(face_sensitive)
+        self.anytime = bool(anytime)
+        self.anytime_z = float(anytime_z)
+        self.anytime_margin = float(anytime_margin)
+        self.anytime_min_frames = max(2, int(anytime_min_frames))
+        self.anytime_min_pairs = max(3, int(anytime_min_pairs))
+        self.keep_features = bool(keep_features)
 
-    def run_detection(self, frames):
+    def run_detection(self, frames, progress=None, cuts=None):
+        """
+        progress: optional callback, called as progress(stage="detect", detectors_completed=k, detectors_total=2)
+        cuts: positions of frames that start a new shot (metadata["scene_cuts"] from the preprocessor)
+        """
         t0 = time.time()
-        # Frame detector (may be skipped if no faces)
-        try:
-            frame_score, face_present = self.frame_detector.detect(frames, face_sensitive=self.face_sensitive)
-        except Exception:
-            frame_score, face_present = 0.0, False
-
-        # Temporal detector (always run)
-        try:
-            temporal_score, magnitudes = self.temporal_detector.detect(frames)
-        except Exception:
-            temporal_score, magnitudes = 0.0, []
+        with span("detect"):
+            if self.anytime:
+                scores = self._score_anytime(frames, progress, cuts=cuts)
+            else:
+                scores = self._score_full(frames, progress, cuts=cuts)
+        return self.finish(*scores, t0=t0)
 
-        # --- Weighted combination ---
-        if face_present:
-            # Give slightly higher weight to frame_score
-            combined_score = 0.65 * frame_score + 0.35 * temporal_score
-        else:
-            combined_score = temporal_score  # only temporal
+    def cut_usage(self, total, cuts):
+        """Scene-cut fields for the result: cuts seen and flow pairs not spent across them."""
+        step = self.temporal_detector.sample_step(total)
+        return {"scene_cuts": len(cuts or ()), "pairs_skipped_at_cuts": straddling_pairs(total, step, cuts)}
 
-    # --- Non-linear scaling for decisiveness ---
-    # Push values closer to 0 or 1
-    def sigmoid(x, steep=10):
-        import math
-        return 1 / (1 + math.exp(-steep * (x - 0.5)))
-
-        ai_probability = sigmoid(combined_score, steep=12)  # sharper
-
-        # --- Magnitude tweak ---
-        if magnitudes:
-            mag_factor = min(sum(magnitudes)/len(magnitudes), 1.0)  # avg magnitude capped at 1
-            ai_probability = ai_probability * 0.7 + mag_factor * 0.3  # blend in magnitude info
+    def finish(self, frame_score, face_present, temporal_score, magnitudes, usage, t0=None):
+        """Fuse detector outputs into the result dict (shared by batch, anytime and streaming runs)."""
+        if t0 is None:
+            t0 = time.time()
+        ai_probability = fused_probability(frame_score, face_present, temporal_score, magnitudes)
 
         # Frame_score unused when no faces
         frame_score_for_conf = frame_score if frame_score is not None else 0.0
@@ -66,7 +180,7 @@ class VideoDetector:
         explanation = generate_explanation(frame_score_for_conf,
                                         temporal_score, confidence, face_present)
 
-        return {
+        result = {
             "ai_probability": float(round(ai_probability, 3)),
             "confidence": float(round(confidence, 3)),
             "frame_score": (float(frame_score) if frame_score is not None else None),
@@ -76,4 +190,142 @@ class VideoDetector:
             "explanation": explanation,
             "detection_time_sec": round(time.time() - t0, 3)
         }
+        result.update(usage)
+        return result
+
+    def _score_full(self, frames, progress=None, cuts=None):
+        # Frame detector (may be skipped if no faces)
+        features = [] if self.keep_features else None
+        try:
+            frame_score, face_present = self.frame_detector.detect(frames, face_sensitive=self.face_sensitive,
+                                                                   features=features)
+        except Exception:
+            frame_score, face_present = 0.0, False
+        if progress is not None:
+            progress(stage="detect", detectors_completed=1, detectors_total=2)
+
+        # Temporal detector (always run)
+        try:
+            temporal_score, magnitudes = self.temporal_detector.detect(frames, cuts=cuts)
+        except Exception:
+            temporal_score, magnitudes = 0.0, []
+        if progress is not None:
+            progress(stage="detect", detectors_completed=2, detectors_total=2)
+
+        usage = {
+            "frames_used": len(self.frame_detector.sample(frames)) if frames else 0,
+            "pairs_used": len(magnitudes),
+            "early_exit": False,
+        }
+        usage.update(self.cut_usage(len(frames) if frames else 0, cuts))
+        if features is not None:
+            usage["frame_features"] = features
+        return frame_score, face_present, temporal_score, magnitudes, usage
+
+    def _score_anytime(self, frames, progress=None, rounds=16, cuts=None):
+        """
+        Interleave frame scoring and flow pairs in coarse-to-fine order, checking
+        after every round whether more samples could still flip the verdict.
+        Each round advances both sample sets by ~1/rounds of their size.
+        """
+        if not frames:
+            usage = {"frames_used": 0, "pairs_used": 0, "early_exit": False}
+            usage.update(self.cut_usage(0, cuts))
+            return 0.0, False, 0.0, [], usage
+
+        frame_sample = self.frame_detector.sample(frames)
+        pairs = self.temporal_detector.sample_pairs(len(frames), cuts)
+        n_pairs = len(pairs)
+        frame_order = coarse_to_fine(len(frame_sample))
+        pair_order = coarse_to_fine(n_pairs)
+        frames_per_round = max(1, math.ceil(len(frame_order) / rounds))
+        pairs_per_round = max(2, math.ceil(len(pair_order) / rounds))
+
+        grays = {}
+
+        def flow_gray(i):
+            if i not in grays:
+                grays[i] = gray_at(frames, i)
+            return grays[i]
+
+        frame_scores, magnitudes = [], []
+        face_present = False
+        early_exit = False
+        fi = pi = 0
+        while fi < len(frame_order) or pi < len(pair_order):
+            for idx in frame_order[fi:fi + frames_per_round]:
+                try:
+                    gray = gray_at(frame_sample, idx)
+                except Exception:
+                    continue
+                scored = self.frame_detector.score_frame(frame_sample[idx], face_sensitive=self.face_sensitive,
+                                                         gray=gray)
+                if scored is None:
+                    continue
+                frame_scores.append(scored[0])
+                face_present = face_present or scored[1]
+            fi += frames_per_round
+
+            for p in pair_order[pi:pi + pairs_per_round]:
+                i, j = pairs[p]
+                try:
+                    mag = self.temporal_detector.pair_magnitude(flow_gray(i), flow_gray(j))
+                except Exception:
+                    mag = None
+                if mag is not None:
+                    magnitudes.append(mag * self.temporal_detector.pair_scale(len(frames), i, j))
+            pi += pairs_per_round
+
+            if progress is not None:
+                progress(stage="detect", frames_scored=len(frame_scores), pairs_scored=len(magnitudes))
+
+            if (len(frame_scores) >= self.anytime_min_frames and len(magnitudes) >= self.anytime_min_pairs
+                    and (fi < len(frame_order) or pi < len(pair_order))
+                    and self._decided(frame_scores, len(frame_sample), magnitudes, n_pairs, face_present)):
+                early_exit = True
+                break
+
+        frame_score = float(np.clip(np.mean(frame_scores), 0.0, 1.0)) if frame_scores else 0.0
+        temporal_score = self.temporal_detector.score_magnitudes(magnitudes)
+        if progress is not None:
+            progress(stage="detect", detectors_completed=2, detectors_total=2)
+
+        usage = {"frames_used": len(frame_scores), "pairs_used": len(magnitudes), "early_exit": early_exit}
+        usage.update(self.cut_usage(len(frames), cuts))
+        return frame_score, face_present, temporal_score, magnitudes, usage
+
+    def _decided(self, frame_scores, n_frames, magnitudes, n_pairs, face_present):
+        """True if the whole z-interval of ai_probability sits clear of 0.5 by the margin."""
+        z = self.anytime_z
+        frame_mean, frame_se = mean_and_se(frame_scores, n_frames)
+        mag_mean, mag_se = mean_and_se(magnitudes, n_pairs)
+        temporal_score = self.temporal_detector.score_magnitudes(magnitudes)
+        temporal_se = self._temporal_se(magnitudes, n_pairs)
+
+        if face_present:
+            combined = FRAME_WEIGHT * frame_mean + (1.0 - FRAME_WEIGHT) * temporal_score
+            combined_se = math.hypot(FRAME_WEIGHT * frame_se, (1.0 - FRAME_WEIGHT) * temporal_se)
+        else:
+            combined = temporal_score
+            combined_se = temporal_se
+        if not math.isfinite(combined_se) or not math.isfinite(mag_se):
+            return False
+
+        # Probability is monotone in both the combined score and the mean magnitude
+        p_lo = _probability(combined - z * combined_se, max(mag_mean - z * mag_se, 0.0))
+        p_hi = _probability(combined + z * combined_se, mag_mean + z * mag_se)
+        return p_lo > 0.5 + self.anytime_margin or p_hi < 0.5 - self.anytime_margin
 
+    def _temporal_se(self, magnitudes, population):
+        """Jackknife standard error of the temporal score (with finite population correction)."""
+        mags = np.asarray(magnitudes, dtype=np.float64)
+        n = len(mags)
+        if n < 3:
+            return float("inf")
+        total, total_sq = mags.sum(), (mags ** 2).sum()
+        loo_mean = (total - mags) / (n - 1)
+        loo_std = np.sqrt(np.maximum((total_sq - mags ** 2) / (n - 1) - loo_mean ** 2, 0.0))
+        loo = self.temporal_detector.score_from_stats(loo_mean, loo_std)
+        se = math.sqrt((n - 1) / n * float(((loo - loo.mean()) ** 2).sum()))
+        fpc = (population - n) / (population - 1) if population > n else 0.0
+        return se * math.sqrt(fpc)
@@ -0,0 +1,285 @@
+# features.py
+"""
+On-disk store of raw per-video detector features, keyed by content hash, so the
+archive can be re-scored with new weights without decoding anything again.
+
+    python -m video.testing videos/ -o out.jsonl --features feature_store/   # extract while scanning
+    python -m video.features rescore feature_store/ --frame-weights 0.4,0.3,0.3
+    python -m video.features consolidate feature_store/
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Raw features of one scored frame
+FRAME_FEATURE_DTYPE = np.dtype([
+    ("video", np.int32),
+    ("sharpness", np.float32),
+    ("color", np.float32),
+    ("blockiness", np.float32),
+    ("faces", np.int16),
+])
+
+# One scored optical-flow pair
+PAIR_DTYPE = np.dtype([("video", np.int32), ("magnitude", np.float32)])
+
+
+def content_hash(path, chunk_size=1 << 20):
+    """sha256 of the file's bytes (renamed or copied videos map to the same entry)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+class FeatureStore:
+    """
+    Per-video features under `root`:
+      - videos/<hh>/<hash>.npz: per-frame (sharpness, color, blockiness, faces) and
+        flow magnitudes of one video, written atomically, so parallel workers can
+        add entries without coordination
+      - consolidate() packs every entry into columnar frames.npy / pairs.npy plus
+        videos.json; rescore() memory-maps those and re-runs the fusion with NumPy
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, "videos"), exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.root, "videos", key[:2], f"{key}.npz")
+
+    def has(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def keys(self):
+        base = os.path.join(self.root, "videos")
+        found = []
+        for sub in sorted(os.listdir(base)):
+            subdir = os.path.join(base, sub)
+            if os.path.isdir(subdir):
+                found.extend(f[:-4] for f in sorted(os.listdir(subdir)) if f.endswith(".npz"))
+        return found
+
+    def put(self, key, frame_features, magnitudes, meta=None):
+        """
+        frame_features: [(sharpness, color, blockiness, faces), ...]
+        magnitudes: flow magnitude per scored pair
+        meta: small JSON-able dict (file name, frame counts, ...)
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frames = np.asarray(frame_features, dtype=np.float32).reshape(-1, 4)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f,
+                         frames=frames,
+                         magnitudes=np.asarray(magnitudes, dtype=np.float32),
+                         meta=np.frombuffer(json.dumps(meta or {}).encode("utf-8"), dtype=np.uint8))
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get(self, key):
+        with np.load(self.path_for(key)) as data:
+            return {
+                "frames": data["frames"],
+                "magnitudes": data["magnitudes"],
+                "meta": json.loads(data["meta"].tobytes().decode("utf-8") or "{}"),
+            }
+
+    def _columns(self, key, video=0):
+        entry = self.get(key)
+        frames = np.empty(len(entry["frames"]), dtype=FRAME_FEATURE_DTYPE)
+        frames["video"] = video
+        for col, name in enumerate(("sharpness", "color", "blockiness", "faces")):
+            frames[name] = entry["frames"][:, col]
+        pairs = np.empty(len(entry["magnitudes"]), dtype=PAIR_DTYPE)
+        pairs["video"] = video
+        pairs["magnitude"] = entry["magnitudes"]
+        return entry, frames, pairs
+
+    def consolidate(self):
+        """Pack all entries into columnar arrays; returns (videos, frames, pairs) counts."""
+        keys = self.keys()
+        frame_parts, pair_parts, metas = [], [], []
+        for i, key in enumerate(keys):
+            entry, frames, pairs = self._columns(key, i)
+            frame_parts.append(frames)
+            pair_parts.append(pairs)
+            metas.append(dict(entry["meta"], key=key))
+
+        frames = np.concatenate(frame_parts) if frame_parts else np.empty(0, dtype=FRAME_FEATURE_DTYPE)
+        pairs = np.concatenate(pair_parts) if pair_parts else np.empty(0, dtype=PAIR_DTYPE)
+        # write under temporary names first so readers never see a half-packed store
+        for name, arr in (("frames", frames), ("pairs", pairs)):
+            tmp = os.path.join(self.root, f"{name}.tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(self.root, f"{name}.npy"))
+        tmp = os.path.join(self.root, "videos.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(metas, f)
+        os.replace(tmp, os.path.join(self.root, "videos.json"))
+        return len(keys), len(frames), len(pairs)
+
+    def load_columns(self):
+        """(videos meta list, frames array, pairs array), packing first if new entries exist."""
+        packed = os.path.join(self.root, "videos.json")
+        if not os.path.exists(packed) or len(self.keys()) != len(self._read_json(packed)):
+            self.consolidate()
+        videos = self._read_json(packed)
+        frames = np.load(os.path.join(self.root, "frames.npy"), mmap_mode="r")
+        pairs = np.load(os.path.join(self.root, "pairs.npy"), mmap_mode="r")
+        return videos, frames, pairs
+
+    @staticmethod
+    def _read_json(path):
+        with open(path) as f:
+            return json.load(f)
+
+    def rescore(self, frame_weights=None, face_sensitive=True, **fusion):
+        """
+        Re-run frame scoring, temporal scoring and fusion for every stored video.
+        frame_weights: (blockiness, color, sharpness) weights (FrameDetector.WEIGHTS by default)
+        fusion: keyword arguments for fuse_batch (frame_weight, steep, magnitude_weight)
+        returns (videos meta list, RESULT_DTYPE array)
+        """
+        videos, frames, pairs = self.load_columns()
+        return videos, score_columns(frames, pairs, len(videos), frame_weights, face_sensitive, **fusion)
+
+    def score(self, key, frame_weights=None, face_sensitive=True, **fusion):
+        """One stored video's RESULT_DTYPE row (as rescore() would give it)."""
+        _, frames, pairs = self._columns(key)
+        return score_columns(frames, pairs, 1, frame_weights, face_sensitive, **fusion)[0]
+
+
+def score_columns(frames, pairs, n, frame_weights=None, face_sensitive=True, **fusion):
+    """Vectorized FrameDetector + TemporalDetector scoring and fusion over n videos' columns."""
+    from video.detectors import FEATURE_DTYPE, fuse_batch
+    from video.models.frame_detector import FrameDetector
+    from video.models.temporal_detector import TemporalDetector
+
+    w_blocky, w_color, w_sharp = frame_weights or FrameDetector.WEIGHTS
+
+    per_frame = (w_blocky * frames["blockiness"].astype(np.float64)
+                 + w_color * frames["color"] + w_sharp * frames["sharpness"])
+    frame_count = np.bincount(frames["video"], minlength=n)
+    frame_sum = np.bincount(frames["video"], weights=per_frame, minlength=n)
+    faces = np.bincount(frames["video"], weights=frames["faces"], minlength=n)
+
+    mags = pairs["magnitude"].astype(np.float64)
+    pair_count = np.bincount(pairs["video"], minlength=n)
+    mag_sum = np.bincount(pairs["video"], weights=mags, minlength=n)
+    mag_sq = np.bincount(pairs["video"], weights=mags ** 2, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frame_score = np.where(frame_count > 0, frame_sum / frame_count, 0.0)
+        mean_mag = np.where(pair_count > 0, mag_sum / pair_count, np.nan)
+        std_mag = np.sqrt(np.maximum(mag_sq / np.maximum(pair_count, 1) - np.nan_to_num(mean_mag) ** 2, 0.0))
+    temporal = np.where(pair_count > 0,
+                        TemporalDetector.score_from_stats(np.nan_to_num(mean_mag), std_mag), 0.0)
+
+    features = np.empty(n, dtype=FEATURE_DTYPE)
+    features["frame_score"] = np.clip(frame_score, 0.0, 1.0)
+    features["face_present"] = (faces > 0) & bool(face_sensitive)
+    features["temporal_score"] = temporal
+    features["mean_magnitude"] = mean_mag
+    return fuse_batch(features, **fusion)
+
+
+def extract(video_path, store, preprocessor=None, detector=None, key=None):
+    """
+    Decode + detect `video_path` once and store its raw features (skipped if the
+    content hash is already stored). Returns (key, result_dict or None, error or None).
+    """
+    from video.preprocessor import VideoPreprocessor
+    from video.detectors import VideoDetector
+
+    key = key or content_hash(video_path)
+    if store.has(key):
+        return key, None, None
+    pre = preprocessor or VideoPreprocessor()
+    detector = detector or VideoDetector(keep_features=True)
+    res, msg = pre.process(video_path)
+    if res is None:
+        return key, None, msg
+    frames, metadata = res
+    result = detector.run_detection(frames, cuts=metadata.get("scene_cuts"))
+    store.put(key, result.get("frame_features", []), result["magnitudes"], {
+        "video_file": os.path.basename(video_path),
+        "frames_extracted": metadata.get("frames_extracted"),
+        "duration_sec": metadata.get("duration_sec"),
+        "blockiness": detector.frame_detector.blockiness,
+    })
+    return key, result, None
+
+
+def _weights(text, count):
+    values = tuple(float(v) for v in text.split(","))
+    if len(values) != count:
+        raise argparse.ArgumentTypeError(f"expected {count} comma-separated numbers")
+    return values
+
+
+def main():
+    from video.detectors import FRAME_WEIGHT, FUSION_STEEPNESS, MAGNITUDE_WEIGHT
+
+    parser = argparse.ArgumentParser(description="Per-video feature store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rescore", help="Re-score every stored video with (new) weights")
+    p.add_argument("store")
+    p.add_argument("--frame-weights", type=lambda t: _weights(t, 3),
+                   help="blockiness,color,sharpness (default 0.35,0.35,0.30)")
+    p.add_argument("--frame-weight", type=float, default=FRAME_WEIGHT,
+                   help="frame vs temporal weight when faces are present")
+    p.add_argument("--steep", type=float, default=FUSION_STEEPNESS)
+    p.add_argument("--magnitude-weight", type=float, default=MAGNITUDE_WEIGHT)
+    p.add_argument("-o", "--output", help="JSONL output (default: stdout)")
+
+    p = sub.add_parser("consolidate", help="Pack stored entries into columnar arrays")
+    p.add_argument("store")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.store)
+    if args.command == "consolidate":
+        videos, frames, pairs = store.consolidate()
+        print(f"packed {videos} videos, {frames} frames, {pairs} flow pairs", file=sys.stderr)
+        return
+
+    t0 = time.time()
+    videos, results = store.rescore(args.frame_weights, frame_weight=args.frame_weight,
+                                    steep=args.steep, magnitude_weight=args.magnitude_weight)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for meta, row in zip(videos, results):
+            out.write(json.dumps({
+                "key": meta["key"],
+                "video_file": meta.get("video_file"),
+                "ai_probability": round(float(row["ai_probability"]), 3),
+                "confidence": round(float(row["confidence"]), 3),
+                "frame_score": round(float(row["frame_score"]), 4),
+                "temporal_score": round(float(row["temporal_score"]), 4),
+                "face_present": bool(row["face_present"]),
+            }) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"re-scored {len(videos)} videos in {time.time() - t0:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# fingerprint.py
+"""
+Perceptual fingerprints of videos and a Hamming-distance index over them, so
+re-encoded or re-muxed copies of an analyzed clip reuse its result after decoding
+only a few frames.
+
+The hashes are coarse thumbnails of the frame centre: a face swap or a new voice
+track barely moves them, so a large radius would hand an edited derivative the
+verdict of its authentic source. Keep the radius tight (a plain re-encode is
+~2 bits; crops and heavy recompression are 8-12) and reuse results only for
+copies of the same duration. Frame counts are not compared: a re-encode at
+another frame rate, or one that drops or repeats frames, keeps the duration.
+
+    python -m video.fingerprint a.mp4 b.mp4      # fingerprints and their distance
+"""
+import json
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+from common.instrumentation import span
+
+# Keyframes are taken at these fractions of the duration, so frame rate and
+# container changes do not shift them
+KEYFRAME_POSITIONS = (0.1, 0.3, 0.5, 0.7, 0.9)
+HASH_BITS = 64
+# Stored and probed durations may differ by container rounding and by a frame or
+# two gained or lost in a re-encode: the larger of these counts as the same length
+DURATION_TOLERANCE_SEC = 0.25
+DURATION_TOLERANCE_FRACTION = 0.01
+
+
+def dhash(frame, size=8, border=0.1):
+    """
+    64-bit difference hash of a BGR frame: sign of horizontal gradients on a 9x8
+    thumbnail of the frame's centre (`border` is trimmed from each side first,
+    so small crops and letterboxing barely move it).
+    """
+    h, w = frame.shape[:2]
+    dy, dx = int(h * border), int(w * border)
+    centre = frame[dy:h - dy, dx:w - dx]
+    gray = cv2.cvtColor(centre, cv2.COLOR_BGR2GRAY) if centre.ndim == 3 else centre
+    thumb = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = thumb[:, 1:] > thumb[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def fingerprint(video_path, positions=KEYFRAME_POSITIONS):
+    """
+    Concatenated dHashes of the frames at `positions` (fractions of the length),
+    as one int of len(positions) * 64 bits, and the clip's length as
+    {"frame_count", "duration_sec"}. returns (None, None) if any frame cannot be read.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None, None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if frame_count <= 0:
+            return None, None
+        info = {"frame_count": frame_count, "duration_sec": round(frame_count / fps, 3) if fps > 0 else None}
+        value = 0
+        with span("fingerprint"):
+            for pos in positions:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, min(frame_count - 1, int(pos * frame_count)))
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    return None, None
+                value = (value << HASH_BITS) | dhash(frame)
+        return value, info
+    except Exception:
+        return None, None
+    finally:
+        cap.release()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree under Hamming distance: each child edge is labelled with
+    its distance to the parent, so a radius-r search only descends into edges
+    within [d - r, d + r] of the query's distance to that node.
+    """
+
+    def __init__(self):
+        self._root = None  # [key, values, {distance: child}]
+        self._size = 0
+
+    def add(self, key, value):
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [value], {}]
+            return
+        node = self._root
+        while True:
+            d = hamming(key, node[0])
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, [value], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """[(distance, value), ...] within `radius`, nearest first."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(key, node[0])
+            if d <= radius:
+                found.extend((d, v) for v in node[1])
+            for edge, child in node[2].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def __len__(self):
+        return self._size
+
+
+def same_length(entry, info):
+    """True if a stored entry and a probed clip have the same duration, within tolerance."""
+    if not info:
+        return False
+    a, b = entry.get("duration_sec"), info.get("duration_sec")
+    if a is None or b is None:
+        # no frame rate: only the frame count is left to go on
+        return a is b and entry.get("frame_count") == info.get("frame_count")
+    return abs(a - b) <= max(DURATION_TOLERANCE_SEC, DURATION_TOLERANCE_FRACTION * max(a, b))
+
+
+class FingerprintIndex:
+    """
+    Analysis results keyed by video fingerprint:
+      - lookup(fp, info) returns the stored result of the nearest fingerprint within
+        `radius` bits (over all keyframes together) whose clip has the same
+        duration (see same_length), or None
+      - at most `capacity` entries are kept; past that the oldest tenth is dropped
+        and the tree rebuilt
+      - with `path`, entries are appended to a JSONL file and reloaded on start;
+        the file is rewritten with the survivors whenever entries are dropped
+    Thread-safe; hit/miss counters are in stats.
+    """
+
+    def __init__(self, path=None, radius=4, capacity=50000):
+        self.path = path
+        self.radius = int(radius)
+        self.capacity = max(1, int(capacity))
+        self._entries = []  # oldest first
+        self._tree = BKTree()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "inserts": 0, "evictions": 0}
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path):
+        entries = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    int(entry["fingerprint"], 16)
+                    entries.append(entry)
+                except (ValueError, KeyError, TypeError):
+                    continue  # a torn last line from a crash
+        self._entries = entries[-self.capacity:]
+        self._rebuild()
+        if len(entries) > self.capacity:
+            self._rewrite()
+
+    def _rebuild(self):
+        self._tree = BKTree()
+        for entry in self._entries:
+            self._tree.add(int(entry["fingerprint"], 16), entry)
+
+    def _rewrite(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.path)
+
+    def lookup(self, fp, info):
+        """(hamming distance, entry dict) or None."""
+        if fp is None:
+            return None
+        with self._lock:
+            found = [(d, e) for d, e in self._tree.search(fp, self.radius) if same_length(e, info)]
+            self.stats["hits" if found else "misses"] += 1
+        return found[0] if found else None
+
+    def add(self, fp, info, result, video_file=None):
+        if fp is None or not info:
+            return
+        entry = {"fingerprint": format(fp, "x"), "video_file": video_file,
+                 "frame_count": info.get("frame_count"), "duration_sec": info.get("duration_sec"),
+                 "result": result}
+        with self._lock:
+            self._entries.append(entry)
+            self._tree.add(fp, entry)
+            self.stats["inserts"] += 1
+            if len(self._entries) > self.capacity:
+                # BK-trees cannot delete: drop a batch of the oldest and rebuild
+                keep = self.capacity - self.capacity // 10
+                self.stats["evictions"] += len(self._entries) - keep
+                self._entries = self._entries[-keep:]
+                self._rebuild()
+                if self.path:
+                    self._rewrite()
+            elif self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries), capacity=self.capacity, radius=self.radius)
+
+
+def main():
+    fps = [(path,) + fingerprint(path) for path in sys.argv[1:]]
+    for path, fp, info in fps:
+        print(f"{path}: {format(fp, 'x') if fp is not None else 'unreadable'} {info or ''}")
+    if len(fps) == 2 and None not in (fps[0][1], fps[1][1]):
+        a, b = fps[0][1], fps[1][1]
+        per_frame = [hamming(a >> (HASH_BITS * k) & ((1 << HASH_BITS) - 1),
+                             b >> (HASH_BITS * k) & ((1 << HASH_BITS) - 1))
+                     for k in reversed(range(len(KEYFRAME_POSITIONS)))]
+        print(f"hamming: {hamming(a, b)} bits (per keyframe: {per_frame}), "
+              f"same length: {same_length(fps[0][2], fps[1][2])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# frames.py
+import cv2
+import numpy as np
+
+
+class FrameBuffer:
+    """
+    Compact container for decoded frames:
+      - one preallocated, contiguous uint8 array of shape (N, H, W, 3)
+      - a grayscale plane per frame, computed lazily once and shared by every detector
+      - slicing (frames[::step][:30]) returns views sharing storage and the gray cache
+    Behaves like the old list of BGR frames: len(), indexing, iteration, truthiness.
+    Storage comes from np.empty, so pages for unused capacity / gray frames never
+    computed are not touched and do not count towards RSS.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._data = None
+        self._gray = None
+        self._has_gray = None
+        self._count = 0
+        self._is_view = False
+
+    @classmethod
+    def from_frames(cls, frames):
+        buf = cls(len(frames))
+        for f in frames:
+            buf.append(f)
+        return buf
+
+    @classmethod
+    def _view(cls, data, gray, has_gray):
+        view = cls.__new__(cls)
+        view.capacity = len(data)
+        view._data = data
+        view._gray = gray
+        view._has_gray = has_gray
+        view._count = len(data)
+        view._is_view = True
+        return view
+
+    def _allocate(self, height, width):
+        self._data = np.empty((self.capacity, height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((self.capacity, height, width), dtype=np.uint8)
+        self._has_gray = np.zeros(self.capacity, dtype=bool)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def data(self):
+        """(N, H, W, 3) view of the filled frames."""
+        if self._data is None:
+            return np.empty((0, 0, 0, 3), dtype=np.uint8)
+        return self._data[:self._count]
+
+    def append(self, frame):
+        """Copy a BGR frame into the next slot (resized to the buffer's size if it differs)."""
+        if self._is_view:
+            raise ValueError("cannot append to a FrameBuffer view")
+        if self._count >= self.capacity:
+            raise ValueError(f"FrameBuffer is full ({self.capacity} frames)")
+        if self._data is None:
+            self._allocate(frame.shape[0], frame.shape[1])
+        h, w = self._data.shape[1:3]
+        if frame.shape[:2] != (h, w):
+            frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+        self._data[self._count] = frame
+        self._count += 1
+
+    def gray(self, index=None):
+        """
+        Grayscale frame `index`, or the (N, H, W) gray plane for all frames.
+        Conversion happens once per frame no matter how many callers ask.
+        """
+        if index is None:
+            if self._count == 0:
+                return np.empty((0, 0, 0), dtype=np.uint8)
+            for i in np.flatnonzero(~self._has_gray[:self._count]):
+                self._convert(i)
+            return self._gray[:self._count]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame index out of range")
+        if not self._has_gray[index]:
+            self._convert(index)
+        return self._gray[index]
+
+    def _convert(self, i):
+        cv2.cvtColor(self._data[i], cv2.COLOR_BGR2GRAY, dst=self._gray[i])
+        self._has_gray[i] = True
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            n = self._count
+            if self._data is None:
+                return FrameBuffer(1)
+            return FrameBuffer._view(self._data[:n][key], self._gray[:n][key], self._has_gray[:n][key])
+        return self.data[key]
+
+
+class SparseFrames:
+    """
+    A sampling grid of `length` frame positions of which only some were decoded
+    (see video.planner). Detectors index it exactly like the full grid:
+      - len() is the grid length, so their sample()/sample_pairs() plans are unchanged
+      - frames[i] / gray(i) work for decoded positions and raise IndexError otherwise
+      - slices are views over the same storage; iteration skips missing positions
+    Decoded frames live in one FrameBuffer, so the shared gray cache still applies.
+    """
+
+    def __init__(self, length, capacity):
+        self.length = max(0, int(length))
+        self._buffer = FrameBuffer(capacity)
+        self._slot = {}  # grid position -> buffer slot
+
+    @classmethod
+    def _view(cls, length, slot, buffer):
+        view = cls.__new__(cls)
+        view.length = length
+        view._buffer = buffer
+        view._slot = slot
+        return view
+
+    def put(self, position, frame):
+        """Store the decoded frame for grid `position`."""
+        self._slot[int(position)] = len(self._buffer)
+        self._buffer.append(frame)
+
+    @property
+    def decoded(self):
+        return len(self._slot)
+
+    def positions(self):
+        """Decoded grid positions, in order."""
+        return sorted(self._slot)
+
+    def _resolve(self, index):
+        if index < 0:
+            index += self.length
+        slot = self._slot.get(index)
+        if slot is None:
+            raise IndexError(f"frame {index} was not decoded")
+        return slot
+
+    def gray(self, index=None):
+        """Grayscale frame `index`, or a list of gray planes for every decoded position."""
+        if index is None:
+            return [self._buffer.gray(self._slot[p]) for p in self.positions()]
+        return self._buffer.gray(self._resolve(index))
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for p in self.positions():
+            yield self._buffer[self._slot[p]]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            grid = range(self.length)[key]
+            slot = {k: self._slot[p] for k, p in enumerate(grid) if p in self._slot}
+            return SparseFrames._view(len(grid), slot, self._buffer)
+        return self._buffer[self._resolve(key)]
+
+
+def gray_frames(frames):
+    """
+    Grayscale planes for `frames`: the shared cache for a FrameBuffer / SparseFrames,
+    converted here for a plain list (None for frames that fail to convert).
+    """
+    if isinstance(frames, (FrameBuffer, SparseFrames)):
+        return frames.gray()
+    grays = []
+    for f in frames:
+        try:
+            grays.append(cv2.cvtColor(f, cv2.COLOR_BGR2GRAY))
+        except Exception:
+            grays.append(None)
+    return grays
+
+
+def gray_at(frames, index):
+    """Grayscale version of frames[index] (cached for a FrameBuffer / SparseFrames)."""
+    if isinstance(frames, (FrameBuffer, SparseFrames)):
+        return frames.gray(index)
+    return cv2.cvtColor(frames[index], cv2.COLOR_BGR2GRAY)
@@ -1,6 +1,9 @@
 # app.py
 from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
+from contextlib import asynccontextmanager
 import time
 import tempfile
 import shutil
@@ -8,16 +11,141 @@ import os
 
 from video.preprocessor import VideoPreprocessor
 from video.detectors import VideoDetector
+from video.pipeline import StreamingPipeline
+from video.planner import SamplingPlanner
+from video.fingerprint import FingerprintIndex, fingerprint
+from video.admission import AdmissionRejected, MemoryBudget, default_budget_bytes, estimate_request_bytes, MB
+from common.instrumentation import span, install as install_instrumentation
 
 app = FastAPI(title="AI Video Detector")
+install_instrumentation(app, "video")
+
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+# "opencv" (default) or "keyframes" (PyAV I-frame triage decode)
+VIDEO_DECODER = os.environ.get("VIDEO_DECODER", "opencv")
+# "batch" (decode everything, then detect), "streaming" (overlap decode and detection)
+# or "planned" (decode only the frames the detectors will use)
+VIDEO_PIPELINE = os.environ.get("VIDEO_PIPELINE", "batch")
+# >1: the batch pipeline decodes long videos in that many parallel time ranges
+VIDEO_DECODE_WORKERS = int(os.environ.get("VIDEO_DECODE_WORKERS", 1))
+# VIDEO_DEDUP=1: re-encoded copies of an analyzed clip reuse its result. Off by default:
+# edited derivatives (face swap, new voice) hash close to their source, so keep
+# VIDEO_DEDUP_RADIUS tight. The newest VIDEO_DEDUP_CAPACITY entries are kept in memory,
+# and in VIDEO_FINGERPRINT_INDEX (JSONL) if it is set
+fingerprints = FingerprintIndex(
+    os.environ.get("VIDEO_FINGERPRINT_INDEX"),
+    radius=int(os.environ.get("VIDEO_DEDUP_RADIUS", 4)),
+    capacity=int(os.environ.get("VIDEO_DEDUP_CAPACITY", 50000)),
+) if os.environ.get("VIDEO_DEDUP") == "1" else None
+# Requests only start while their estimated memory fits VIDEO_MEMORY_BUDGET_MB (default:
+# half of RAM); others queue up to VIDEO_ADMISSION_TIMEOUT_SEC, then get a 503
+admission = None if os.environ.get("VIDEO_ADMISSION", "1") == "0" else MemoryBudget(
+    float(os.environ.get("VIDEO_MEMORY_BUDGET_MB", 0)) * MB or default_budget_bytes(),
+    timeout=float(os.environ.get("VIDEO_ADMISSION_TIMEOUT_SEC", 30)),
+    max_waiting=int(os.environ.get("VIDEO_ADMISSION_MAX_WAITING", 32)),
+)
+# Result fields worth replaying for a near-duplicate
+CACHED_FIELDS = ("ai_probability", "confidence", "explanation", "frames_used", "pairs_used")
+
+
+def run_pipeline(video_path, progress=None, anytime=False, budget=None, video_file=None):
+    """
+    Decode + detect for a file on disk, unless dedup is on and a copy of the same
+    length and (nearly) the same fingerprint was analyzed before: then its stored result comes back with "duplicate_of" / "duplicate_distance"
+    after only the fingerprint keyframes were decoded.
+    anytime: let the detector stop early once the verdict is clear (batch pipeline only)
+    budget: target seconds for decode + detection; implies the planned pipeline
+    video_file: upload name recorded with the fingerprint
+    Returns (detector_result, "Success") or (None, error_message).
+    """
+    if fingerprints is None:
+        return analyze_path(video_path, progress, anytime, budget)
+    fp, info = fingerprint(video_path)
+    hit = fingerprints.lookup(fp, info)
+    if hit is not None:
+        distance, entry = hit
+        return dict(entry["result"], duplicate_of=entry.get("video_file"), duplicate_distance=distance), "Success"
+    result, msg = analyze_path(video_path, progress, anytime, budget)
+    # only full analyses are worth replaying
+    if result is not None and not anytime and not budget and not result.get("early_exit"):
+        fingerprints.add(fp, info, {k: result.get(k) for k in CACHED_FIELDS},
+                         video_file or os.path.basename(video_path))
+    return result, msg
+
+
+def make_preprocessor():
+    return VideoPreprocessor(decoder=VIDEO_DECODER, decode_workers=VIDEO_DECODE_WORKERS)
+
+
+@asynccontextmanager
+async def admitted(video_path, audio=False):
+    """
+    Hold a memory reservation for analyzing `video_path` (raises AdmissionRejected).
+    audio: the request also decodes the whole audio track
+    """
+    if admission is None:
+        yield
+        return
+    nbytes, _ = await asyncio.to_thread(estimate_request_bytes, video_path, make_preprocessor(), audio)
+    async with admission.reserve(nbytes):
+        yield
+
+
+def rejected_response(e, output):
+    output.update({"status": "error", "details": str(e)})
+    headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+    return JSONResponse(status_code=503 if e.retry_after else 413, content=output, headers=headers)
+
+
+def analyze_path(video_path, progress=None, anytime=False, budget=None):
+    pre = make_preprocessor()
+    if budget or VIDEO_PIPELINE == "planned":
+        return SamplingPlanner(pre, VideoDetector(anytime=anytime)).run(video_path, budget_sec=budget,
+                                                                        progress=progress)
+    if VIDEO_PIPELINE == "streaming" and not anytime:
+        return StreamingPipeline(pre, VideoDetector()).run(video_path, progress=progress)
+    res, msg = pre.process(video_path, progress=progress)
+    if res is None:
+        return None, msg
+    frames, metadata = res
+    detector = VideoDetector(anytime=anytime)
+    return detector.run_detection(frames, progress=progress, cuts=metadata.get("scene_cuts")), msg
+
+
+def run_av_pipeline(video_path):
+    """
+    Single demux pass: frames go to VideoDetector, the audio track to the
+    audio service's MFCC + SVM scorer, in-process.
+    Returns ((video_result, audio_result, metadata), "Success") or (None, error_message);
+    audio_result is a dict, or None when the file has no audio track.
+    """
+    res, msg = VideoPreprocessor().demux_av(video_path)
+    if res is None:
+        return None, msg
+    frames, metadata, audio = res
+    video_result = VideoDetector().run_detection(frames, cuts=metadata.get("scene_cuts"))
+
+    audio_result = None
+    if audio is not None:
+        # imported lazily so the video service starts without librosa / the SVM
+        from audio.app import analyze_audio_array
+        samples, sr = audio
+        scored = analyze_audio_array(samples, sr)
+        if isinstance(scored, tuple):
+            audio_result = {"status": "success", "deepfake_probability": float(scored[0]),
+                            "confidence": scored[1], "explanation": scored[2]}
+        else:
+            audio_result = {"status": "error", "details": scored}
+    return (video_result, audio_result, metadata), msg
+
 
 @app.post("/analyze_video")
-async def detect_video(file: UploadFile = File(...)):
+async def detect_video(file: UploadFile = File(...), anytime: bool = False, budget: float = None):
     """
     Upload a single video file and get AI detection results.
     """
     # Validate file type
-    if not file.filename.lower().endswith((".mp4", ".mov", ".avi", ".mkv")):
+    if not file.filename.lower().endswith(VIDEO_EXTS):
         return JSONResponse(
             status_code=400,
             content={"status": "error", "details": "Unsupported file type"}
@@ -28,14 +156,18 @@ async def detect_video(file: UploadFile = File(...)):
 
     try:
         # Save uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
+        with span("temp_write"), tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
             shutil.copyfileobj(file.file, tmp_file)
             tmp_path = tmp_file.name
 
-        # Preprocess video
-        pre = VideoPreprocessor()
-        res, msg = pre.process(tmp_path)
-        if res is None:
+        # Preprocess video + run detector, once there is memory for it
+        try:
+            async with admitted(tmp_path):
+                result, msg = await asyncio.to_thread(run_pipeline, tmp_path, None, anytime, budget, file.filename)
+        except AdmissionRejected as e:
+            output["processing_time"] = round(time.time() - start_time, 3)
+            return rejected_response(e, output)
+        if result is None:
             output.update({
                 "status": "error",
                 "ai_probability":1,
@@ -46,17 +178,18 @@ async def detect_video(file: UploadFile = File(...)):
             })
             return output
 
-        frames, _ = res
-
-        # Run detector
-        detector = VideoDetector()
-        result = detector.run_detection(frames)
         print(output)
         output.update({
             "status": "success",
             "ai_probability": result["ai_probability"],
             "confidence": result["confidence"],
             "explanation": result.get("explanation", ""),
+            "frames_used": result.get("frames_used"),
+            "pairs_used": result.get("pairs_used"),
+            "early_exit": result.get("early_exit", False),
+            "plan": result.get("plan"),
+            "duplicate_of": result.get("duplicate_of"),
+            "duplicate_distance": result.get("duplicate_distance"),
             "processing_time": round(time.time() - start_time, 3)
         })
 
@@ -76,3 +209,137 @@ async def detect_video(file: UploadFile = File(...)):
             os.remove(tmp_path)
 
     return output
+
+
+@app.get("/fingerprints")
+def fingerprint_status():
+    """Near-duplicate index size and hit counters."""
+    if fingerprints is None:
+        return {"enabled": False}
+    return dict(fingerprints.snapshot(), enabled=True)
+
+
+@app.get("/admission")
+def admission_status():
+    """Memory budget, current reservations and queue (also exported at /metrics)."""
+    if admission is None:
+        return {"enabled": False}
+    return dict(admission.snapshot(), enabled=True)
+
+
+@app.post("/analyze_av")
+async def detect_av(file: UploadFile = File(...)):
+    """
+    Video + audio-track detection from one decode pass.
+    Returns the usual video fields plus "audio" (null when the file has no audio track).
+    """
+    if not file.filename.lower().endswith(VIDEO_EXTS):
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "details": "Unsupported file type"}
+        )
+
+    start_time = time.time()
+    output = {"video_file": file.filename, "status": "error", "details": "", "processing_time": None}
+    try:
+        with span("temp_write"), tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
+            shutil.copyfileobj(file.file, tmp_file)
+            tmp_path = tmp_file.name
+
+        try:
+            async with admitted(tmp_path, audio=True):
+                res, msg = await asyncio.to_thread(run_av_pipeline, tmp_path)
+        except AdmissionRejected as e:
+            output["processing_time"] = round(time.time() - start_time, 3)
+            return rejected_response(e, output)
+        if res is None:
+            output["details"] = msg
+        else:
+            video_result, audio_result, metadata = res
+            output.update({
+                "status": "success",
+                "ai_probability": video_result["ai_probability"],
+                "confidence": video_result["confidence"],
+                "explanation": video_result.get("explanation", ""),
+                "frames_used": video_result.get("frames_used"),
+                "pairs_used": video_result.get("pairs_used"),
+                "audio_sec": metadata.get("audio_sec"),
+                "audio": audio_result,
+            })
+    except Exception as e:
+        output["details"] = str(e)
+    finally:
+        if 'tmp_path' in locals() and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    output["processing_time"] = round(time.time() - start_time, 3)
+    return output
+
+
+@app.post("/analyze_video_stream")
+async def detect_video_stream(file: UploadFile = File(...), anytime: bool = False, budget: float = None):
+    """
+    Same analysis as /analyze_video, streamed as NDJSON:
+      {"event": "progress", "stage": "decode", "frames_decoded": n, "frames_total": m}
+      {"event": "progress", "stage": "detect", "detectors_completed": k, "detectors_total": 2}
+      {"event": "result", "status": "success", "ai_probability": ..., ...}
+    """
+    if not file.filename.lower().endswith(VIDEO_EXTS):
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "details": "Unsupported file type"}
+        )
+
+    with span("temp_write"), tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
+        shutil.copyfileobj(file.file, tmp_file)
+        tmp_path = tmp_file.name
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def progress(**fields):
+        # Called from the worker thread
+        loop.call_soon_threadsafe(events.put_nowait, {"event": "progress", **fields})
+
+    async def run():
+        start_time = time.time()
+        output = {"event": "result", "video_file": file.filename, "status": "error", "details": ""}
+        try:
+            progress(stage="queued")
+            async with admitted(tmp_path):
+                result, msg = await asyncio.to_thread(run_pipeline, tmp_path, progress, anytime, budget, file.filename)
+            if result is None:
+                output["details"] = msg
+            else:
+                output.update({
+                    "status": "success",
+                    "ai_probability": result["ai_probability"],
+                    "confidence": result["confidence"],
+                    "explanation": result.get("explanation", ""),
+                    "frames_used": result.get("frames_used"),
+                    "pairs_used": result.get("pairs_used"),
+                    "early_exit": result.get("early_exit", False),
+                    "plan": result.get("plan"),
+                    "duplicate_of": result.get("duplicate_of"),
+                    "duplicate_distance": result.get("duplicate_distance"),
+                })
+        except Exception as e:
+            output["details"] = str(e)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        output["processing_time"] = round(time.time() - start_time, 3)
+        await events.put(output)
+        await events.put(None)
+
+    task = asyncio.create_task(run())
+
+    async def stream():
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield json.dumps(event) + "\n"
+        await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,7 +1,14 @@
 # models/frame_detector.py
+import os
 import cv2
 import numpy as np
 import math
+from video.frames import gray_frames
+from common.instrumentation import timed
+
+# "fft" (low/high frequency energy ratio) or "grid" (8x8 block-boundary discontinuities)
+BLOCKINESS_ENGINES = ("fft", "grid")
+BLOCKINESS_ENGINE = os.environ.get("VIDEO_BLOCKINESS", "fft")
 
 class FrameDetector:
     """
@@ -9,11 +16,24 @@ class FrameDetector:
       - face presence (Haar cascade)
       - sharpness (Laplacian variance)
       - color anomaly (HSV skin-like fraction)
-      - blockiness / compression artifacts (FFT-based proxy)
+      - blockiness / compression artifacts: FFT-based proxy, or ("grid") the
+        excess of gradient energy on an 8-pixel block grid, without an FFT
     Returns (score, face_present) where score in [0.0,1.0]
     """
 
-    def __init__(self, face_cascade_path=None):
+    # Per-frame weights of (blockiness, color anomaly, sharpness)
+    WEIGHTS = (0.35, 0.35, 0.30)
+
+    def __init__(self, face_cascade_path=None, blockiness=None, weights=None):
+        """
+        blockiness: engine from BLOCKINESS_ENGINES (default: $VIDEO_BLOCKINESS or "fft")
+        weights: per-frame (blockiness, color anomaly, sharpness) weights (default: WEIGHTS)
+        """
+        self.blockiness = blockiness or BLOCKINESS_ENGINE
+        if self.blockiness not in BLOCKINESS_ENGINES:
+            raise ValueError(f"blockiness must be one of {BLOCKINESS_ENGINES}, got {self.blockiness!r}")
+        self.weights = tuple(weights) if weights else self.WEIGHTS
+        self.face_cascade_path = face_cascade_path
         if face_cascade_path is None:
             face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         try:
@@ -23,9 +43,16 @@ class FrameDetector:
         except Exception:
             self.face_cascade = None
 
-    def _detect_faces(self, frame):
+    def settings(self):
+        """Constructor arguments that rebuild this detector, e.g. in a worker process."""
+        return {"face_cascade_path": self.face_cascade_path, "blockiness": self.blockiness,
+                "weights": self.weights}
+
+    @timed("faces")
+    def _detect_faces(self, frame, gray=None):
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             if self.face_cascade is None:
                 return []
             faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(30,30))
@@ -33,6 +60,7 @@ class FrameDetector:
         except Exception:
             return []
 
+    @timed("sharpness")
     def _sharpness(self, gray):
         try:
             v = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -42,6 +70,7 @@ class FrameDetector:
         except Exception:
             return 0.5
 
+    @timed("color_anomaly")
     def _color_anomaly(self, frame):
         try:
             hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
@@ -55,7 +84,14 @@ class FrameDetector:
         except Exception:
             return 0.5
 
+    @timed("blockiness")
     def _blockiness(self, gray):
+        if self.blockiness == "grid":
+            return self._blockiness_grid(gray)
+        return self._blockiness_fft(gray)
+
+    @staticmethod
+    def _blockiness_fft(gray):
         try:
             f = np.fft.fft2(gray.astype(np.float32))
             fshift = np.fft.fftshift(f)
@@ -73,38 +109,111 @@ class FrameDetector:
         except Exception:
             return 0.5
 
-    def detect(self, frames, face_sensitive=True):
+    @staticmethod
+    def _grid_ratio(profile, block):
+        """Mean of the strongest column phase mod `block` over the mean of the others (1.0 = no grid)."""
+        n = len(profile) // block * block
+        if n < 2 * block:
+            return 1.0
+        phases = profile[:n].reshape(-1, block).mean(axis=0)
+        peak = phases.max()
+        rest = (phases.sum() - peak) / (block - 1)
+        return float(peak / (rest + 1e-6))
+
+    @staticmethod
+    def _blockiness_grid(gray, block=8, gain=2.0):
+        """
+        Block-boundary discontinuity: mean absolute differences between neighbouring
+        columns (rows) are folded modulo `block`; DCT coding leaves one phase -- the
+        block edge -- much stronger than the rest. Folding at 8 also catches grids
+        shrunk 2x, 3x or 4x by the preprocessor's resize (their period divides 8).
+        One strided pass over the frame; no FFT.
+        """
+        try:
+            g = gray.astype(np.int16)
+            cols = np.abs(g[:, 1:] - g[:, :-1]).mean(axis=0)
+            rows = np.abs(g[1:, :] - g[:-1, :]).mean(axis=1)
+            ratio = 0.5 * (FrameDetector._grid_ratio(cols, block) + FrameDetector._grid_ratio(rows, block))
+            score = 1.0 - 1.0 / (1.0 + gain * max(0.0, ratio - 1.0))
+            return float(np.clip(score, 0.0, 1.0))
+        except Exception:
+            return 0.5
+
+    @staticmethod
+    def sample_step(total):
+        return max(1, total // 30)  # sample up to ~30 frames
+
+    def sample_indices(self, total):
+        """Positions (0..total-1) of the frames sample() picks."""
+        return range(0, total, self.sample_step(total))[:30]
+
+    def sample(self, frames):
+        """Evenly spaced subset (up to ~30 frames) that detect() scores."""
+        return frames[::self.sample_step(len(frames))][:30]
+
+    def frame_features(self, frame, face_sensitive=True, gray=None):
+        """
+        Raw features of a single BGR frame (gray: its grayscale plane, if already computed).
+        returns (sharpness, color_anomaly, blockiness, face_count), or None if the
+        frame could not be converted
+        """
+        if gray is None:
+            try:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            except Exception:
+                return None
+
+        faces = self._detect_faces(frame, gray) if face_sensitive else []
+
+        sharp = self._sharpness(gray)
+        color = self._color_anomaly(frame)
+        blocky = self._blockiness(gray)
+        return sharp, color, blocky, len(faces)
+
+    def combine(self, sharp, color, blocky, weights=None):
+        """Per-frame score from raw features (the detector's weights unless given)."""
+        w_blocky, w_color, w_sharp = weights or self.weights
+        # Conservative weighted sum tuned to avoid false positives
+        return w_blocky * blocky + w_color * color + w_sharp * sharp
+
+    def score_frame(self, frame, face_sensitive=True, gray=None):
         """
-        frames: list of BGR images (numpy arrays)
+        Score a single BGR frame (gray: its grayscale plane, if already computed).
+        returns (score, has_face), or None if the frame could not be converted
+        """
+        feats = self.frame_features(frame, face_sensitive=face_sensitive, gray=gray)
+        if feats is None:
+            return None
+        sharp, color, blocky, n_faces = feats
+        return self.combine(sharp, color, blocky), n_faces > 0
+
+    def detect(self, frames, face_sensitive=True, features=None):
+        """
+        frames: FrameBuffer or list of BGR images (numpy arrays)
         face_sensitive: if True, detection will look for faces and set face_present accordingly
+        features: optional list; receives (sharpness, color_anomaly, blockiness, face_count) per scored frame
         returns (score, face_present)
         """
         try:
             if not frames:
                 return 0.0, False
 
-            total = len(frames)
-            step = max(1, total // 30)  # sample up to ~30 frames
-            sample = frames[::step][:30]
+            sample = self.sample(frames)
+            grays = gray_frames(sample)
 
             scores = []
             face_present = False
-            for f in sample:
-                try:
-                    gray = cv2.cvtColor(f, cv2.COLOR_BGR2GRAY)
-                except Exception:
+            for f, gray in zip(sample, grays):
+                if gray is None:
                     continue
-
-                faces = self._detect_faces(f) if face_sensitive else []
-                if faces:
+                feats = self.frame_features(f, face_sensitive=face_sensitive, gray=gray)
+                if feats is None:
+                    continue
+                if features is not None:
+                    features.append(feats)
+                s, has_face = self.combine(*feats[:3]), feats[3] > 0
+                if has_face:
                     face_present = True
-
-                sharp = self._sharpness(gray)
-                color = self._color_anomaly(f)
-                blocky = self._blockiness(gray)
-
-                # Conservative weighted sum tuned to avoid false positives
-                s = 0.35 * blocky + 0.35 * color + 0.30 * sharp
                 scores.append(s)
 
             if not scores:
@@ -1,7 +1,9 @@
 # models/temporal_detector.py
 import cv2
 import numpy as np
-import math
+from video.frames import gray_at
+from video.scenes import shot_bounds
+from common.instrumentation import timed
 
 class TemporalDetector:
     """
@@ -9,8 +11,14 @@ class TemporalDetector:
     Returns (temporal_score, magnitudes_list)
     temporal_score: [0,1], higher -> more anomalous
     magnitudes_list: mean flow magnitude per pair
+    Given scene cuts, pairs never straddle a cut: the sampling grid restarts
+    at the first frame of every shot, and the pairs lost at cuts are re-spent
+    inside shots at other gaps (see sample_pairs).
     """
 
+    # Widest gap, in multiples of the sampling step, a re-spent pair may span
+    MAX_GAP_FACTOR = 2
+
     def __init__(self, pyr_scale=0.5, levels=3, winsize=15, iterations=3, poly_n=5, poly_sigma=1.2, flags=0):
         self.fb_params = dict(
             pyr_scale=float(pyr_scale),
@@ -22,41 +30,110 @@ class TemporalDetector:
             flags=int(flags)
         )
 
-    def detect(self, frames):
+    def settings(self):
+        """Constructor arguments that rebuild this detector, e.g. in a worker process."""
+        return dict(self.fb_params)
+
+    @staticmethod
+    def sample_step(total):
+        return max(1, total // 120)  # sample fewer pairs for performance
+
+    def sample_indices(self, total):
+        """Positions (0..total-1) of the frames sample() picks."""
+        return range(0, total, self.sample_step(total))
+
+    def sample(self, frames):
+        """Frames whose consecutive pairs detect() runs flow on (~120), ignoring cuts."""
+        return frames[::self.sample_step(len(frames))]
+
+    def sample_pairs(self, total, cuts=None):
+        """
+        (i, j) frame positions detect() runs flow on. Without cuts these are the
+        consecutive frames of sample(). With cuts the grid is laid out per shot, and
+        the pairs the plain grid would have spent across cuts are re-spent inside
+        shots: at gaps finer than the step first, then at up to MAX_GAP_FACTOR times
+        the step, spread evenly over the video. Short shots may not have room for
+        all of them.
+        """
+        step = self.sample_step(total)
+        shots = shot_bounds(total, cuts)
+        pairs = [(i, i + step) for start, end in shots for i in range(start, end - step, step)]
+        budget = len(range(0, max(0, total - step), step))
+        if len(shots) <= 1 or len(pairs) >= budget:
+            return pairs
+        chosen = set(pairs)
+        for gap in list(range(step - 1, 0, -1)) + list(range(step + 1, self.MAX_GAP_FACTOR * step + 1)):
+            need = budget - len(chosen)
+            if need <= 0:
+                break
+            extra = [(i, i + gap) for start, end in shots for i in range(start, end - gap)
+                     if (i, i + gap) not in chosen]
+            if len(extra) > need:
+                extra = [extra[k] for k in np.linspace(0, len(extra) - 1, need).round().astype(int)]
+            chosen.update(extra)
+        return sorted(chosen)
+
+    def pair_scale(self, total, i, j):
+        """Factor putting the flow magnitude of pair (i, j) on the time scale of the sampling step."""
+        return self.sample_step(total) / float(j - i)
+
+    @timed("flow")
+    def pair_magnitude(self, prev, nxt):
+        """Mean Farneback flow magnitude between two grayscale frames (None on failure)."""
+        try:
+            # ensure dtype uint8
+            prev_u = prev.astype(np.uint8)
+            nxt_u = nxt.astype(np.uint8)
+            flow = cv2.calcOpticalFlowFarneback(prev_u, nxt_u, None, **self.fb_params)
+            mag, ang = cv2.cartToPolar(flow[...,0], flow[...,1])
+            return float(np.mean(mag))
+        except Exception:
+            return None
+
+    @staticmethod
+    def score_from_stats(mean_mag, std_mag):
+        """
+        Temporal score from flow magnitude mean/std.
+        Works elementwise on numpy arrays as well as on floats.
+        """
+        rel_std = std_mag / (mean_mag + 1e-9)
+        frozenness = np.exp(-mean_mag)  # higher when mean_mag is very small (frozen)
+        raw = 0.6 * (rel_std / (1.0 + rel_std)) + 0.4 * frozenness
+        return np.clip(raw, 0.0, 1.0)
+
+    def score_magnitudes(self, magnitudes):
+        if not magnitudes:
+            return 0.0
+        mags = np.array(magnitudes)
+        return float(self.score_from_stats(float(mags.mean()), float(mags.std())))
+
+    def detect(self, frames, cuts=None):
+        """cuts: positions of frames that start a new shot (see video.scenes)"""
         try:
             if not frames or len(frames) < 2:
                 return 0.0, []
 
-            total = len(frames)
-            step = max(1, total // 120)  # sample fewer pairs for performance
-            sampled = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames[::step]]
-            magnitudes = []
+            # Shared gray cache when frames is a FrameBuffer
+            grays = {}
+
+            def gray(i):
+                if i not in grays:
+                    grays[i] = gray_at(frames, i)
+                return grays[i]
 
-            for i in range(len(sampled) - 1):
+            magnitudes = []
+            for i, j in self.sample_pairs(len(frames), cuts):
                 try:
-                    prev = sampled[i]
-                    nxt = sampled[i+1]
-                    # ensure dtype uint8
-                    prev_u = prev.astype(np.uint8)
-                    nxt_u = nxt.astype(np.uint8)
-                    flow = cv2.calcOpticalFlowFarneback(prev_u, nxt_u, None, **self.fb_params)
-                    mag, ang = cv2.cartToPolar(flow[...,0], flow[...,1])
-                    mean_mag = float(np.mean(mag))
-                    magnitudes.append(mean_mag)
+                    mean_mag = self.pair_magnitude(gray(i), gray(j))
                 except Exception:
-                    continue
+                    mean_mag = None
+                if mean_mag is not None:
+                    magnitudes.append(mean_mag * self.pair_scale(len(frames), i, j))
 
             if not magnitudes:
                 return 0.0, []
 
-            mags = np.array(magnitudes)
-            mean_mag = float(mags.mean())
-            std_mag = float(mags.std())
-
-            rel_std = std_mag / (mean_mag + 1e-9)
-            frozenness = math.exp(-mean_mag)  # higher when mean_mag is very small (frozen)
-            raw = 0.6 * (rel_std / (1.0 + rel_std)) + 0.4 * frozenness
-            score = float(np.clip(raw, 0.0, 1.0))
+            score = self.score_magnitudes(magnitudes)
             return score, magnitudes
         except Exception:
             return 0.0, []
@@ -0,0 +1,365 @@
+# pipeline.py
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from video.preprocessor import VideoPreprocessor
+from video.detectors import VideoDetector
+from video.shm import SharedFrameRing
+
+_END = object()
+_CUT = object()
+
+
+class StreamingPipeline:
+    """
+    Producer/consumer pipeline between decode and the detectors:
+      - a decode thread pulls frames from VideoPreprocessor.stream() and hands each
+        detector only the frames it samples, through bounded queues
+      - the frame detector scores frames as they arrive, in its own thread
+      - the temporal detector keeps just the previous gray frame and runs flow per pair;
+        scene cuts are found as frames arrive and restart the flow grid at each new shot
+    Decode overlaps with analysis (OpenCV releases the GIL) and at most ~2 * queue_size
+    frames are alive at once, whatever the clip length. Anytime mode does not apply here.
+    """
+
+    def __init__(self, preprocessor=None, detector=None, queue_size=8):
+        self.preprocessor = preprocessor or VideoPreprocessor()
+        self.detector = detector or VideoDetector()
+        self.queue_size = max(1, int(queue_size))
+
+    def run(self, video_path, progress=None):
+        """
+        Same contract as process() + run_detection():
+        returns (result_dict, "Success") or (None, error_message).
+        """
+        t0 = time.time()
+        res, msg = self.preprocessor.stream(video_path)
+        if res is None:
+            return None, msg
+        frame_iter, metadata = res
+
+        # Sampling is planned from the expected frame count; frames that fail to
+        # decode shift later positions slightly, which the detectors tolerate.
+        total = metadata["frames_planned"]
+        frame_positions = set(self.detector.frame_detector.sample_indices(total))
+        flow_step = self.detector.temporal_detector.sample_step(total)
+
+        frame_q = queue.Queue(self.queue_size)
+        flow_q = queue.Queue(self.queue_size)
+        state = {"decoded": 0, "error": None, "detectors_completed": 0}
+        cut_detector = self.preprocessor.cut_detector()
+        lock = threading.Lock()
+
+        def detector_done():
+            with lock:
+                state["detectors_completed"] += 1
+                done = state["detectors_completed"]
+            if progress is not None:
+                progress(stage="detect", detectors_completed=done, detectors_total=2)
+
+        def produce():
+            try:
+                anchor = 0
+                for k, frame in enumerate(frame_iter):
+                    state["decoded"] = k + 1
+                    if progress is not None:
+                        progress(stage="decode", frames_decoded=k + 1, frames_total=total)
+                    if cut_detector is not None and cut_detector.update(frame):
+                        # New shot: no flow pair across the cut, grid restarts here
+                        anchor = k
+                        flow_q.put(_CUT)
+                    wants_frame = k in frame_positions
+                    wants_flow = (k - anchor) % flow_step == 0
+                    if not (wants_frame or wants_flow):
+                        continue
+                    try:
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    except Exception:
+                        continue
+                    if wants_frame:
+                        frame_q.put((frame, gray))
+                    if wants_flow:
+                        flow_q.put(gray)
+            except Exception as e:
+                state["error"] = f"Error processing video: {e}"
+            finally:
+                frame_iter.close()
+                frame_q.put(_END)
+                flow_q.put(_END)
+
+        frame_state = {"scores": [], "face_present": False}
+
+        def consume_frames():
+            fd = self.detector.frame_detector
+            while True:
+                item = frame_q.get()
+                if item is _END:
+                    break
+                frame, gray = item
+                try:
+                    scored = fd.score_frame(frame, face_sensitive=self.detector.face_sensitive, gray=gray)
+                except Exception:
+                    continue
+                if scored is None:
+                    continue
+                frame_state["scores"].append(scored[0])
+                frame_state["face_present"] = frame_state["face_present"] or scored[1]
+            detector_done()
+
+        magnitudes = []
+
+        def consume_flow():
+            td = self.detector.temporal_detector
+            prev = None
+            while True:
+                gray = flow_q.get()
+                if gray is _END:
+                    break
+                if gray is _CUT:
+                    prev = None
+                    continue
+                if prev is not None:
+                    mag = td.pair_magnitude(prev, gray)
+                    if mag is not None:
+                        magnitudes.append(mag)
+                prev = gray
+            detector_done()
+
+        threads = [threading.Thread(target=fn, daemon=True) for fn in (produce, consume_frames, consume_flow)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if state["error"] is not None:
+            return None, state["error"]
+        if state["decoded"] == 0:
+            return None, "No frames extracted (video may be corrupted or unreadable)"
+
+        scores = frame_state["scores"]
+        frame_score = float(np.clip(np.mean(scores), 0.0, 1.0)) if scores else 0.0
+        temporal_score = self.detector.temporal_detector.score_magnitudes(magnitudes)
+        usage = {"frames_used": len(scores), "pairs_used": len(magnitudes), "early_exit": False}
+        cuts = cut_detector.cuts if cut_detector is not None else []
+        usage.update(self.detector.cut_usage(state["decoded"], cuts))
+        result = self.detector.finish(frame_score, frame_state["face_present"], temporal_score,
+                                      magnitudes, usage, t0=t0)
+        result["frames_extracted"] = state["decoded"]
+        return result, "Success"
+
+
+# Control messages on SharedFrameRing queues (slot numbers are >= 0)
+_RING_CUT = -1
+_RING_END = -2
+_FRAME_WORKER, _FLOW_WORKER = 0, 1
+
+
+def _frame_worker(ring, settings, face_sensitive, results):
+    from video.models.frame_detector import FrameDetector
+
+    cv2.setNumThreads(1)
+    fd = FrameDetector(**settings)
+    scores, face_present = [], False
+    while True:
+        msg = ring.get(_FRAME_WORKER)
+        if msg is None:
+            break
+        if msg == _RING_END:
+            results.put(("frame", scores, face_present))
+            scores, face_present = [], False
+            continue
+        if msg < 0:
+            continue
+        try:
+            scored = fd.score_frame(ring.frame(msg), face_sensitive=face_sensitive, gray=ring.gray(msg))
+        except Exception:
+            scored = None
+        finally:
+            ring.release(msg)
+        if scored is not None:
+            scores.append(scored[0])
+            face_present = face_present or scored[1]
+    ring.close()
+
+
+def _flow_worker(ring, settings, results):
+    from video.models.temporal_detector import TemporalDetector
+
+    cv2.setNumThreads(1)
+    td = TemporalDetector(**settings)
+    magnitudes = []
+    prev = None  # slot of the previous flow frame, held until the next pair is done
+    while True:
+        msg = ring.get(_FLOW_WORKER)
+        if msg is None:
+            break
+        if msg < 0:
+            if prev is not None:
+                ring.release(prev)
+                prev = None
+            if msg == _RING_END:
+                results.put(("flow", magnitudes))
+                magnitudes = []
+            continue
+        if prev is not None:
+            mag = td.pair_magnitude(ring.gray(prev), ring.gray(msg))
+            if mag is not None:
+                magnitudes.append(mag)
+            ring.release(prev)
+        prev = msg
+    ring.close()
+
+
+class ProcessPipeline:
+    """
+    Same analysis as StreamingPipeline with the detectors in worker processes:
+      - this process decodes and writes each sampled frame (plus its gray plane) once
+        into a SharedFrameRing; workers read the pixels in place, only slot numbers
+        are pickled
+      - one worker runs the frame detector, one the temporal detector, each built
+        from the settings of self.detector's own (blockiness engine, weights, flow
+        parameters), so scores match the in-process pipelines
+      - workers live across run() calls; use as a context manager or call close()
+    """
+
+    def __init__(self, preprocessor=None, detector=None, slots=16, start_method="spawn"):
+        self.preprocessor = preprocessor or VideoPreprocessor()
+        self.detector = detector or VideoDetector()
+        if not self.preprocessor.resize:
+            raise ValueError("ProcessPipeline needs a preprocessor with a fixed resize")
+        self.slots = max(2, int(slots))
+        self.ctx = mp.get_context(start_method)
+        self.ring = None
+        self.workers = []
+        self.results = None
+
+    def start(self):
+        if self.workers:
+            return self
+        width, height = self.preprocessor.resize
+        self.ring = SharedFrameRing(self.slots, height, width, consumers=2, ctx=self.ctx)
+        self.results = self.ctx.Queue()
+        self.workers = [
+            self.ctx.Process(target=_frame_worker, daemon=True,
+                             args=(self.ring, self.detector.frame_detector.settings(),
+                                   self.detector.face_sensitive, self.results)),
+            self.ctx.Process(target=_flow_worker, daemon=True,
+                             args=(self.ring, self.detector.temporal_detector.settings(), self.results)),
+        ]
+        for w in self.workers:
+            w.start()
+        return self
+
+    def close(self):
+        if not self.workers:
+            return
+        for consumer in (_FRAME_WORKER, _FLOW_WORKER):
+            self.ring.signal(consumer, None)
+        for w in self.workers:
+            w.join(timeout=10)
+            if w.is_alive():
+                w.terminate()
+        self.workers = []
+        self.ring.close()
+        self.ring = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _check_workers(self):
+        if not all(w.is_alive() for w in self.workers):
+            raise RuntimeError("detector worker process died")
+
+    def _acquire(self):
+        while True:
+            try:
+                return self.ring.acquire(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+
+    def _collect(self):
+        out = {}
+        while len(out) < 2:
+            try:
+                item = self.results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            out[item[0]] = item[1:]
+        return out
+
+    def run(self, video_path, progress=None):
+        """
+        Same contract as process() + run_detection():
+        returns (result_dict, "Success") or (None, error_message).
+        """
+        t0 = time.time()
+        self.start()
+        res, msg = self.preprocessor.stream(video_path)
+        if res is None:
+            return None, msg
+        frame_iter, metadata = res
+
+        total = metadata["frames_planned"]
+        frame_positions = set(self.detector.frame_detector.sample_indices(total))
+        flow_step = self.detector.temporal_detector.sample_step(total)
+        cut_detector = self.preprocessor.cut_detector()
+        decoded = 0
+        error = None
+        try:
+            anchor = 0
+            for k, frame in enumerate(frame_iter):
+                decoded = k + 1
+                if progress is not None:
+                    progress(stage="decode", frames_decoded=k + 1, frames_total=total)
+                if cut_detector is not None and cut_detector.update(frame):
+                    anchor = k
+                    self.ring.signal(_FLOW_WORKER, _RING_CUT)
+                consumers = []
+                if k in frame_positions:
+                    consumers.append(_FRAME_WORKER)
+                if (k - anchor) % flow_step == 0:
+                    consumers.append(_FLOW_WORKER)
+                if not consumers:
+                    continue
+                slot = self._acquire()
+                try:
+                    self.ring.write(slot, frame)
+                except Exception:
+                    self.ring.publish(slot, k, [])
+                    continue
+                self.ring.publish(slot, k, consumers)
+        except Exception as e:
+            error = f"Error processing video: {e}"
+        finally:
+            frame_iter.close()
+            # always end the video so the workers reset and report
+            self.ring.signal(_FRAME_WORKER, _RING_END)
+            self.ring.signal(_FLOW_WORKER, _RING_END)
+
+        out = self._collect()
+        if progress is not None:
+            progress(stage="detect", detectors_completed=2, detectors_total=2)
+        if error is not None:
+            return None, error
+        if decoded == 0:
+            return None, "No frames extracted (video may be corrupted or unreadable)"
+
+        scores, face_present = out["frame"]
+        (magnitudes,) = out["flow"]
+        frame_score = float(np.clip(np.mean(scores), 0.0, 1.0)) if scores else 0.0
+        temporal_score = self.detector.temporal_detector.score_magnitudes(magnitudes)
+        usage = {"frames_used": len(scores), "pairs_used": len(magnitudes), "early_exit": False}
+        cuts = cut_detector.cuts if cut_detector is not None else []
+        usage.update(self.detector.cut_usage(decoded, cuts))
+        result = self.detector.finish(frame_score, face_present, temporal_score, magnitudes, usage, t0=t0)
+        result["frames_extracted"] = decoded
+        return result, "Success"
@@ -0,0 +1,162 @@
+# planner.py
+import threading
+import time
+
+from video.preprocessor import VideoPreprocessor
+from video.detectors import VideoDetector
+
+
+class RateMeter:
+    """
+    Per-unit costs measured on this machine, smoothed across requests:
+      - "decode": seconds to seek, decode and resize one frame
+      - "detect": seconds per scored frame or flow pair
+    Conservative priors are used until the first request has been timed.
+    """
+
+    PRIORS = {"decode": 0.02, "detect": 0.03}
+
+    def __init__(self, alpha=0.3, priors=None):
+        self.alpha = float(alpha)
+        self._rates = dict(priors or self.PRIORS)
+        self._measured = set()
+        self._lock = threading.Lock()
+
+    def observe(self, kind, seconds, units):
+        if units <= 0:
+            return
+        per_unit = seconds / units
+        with self._lock:
+            if kind in self._measured:
+                per_unit = self.alpha * per_unit + (1 - self.alpha) * self._rates[kind]
+            self._rates[kind] = per_unit
+            self._measured.add(kind)
+
+    def rate(self, kind):
+        with self._lock:
+            return self._rates[kind]
+
+    def snapshot(self):
+        with self._lock:
+            return {k: round(v, 5) for k, v in self._rates.items()}
+
+
+# Shared by every request in this process
+RATES = RateMeter()
+
+
+class SamplingPlanner:
+    """
+    Decides which frames to decode before decoding any:
+      - both detectors' sample plans are evaluated on the preprocessor's frame grid
+        and only their union is decoded (frames the detectors would drop never are)
+      - scene cuts are checked on the flow grid while decoding; once they are known,
+        the frames of the flow pairs TemporalDetector lays out per shot (shots start
+        off the step grid, and pairs lost at cuts are re-spent at other gaps) are
+        decoded too, so the detector sees the same pairs as in batch mode
+      - if that union would not fit a time budget (estimated from RateMeter costs), the
+        grid is cut down to evenly spread windows of two adjacent grid frames, as many
+        as fit. Window boundaries are passed to the detector as cuts, so every flow pair
+        stays one grid step apart, as it would be on a short clip, instead of stretching
+        across the gaps between windows
+    Frames come back as SparseFrames, so the detectors run unchanged. Decoding always
+    uses OpenCV seeks, whatever the preprocessor's decoder setting.
+    """
+
+    # Windowed grids stay at or below the length where flow pairs are adjacent
+    MAX_WINDOWS = 120
+
+    def __init__(self, preprocessor=None, detector=None, rates=None):
+        self.preprocessor = preprocessor or VideoPreprocessor()
+        self.detector = detector or VideoDetector()
+        self.rates = rates or RATES
+
+    def needs(self, n):
+        """(frame detector positions, flow grid positions) for a grid of n frames."""
+        frame = set(self.detector.frame_detector.sample_indices(n))
+        flow = list(range(0, n, self.detector.temporal_detector.sample_step(n)))
+        return frame, flow
+
+    def pair_positions(self, n, cuts):
+        """Grid positions of the flow pairs the temporal detector runs on, given scene cuts."""
+        if not cuts:
+            return []  # the plain flow grid, already planned
+        return {p for pair in self.detector.temporal_detector.sample_pairs(n, cuts) for p in pair}
+
+    def estimate(self, n, windows=None):
+        """Estimated seconds to decode and analyze a grid of n frames (or of `windows` pairs)."""
+        if windows is not None:
+            frame = self.detector.frame_detector.sample_indices(2 * windows)
+            decoded, analyzed = 2 * windows, len(frame) + windows
+        else:
+            frame, flow = self.needs(n)
+            decoded = len(frame.union(flow))
+            analyzed = len(frame) + max(0, len(flow) - 1)
+        return self.rates.rate("decode") * decoded + self.rates.rate("detect") * analyzed
+
+    def plan(self, grid, fps=None, budget_sec=None):
+        """
+        grid: source frame indices from the preprocessor
+        returns a plan dict for VideoPreprocessor.process_planned
+        """
+        n = len(grid)
+        if not budget_sec or n < 4 or self.estimate(n) <= budget_sec:
+            frame, flow = self.needs(n)
+            return {
+                "grid": grid,
+                "positions": sorted(frame.union(flow)),
+                "cut_positions": flow,
+                "follow_up": lambda cuts: self.pair_positions(n, cuts),
+                "forced_cuts": [],
+                "grid_size": n,
+                "windows": None,
+                "estimated_sec": round(self.estimate(n), 3),
+                "budget_sec": budget_sec,
+            }
+
+        # largest window count that fits (at least one)
+        windows = min(n // 2, self.MAX_WINDOWS)
+        while windows > 1 and self.estimate(0, windows) > budget_sec:
+            windows -= 1
+        if windows > 1:
+            starts = [round(k * (n - 2) / (windows - 1)) for k in range(windows)]
+        else:
+            starts = [(n - 2) // 2]
+        windowed = []
+        for start in starts:
+            windowed.extend((grid[start], grid[start + 1]))
+        return {
+            "grid": windowed,
+            "positions": list(range(len(windowed))),
+            "cut_positions": list(range(len(windowed))),
+            "forced_cuts": list(range(2, len(windowed), 2)),
+            "grid_size": n,
+            "windows": windows,
+            "estimated_sec": round(self.estimate(0, windows), 3),
+            "budget_sec": budget_sec,
+        }
+
+    def run(self, video_path, budget_sec=None, progress=None):
+        """
+        Same contract as process() + run_detection():
+        returns (result_dict, "Success") or (None, error_message).
+        """
+        t0 = time.perf_counter()
+        res, msg = self.preprocessor.process_planned(
+            video_path, lambda grid, fps: self.plan(grid, fps, budget_sec), progress=progress)
+        if res is None:
+            return None, msg
+        frames, metadata = res
+        t1 = time.perf_counter()
+        self.rates.observe("decode", t1 - t0, frames.decoded)
+
+        plan = dict(metadata["plan"])
+        forced = set(plan.pop("forced_cuts"))
+        # histogram jumps between windows are expected, not scene cuts
+        scene_cuts = [c for c in metadata.get("scene_cuts", []) if c not in forced]
+        result = self.detector.run_detection(frames, progress=progress, cuts=sorted(forced.union(scene_cuts)))
+        self.rates.observe("detect", time.perf_counter() - t1, result["frames_used"] + result["pairs_used"])
+        result.update(self.detector.cut_usage(len(frames), scene_cuts))
+        result["frames_extracted"] = frames.decoded
+        result["plan"] = dict(plan, elapsed_sec=round(time.perf_counter() - t0, 3))
+        return result, msg
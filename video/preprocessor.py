@@ -1,7 +1,15 @@
 # preprocessor.py
+import logging
 import os
 import cv2
 import mimetypes
+import numpy as np
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+from video.frames import FrameBuffer, SparseFrames
+from video.scenes import SceneCutDetector
+from common.instrumentation import span
 
 # try to import python-magic; if missing, we'll fall back to mimetypes
 try:
@@ -9,23 +17,63 @@ try:
 except Exception:
     _magic = None
 
+# PyAV is optional; without it the "keyframes" decoder falls back to OpenCV
+try:
+    import av as _av
+except Exception:
+    _av = None
+
+logger = logging.getLogger(__name__)
+
+DECODERS = ("opencv", "keyframes")
+
 class VideoPreprocessor:
     """
     Robust video preprocessor:
       - validates file existence, readability, MIME type (magic or mimetypes)
       - extracts sampled frames (resized) with defensive error handling
-      - returns (frames_list, metadata) on success, or (None, error_message) on failure
+      - decoder="keyframes" decodes I-frames only via PyAV, scaled by swscale
+        straight to `resize` (fast triage; needs the `av` package)
+      - decode_workers > 1 splits the sampled timeline into that many ranges, each
+        decoded by its own process (OpenCV decoder, long videos; see video.segments)
+      - flags hard scene cuts between sampled frames while decoding
+        (metadata["scene_cuts"]: positions of frames that start a new shot)
+      - returns (frames, metadata) on success, or (None, error_message) on failure;
+        frames is a FrameBuffer (contiguous=True) or a list of BGR arrays
     """
 
-    def __init__(self, resize=(640, 360), max_frames=300, sample_fps=1.0):
+    # Below this many sampled frames per worker, one capture is faster than a process hop
+    MIN_SEGMENT_FRAMES = 8
+
+    def __init__(self, resize=(640, 360), max_frames=300, sample_fps=1.0, decoder="opencv", contiguous=True,
+                 scene_cut_threshold=0.3, decode_workers=1):
         """
         resize: target (width, height) for frames (keeps processing fast)
         max_frames: cap on number of extracted frames
         sample_fps: approximate FPS to sample (if 0 => uniform sampling up to max_frames)
+        decoder: "opencv" (seek to each sampled index) or "keyframes" (I-frames only)
+        contiguous: return a preallocated FrameBuffer instead of a list of arrays
+        scene_cut_threshold: histogram distance that counts as a cut (None or 0 disables)
+        decode_workers: processes decoding time ranges in parallel (1 = in this process)
         """
+        if decoder not in DECODERS:
+            raise ValueError(f"decoder must be one of {DECODERS}, got {decoder!r}")
         self.resize = resize
         self.max_frames = max(1, int(max_frames))
         self.sample_fps = float(sample_fps) if sample_fps is not None else 1.0
+        self.decoder = decoder
+        self.contiguous = bool(contiguous)
+        self.scene_cut_threshold = float(scene_cut_threshold) if scene_cut_threshold else None
+        self.decode_workers = max(1, int(decode_workers or 1))
+
+    def _new_frames(self, capacity):
+        return FrameBuffer(min(self.max_frames, max(1, capacity))) if self.contiguous else []
+
+    def cut_detector(self):
+        """A fresh SceneCutDetector, or None when cut detection is off."""
+        if self.scene_cut_threshold is None:
+            return None
+        return SceneCutDetector(threshold=self.scene_cut_threshold)
 
     def _looks_like_video(self, path):
         try:
@@ -38,29 +86,301 @@ class VideoPreprocessor:
         except Exception:
             return False
 
-    def process(self, video_path):
+    def _validate(self, video_path):
+        """Returns an error message, or None if the file looks like a readable video."""
         # Basic validation
         try:
             if not isinstance(video_path, str):
-                return None, "video_path must be a string"
+                return "video_path must be a string"
 
             if not os.path.exists(video_path):
-                return None, f"File does not exist: {video_path}"
+                return f"File does not exist: {video_path}"
 
             if not os.access(video_path, os.R_OK):
-                return None, f"File is not readable: {video_path}"
+                return f"File is not readable: {video_path}"
 
             if os.path.getsize(video_path) == 0:
-                return None, f"File is empty: {video_path}"
+                return f"File is empty: {video_path}"
 
             if not self._looks_like_video(video_path):
                 # be permissive for common extensions
                 ext = os.path.splitext(video_path)[1].lower()
                 if ext not in (".mp4", ".mov", ".mkv", ".avi", ".webm"):
-                    return None, f"File does not appear to be a video (MIME check failed): {video_path}"
+                    return f"File does not appear to be a video (MIME check failed): {video_path}"
         except Exception as e:
-            return None, f"File validation error: {e}"
+            return f"File validation error: {e}"
+        return None
+
+    def process(self, video_path, progress=None):
+        """
+        Decode all sampled frames up front.
+        progress: optional callback, called as progress(stage=..., frames_decoded=n, frames_total=m)
+        """
+        if self.decode_workers > 1 and self.decoder == "opencv":
+            res, msg = self.process_segments(video_path, progress)
+            if res is not None or msg != "serial":
+                return res, msg
+        res, msg = self.stream(video_path)
+        if res is None:
+            return None, msg
+        frame_iter, metadata = res
+        res, msg = self._collect(frame_iter, metadata, progress)
+
+        # Fewer than two keyframes is useless for the temporal detector
+        if metadata["decoder"] == "keyframes" and (res is None or len(res[0]) < 2):
+            res, msg = self._open_opencv(video_path)
+            if res is None:
+                return None, msg
+            return self._collect(res[0], res[1], progress)
+        return res, msg
+
+    def process_segments(self, video_path, progress=None, workers=None):
+        """
+        process() with the sampled grid split into decode_workers (or `workers`)
+        contiguous ranges, decoded in parallel into one shared-memory block and merged
+        in order. Returns (None, "serial") when the video's length is unknown or, unless
+        `workers` is given, when it is too short to be worth splitting; process() then
+        decodes it in this process.
+        """
+        from video import segments
+
+        error = self._validate(video_path)
+        if error:
+            return None, error
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                return None, f"Failed to open video with OpenCV: {video_path}"
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            size = self.resize or (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        finally:
+            cap.release()
+
+        indices = self._grid(frame_count, fps)
+        if workers is None:
+            workers = min(self.decode_workers, len(indices) // self.MIN_SEGMENT_FRAMES)
+            if workers < 2:
+                return None, "serial"
+        if frame_count <= 0 or not size[0] or not size[1]:
+            return None, "serial"
+
+        metadata = {
+            "fps": float(fps),
+            "frame_count": int(frame_count),
+            "duration_sec": float(frame_count / (fps if fps > 0 else 30.0)),
+            "frames_planned": int(len(indices)),
+            "decoder": "opencv",
+            "decode_workers": workers,
+        }
+        shape = (len(indices), size[1], size[0], 3)
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        block = None
+        try:
+            block = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            pool = segments.get_pool(workers)
+            with span("decode_segments"):
+                filled = []
+                try:
+                    futures = [pool.submit(segments.decode_segment, video_path, indices[a:b], a, shm.name, shape,
+                                           size) for a, b in segments.split(indices, workers)]
+                    for future in futures:
+                        filled.extend(future.result())
+                        if progress is not None:
+                            progress(stage="decode", frames_decoded=len(filled), frames_total=len(indices))
+                except BrokenProcessPool as e:
+                    # a worker died (e.g. the decoder crashed on this file): drop the pool so
+                    # later requests get a fresh one, and decode this one in-process
+                    logger.warning("Segment decode pool broken (%s); falling back to serial decode", e)
+                    segments.discard_pool(pool)
+                    return None, "serial"
+            filled.sort()
+            if not filled:
+                return None, "No frames extracted (video may be corrupted or unreadable)"
+
+            frames = self._new_frames(len(filled))
+            cuts = self.cut_detector()
+            for row in filled:
+                frames.append(block[row])
+                if cuts is not None:
+                    cuts.update(block[row])
+            if not self.contiguous:
+                # list entries must not point into the shared block
+                frames = [f.copy() for f in frames]
+        except Exception as e:
+            return None, f"Error processing video: {e}"
+        finally:
+            block = None
+            shm.close()
+            shm.unlink()
 
+        metadata = dict(metadata, frames_extracted=len(filled),
+                        scene_cuts=list(cuts.cuts) if cuts is not None else [])
+        return (frames, metadata), "Success"
+
+    def stream(self, video_path):
+        """
+        Open a video for incremental decoding.
+        returns ((frame_iterator, metadata), "Success") or (None, error_message).
+        The iterator yields resized BGR frames in order and releases the decoder when
+        exhausted or closed; metadata["frames_planned"] is how many it will try to yield.
+        """
+        error = self._validate(video_path)
+        if error:
+            return None, error
+        if self.decoder == "keyframes" and _av is not None:
+            res, msg = self._open_keyframes(video_path)
+            if res is not None:
+                return res, msg
+        return self._open_opencv(video_path)
+
+    def _collect(self, frame_iter, metadata, progress=None):
+        # Keyframe counts are only an estimate, so size that buffer for the cap
+        capacity = metadata["frames_planned"] if metadata["decoder"] == "opencv" else self.max_frames
+        frames = self._new_frames(capacity)
+        cuts = self.cut_detector()
+        try:
+            for frame in frame_iter:
+                frames.append(frame)
+                if cuts is not None:
+                    cuts.update(frame)
+                if progress is not None:
+                    progress(stage="decode", frames_decoded=len(frames), frames_total=metadata["frames_planned"])
+        except Exception as e:
+            return None, f"Error processing video: {e}"
+        finally:
+            frame_iter.close()
+
+        if not frames:
+            return None, "No frames extracted (video may be corrupted or unreadable)"
+
+        metadata = dict(metadata, frames_extracted=int(len(frames)),
+                        scene_cuts=list(cuts.cuts) if cuts is not None else [])
+        return (frames, metadata), "Success"
+
+    def process_planned(self, video_path, select, progress=None):
+        """
+        Decode only the grid positions a sampling plan asks for (OpenCV seeks).
+        select: callable(grid, fps) -> plan dict with "grid" (source frame indices),
+                "positions" (grid positions to decode), "cut_positions" (the
+                positions scene cuts are checked between) and optionally "follow_up",
+                a callable(scene_cuts) -> further positions to decode once the cuts
+                are known; other keys are passed through in metadata["plan"]; see
+                video.planner
+        A cut found between two checked positions is located exactly by decoding the
+        positions in between, so scene_cuts match what process() reports.
+        returns ((SparseFrames, metadata), "Success") or (None, error_message);
+        metadata["scene_cuts"] are grid positions, metadata["plan"] the plan's other fields.
+        """
+        error = self._validate(video_path)
+        if error:
+            return None, error
+        res, msg = self._open_opencv(video_path, select=select)
+        if res is None:
+            return None, msg
+        frame_iter, metadata = res
+        plan = metadata.pop("plan")
+        grid = plan["grid"]
+        # follow-up positions are not known yet; unused capacity is never touched
+        frames = SparseFrames(len(grid), len(grid))
+        cut_positions = sorted(set(plan.get("cut_positions", ())))
+        checked = set(cut_positions)
+        cuts = self.cut_detector()
+        scene_cuts = []
+        try:
+            for position, frame in frame_iter:
+                frames.put(position, frame)
+                if cuts is not None and position in checked and cuts.update(frame):
+                    scene_cuts.append(position)
+                if progress is not None:
+                    progress(stage="decode", frames_decoded=frames.decoded, frames_total=metadata["frames_planned"])
+        except Exception as e:
+            return None, f"Error processing video: {e}"
+        finally:
+            frame_iter.close()
+
+        if not frames.decoded:
+            return None, "No frames extracted (video may be corrupted or unreadable)"
+
+        try:
+            if scene_cuts:
+                scene_cuts = self._refine_cuts(video_path, grid, frames, cut_positions, scene_cuts,
+                                               metadata, progress)
+            follow_up = plan.get("follow_up")
+            if follow_up is not None:
+                self._decode_positions(video_path, grid, frames, follow_up(scene_cuts), metadata, progress)
+        except Exception as e:
+            return None, f"Error processing video: {e}"
+
+        metadata = dict(metadata, frames_extracted=int(frames.decoded), scene_cuts=scene_cuts,
+                        plan={k: v for k, v in plan.items()
+                              if k not in ("grid", "positions", "cut_positions", "follow_up")})
+        return (frames, metadata), "Success"
+
+    def _refine_cuts(self, video_path, grid, frames, checked, found, metadata, progress=None):
+        """
+        A cut found at checked position c is only known to lie after the previous
+        checked position p. Decode p+1..c-1 and rerun the cut detector over p..c,
+        keeping the cuts it reports there (none if the change was gradual).
+        """
+        spans = []
+        for c in found:
+            k = checked.index(c)
+            if k > 0:
+                spans.append((checked[k - 1], c))
+        self._decode_positions(video_path, grid, frames,
+                               [q for p, c in spans for q in range(p + 1, c)], metadata, progress)
+        decoded = set(frames.positions())
+        refined = []
+        for p, c in spans:
+            detector = self.cut_detector()
+            for q in range(p, c + 1):
+                if q in decoded and detector.update(frames[q]) and q > p:
+                    refined.append(q)
+        return refined
+
+    def _decode_positions(self, video_path, grid, frames, positions, metadata, progress=None):
+        """Decode grid `positions` not yet in `frames` (SparseFrames) in one more OpenCV pass."""
+        positions = sorted(set(positions) - set(frames.positions()))
+        if not positions:
+            return
+        metadata["frames_planned"] += len(positions)
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"Failed to reopen video with OpenCV: {video_path}")
+        for position, frame in self._iter_opencv(cap, [grid[p] for p in positions], positions):
+            frames.put(position, frame)
+            if progress is not None:
+                progress(stage="decode", frames_decoded=frames.decoded, frames_total=metadata["frames_planned"])
+
+    def _grid(self, frame_count, fps):
+        """Source frame indices the sampling settings pick: the frame grid detectors see."""
+        indices = []
+        if frame_count <= 0:
+            # unknown length - read until EOF but cap frames
+            # We'll just read sequentially until max_frames or EOF
+            idx = 0
+            while len(indices) < self.max_frames:
+                indices.append(idx)
+                idx += 1
+        else:
+            if self.sample_fps and self.sample_fps > 0:
+                step = max(1, int(round(fps / max(0.0001, self.sample_fps))))
+                for i in range(0, frame_count, step):
+                    indices.append(i)
+                    if len(indices) >= self.max_frames:
+                        break
+            else:
+                # uniform sampling up to max_frames
+                if frame_count <= self.max_frames:
+                    indices = list(range(frame_count))
+                else:
+                    stepf = frame_count / float(self.max_frames)
+                    indices = [int(i * stepf) for i in range(self.max_frames)]
+        return indices
+
+    def _open_opencv(self, video_path, select=None):
         # Open capture
         cap = None
         try:
@@ -73,71 +393,252 @@ class VideoPreprocessor:
             duration = frame_count / (fps if fps > 0 else 30.0)
 
             # Choose indices to sample
-            indices = []
-            if frame_count <= 0:
-                # unknown length - read until EOF but cap frames
-                # We'll just read sequentially until max_frames or EOF
-                idx = 0
-                while len(indices) < self.max_frames:
-                    indices.append(idx)
-                    idx += 1
-            else:
-                if self.sample_fps and self.sample_fps > 0:
-                    step = max(1, int(round(fps / max(0.0001, self.sample_fps))))
-                    for i in range(0, frame_count, step):
-                        indices.append(i)
-                        if len(indices) >= self.max_frames:
-                            break
-                else:
-                    # uniform sampling up to max_frames
-                    if frame_count <= self.max_frames:
-                        indices = list(range(frame_count))
-                    else:
-                        stepf = frame_count / float(self.max_frames)
-                        indices = [int(i * stepf) for i in range(self.max_frames)]
+            indices = self._grid(frame_count, fps)
+            positions = plan = None
+            if select is not None:
+                plan = select(indices, fps)
+                positions = plan["positions"]
+                indices = [plan["grid"][p] for p in positions]
+
+            metadata = {
+                "fps": float(fps),
+                "frame_count": int(frame_count),
+                "duration_sec": float(duration),
+                "frames_planned": int(len(indices)),
+                "decoder": "opencv"
+            }
+            if plan is not None:
+                metadata["plan"] = plan
+            return (self._iter_opencv(cap, indices, positions), metadata), "Success"
+
+        except Exception as e:
+            try:
+                if cap:
+                    cap.release()
+            except Exception:
+                pass
+            return None, f"Error processing video: {e}"
 
-            # Extract frames defensively
-            frames = []
+    def _iter_opencv(self, cap, indices, positions=None):
+        # Extract frames defensively; with positions, yields (position, frame)
+        try:
             last_idx = -1
-            for idx in indices:
+            for k, idx in enumerate(indices):
                 try:
                     if idx == last_idx:
                         continue
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                    ret, frame = cap.read()
+                    with span("decode_frame"):
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                        ret, frame = cap.read()
                     last_idx = idx
                     if not ret or frame is None:
                         continue
                     if self.resize:
                         try:
-                            frame = cv2.resize(frame, self.resize, interpolation=cv2.INTER_AREA)
+                            with span("resize"):
+                                frame = cv2.resize(frame, self.resize, interpolation=cv2.INTER_AREA)
                         except Exception:
                             # If resize fails, keep original
                             pass
-                    frames.append(frame)
-                    if len(frames) >= self.max_frames:
-                        break
                 except Exception:
                     # skip problematic frames silently
                     continue
-
+                yield frame if positions is None else (positions[k], frame)
+        finally:
             cap.release()
 
-            if not frames:
-                return None, "No frames extracted (video may be corrupted or unreadable)"
+    def _open_keyframes(self, video_path):
+        """
+        Decode only keyframes with PyAV (CPU). Non-key packets never reach the
+        decoder, and each frame is scaled + converted to BGR in one swscale pass,
+        so no full-resolution BGR frame is ever allocated.
+        Keyframes closer than 1/sample_fps seconds to the previous kept one are skipped.
+        """
+        container = None
+        try:
+            container = _av.open(video_path)
+            if not container.streams.video:
+                container.close()
+                return None, f"No video stream found: {video_path}"
+            stream = container.streams.video[0]
+            stream.codec_context.skip_frame = "NONKEY"
+            stream.thread_type = "AUTO"
+
+            fps = float(stream.average_rate) if stream.average_rate else 30.0
+            frame_count = int(stream.frames or 0)
+            if stream.duration is not None and stream.time_base is not None:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration:
+                duration = container.duration / float(_av.time_base)
+            else:
+                duration = frame_count / fps
+            if self.sample_fps > 0:
+                planned = min(self.max_frames, max(1, int(duration * self.sample_fps) + 1))
+            else:
+                planned = self.max_frames
 
             metadata = {
                 "fps": float(fps),
                 "frame_count": int(frame_count),
                 "duration_sec": float(duration),
-                "frames_extracted": int(len(frames))
+                "frames_planned": int(planned),
+                "decoder": "keyframes"
             }
-            return (frames, metadata), "Success"
+            return (self._iter_keyframes(container, stream), metadata), "Success"
 
         except Exception as e:
             try:
-                if cap:
-                    cap.release()
+                if container:
+                    container.close()
             except Exception:
                 pass
+            return None, f"Error decoding keyframes: {e}"
+
+    def _iter_keyframes(self, container, stream):
+        width, height = self.resize if self.resize else (None, None)
+        min_gap = 1.0 / self.sample_fps if self.sample_fps > 0 else 0.0
+        try:
+            yielded = 0
+            last_t = None
+            for packet in container.demux(stream):
+                if packet.size == 0 or not packet.is_keyframe:
+                    continue
+                try:
+                    with span("decode_frame"):
+                        decoded = packet.decode()
+                except Exception:
+                    # skip problematic packets silently
+                    continue
+                for frame in decoded:
+                    t = frame.time
+                    if last_t is not None and t is not None and t - last_t < min_gap:
+                        continue
+                    last_t = t
+                    if width and height:
+                        img = frame.to_ndarray(format="bgr24", width=width, height=height, interpolation="AREA")
+                    else:
+                        img = frame.to_ndarray(format="bgr24")
+                    yield img
+                    yielded += 1
+                    if yielded >= self.max_frames:
+                        return
+        finally:
+            container.close()
+
+    def demux_av(self, video_path, progress=None):
+        """
+        One PyAV pass over the container for combined audio/video analysis:
+        video packets are decoded and sampled at sample_fps (scaled to `resize`),
+        audio packets are resampled to float32 at the stream's own rate and averaged
+        to mono, as the audio service does with an uploaded file. The whole audio
+        track is kept (the audio scorer has no length limit of its own), so
+        /analyze_av scores the same signal as a standalone audio upload.
+        returns ((frames, metadata, audio), "Success") or (None, error_message);
+        audio is (samples, sample_rate), or None if the file has no audio track.
+        """
+        error = self._validate(video_path)
+        if error:
+            return None, error
+        if _av is None:
+            return None, "Combined A/V analysis needs the `av` package"
+
+        container = None
+        try:
+            container = _av.open(video_path)
+            if not container.streams.video:
+                return None, f"No video stream found: {video_path}"
+            vstream = container.streams.video[0]
+            vstream.thread_type = "AUTO"
+            astream = container.streams.audio[0] if container.streams.audio else None
+
+            fps = float(vstream.average_rate) if vstream.average_rate else 30.0
+            frame_count = int(vstream.frames or 0)
+            if container.duration:
+                duration = container.duration / float(_av.time_base)
+            else:
+                duration = frame_count / fps
+            if self.sample_fps > 0:
+                planned = min(self.max_frames, max(1, int(duration * self.sample_fps) + 1))
+                gap = 1.0 / self.sample_fps
+            else:
+                planned = min(self.max_frames, frame_count or self.max_frames)
+                gap = duration / planned if duration > 0 else 0.0
+
+            width, height = self.resize if self.resize else (None, None)
+            frames = self._new_frames(planned)
+            cuts = self.cut_detector()
+            chunks = []
+            resampler = None
+            if astream is not None:
+                # planar float, channels kept: averaged below like sf.read + mean in audio.app
+                resampler = _av.AudioResampler(format="fltp", layout=astream.layout.name, rate=astream.rate)
+
+            def add_audio(resampled):
+                for out in resampled:
+                    samples = out.to_ndarray()
+                    chunks.append(samples.mean(axis=0) if samples.shape[0] > 1 else samples.reshape(-1))
+
+            next_t = 0.0
+            video_done = False
+            audio_done = astream is None
+            streams = [vstream] + ([astream] if astream is not None else [])
+            for packet in container.demux(*streams):
+                if video_done and audio_done:
+                    break
+                # once the planned frames are in, video packets are only read past, never
+                # decoded; empty packets at end of stream flush either decoder's tail
+                if video_done and packet.stream is vstream:
+                    continue
+                try:
+                    with span("decode_frame" if packet.stream is vstream else "decode_audio"):
+                        decoded = packet.decode()
+                except Exception:
+                    # skip problematic packets silently
+                    continue
+                if packet.stream is vstream:
+                    for frame in decoded:
+                        t = frame.time if frame.time is not None else next_t
+                        if t + 1e-6 < next_t:
+                            continue
+                        next_t = t + gap
+                        if width and height:
+                            img = frame.to_ndarray(format="bgr24", width=width, height=height, interpolation="AREA")
+                        else:
+                            img = frame.to_ndarray(format="bgr24")
+                        frames.append(img)
+                        if cuts is not None:
+                            cuts.update(img)
+                        if progress is not None:
+                            progress(stage="decode", frames_decoded=len(frames), frames_total=planned)
+                        if len(frames) >= planned:
+                            video_done = True
+                            break
+                else:
+                    for frame in decoded:
+                        add_audio(resampler.resample(frame))
+            if resampler is not None:
+                add_audio(resampler.resample(None))  # samples still buffered in the resampler
+        except Exception as e:
             return None, f"Error processing video: {e}"
+        finally:
+            if container is not None:
+                container.close()
+
+        if not frames:
+            return None, "No frames extracted (video may be corrupted or unreadable)"
+
+        audio = None
+        if chunks:
+            audio = (np.concatenate(chunks).astype(np.float32, copy=False), int(astream.rate))
+
+        metadata = {
+            "fps": float(fps),
+            "frame_count": int(frame_count),
+            "duration_sec": float(duration),
+            "frames_planned": int(planned),
+            "frames_extracted": int(len(frames)),
+            "audio_sec": round(len(audio[0]) / float(audio[1]), 3) if audio else 0.0,
+            "scene_cuts": list(cuts.cuts) if cuts is not None else [],
+            "decoder": "av"
+        }
+        return (frames, metadata, audio), "Success"
@@ -0,0 +1,107 @@
+# segments.py
+"""
+Segment-parallel decoding: the sampled frame grid is split into contiguous time
+ranges, each decoded by its own worker process with its own cv2.VideoCapture.
+A worker seeks to its range start and then reads forward, grabbing (not
+converting) the frames in between, seeking again only across gaps longer than
+MAX_GRAB; decoded frames are written straight into a
+shared-memory block, so no pixels are pickled.
+
+Used by VideoPreprocessor(decode_workers=K); the pool is created on first use
+and kept for later calls, unless a worker dies (then it is discarded and rebuilt).
+"""
+import atexit
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# Gaps (in source frames) up to this are read forward; longer ones are seeks. A seek
+# decodes from the previous keyframe, so it only wins when keyframes are closer
+# together than the gap: 30 covers 1 fps sampling of 30 fps video with the long
+# GOPs (60-250 frames) of typical H.264 uploads
+MAX_GRAB = 30
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers, start_method="spawn"):
+    """Process pool with `workers` processes, shared by every caller asking for that size."""
+    with _pools_lock:
+        pool = _pools.get((workers, start_method))
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(start_method),
+                                       initializer=cv2.setNumThreads, initargs=(1,))
+            _pools[(workers, start_method)] = pool
+        return pool
+
+
+def discard_pool(pool):
+    """
+    Forget a pool that is no longer usable (a worker died, e.g. OpenCV crashing
+    on a corrupt upload); the next get_pool() call builds a fresh one.
+    """
+    with _pools_lock:
+        for key, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def split(indices, parts):
+    """Contiguous (start, stop) position ranges of `indices`, as even as possible."""
+    parts = max(1, min(parts, len(indices)))
+    bounds = [round(k * len(indices) / parts) for k in range(parts + 1)]
+    return [(bounds[k], bounds[k + 1]) for k in range(parts) if bounds[k + 1] > bounds[k]]
+
+
+def decode_segment(video_path, indices, start, shm_name, shape, resize, max_grab=MAX_GRAB):
+    """
+    Worker: decode source frames `indices` (ascending) into rows start.. of the
+    shared (N, H, W, 3) block. Returns the rows that were filled.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    filled = []
+    out = None
+    cap = cv2.VideoCapture(video_path)
+    try:
+        out = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        if not cap.isOpened() or not indices:
+            return filled
+        pos = -1
+        for k, idx in enumerate(indices):
+            if pos < 0 or not 0 <= idx - pos <= max_grab:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                pos = idx
+            # short gaps: grab() forward, skipping read()'s colour conversion
+            while pos < idx:
+                if not cap.grab():
+                    return filled
+                pos += 1
+            ret, frame = cap.read()
+            pos += 1
+            if not ret or frame is None:
+                continue
+            row = start + k
+            if resize and (frame.shape[1], frame.shape[0]) != tuple(resize):
+                cv2.resize(frame, tuple(resize), dst=out[row], interpolation=cv2.INTER_AREA)
+            else:
+                out[row] = frame
+            filled.append(row)
+        return filled
+    finally:
+        cap.release()
+        del out
+        shm.close()
@@ -0,0 +1,146 @@
+# shm.py
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Per-slot metadata stored alongside the pixels
+SLOT_META = np.dtype([("seq", np.int64), ("position", np.int64)])
+
+
+class SharedFrameRing:
+    """
+    Fixed-size frame slots in one shared-memory block, for handing decoded frames
+    from a producer process to consumer processes without pickling pixels:
+      - each slot holds a BGR frame, its grayscale plane and SLOT_META metadata
+      - the producer takes a free slot, writes into it in place and publishes it to
+        any subset of consumers; only the slot number travels through a queue
+      - consumers read numpy views straight out of shared memory and release the slot;
+        it returns to the free list once every consumer it was sent to is done
+    Picklable, so it can be passed to multiprocessing.Process (spawn or fork); the
+    creating process owns the block and must close(unlink=True) it.
+    """
+
+    def __init__(self, slots, height, width, consumers=1, ctx=None):
+        """
+        slots: frames that can be in flight at once
+        height, width: frame size (frames of another size are resized on write)
+        consumers: number of consumer queues
+        """
+        ctx = ctx or mp.get_context()
+        self.slots = max(1, int(slots))
+        self.height = int(height)
+        self.width = int(width)
+        self.consumers = max(1, int(consumers))
+        size = self._layout()
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.name = self._shm.name
+        self._owner = True
+        self._free = ctx.Queue()
+        self._queues = [ctx.Queue() for _ in range(self.consumers)]
+        # pending consumer count per slot; the Array's lock guards updates
+        self._pending = ctx.Array("i", self.slots)
+        self._seq = 0
+        self._attach_views()
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+    def _layout(self):
+        self._frame_bytes = self.height * self.width * 3
+        self._gray_bytes = self.height * self.width
+        self._meta_offset = self.slots * (self._frame_bytes + self._gray_bytes)
+        return self._meta_offset + self.slots * SLOT_META.itemsize
+
+    def _attach_views(self):
+        buf = self._shm.buf
+        n = self.slots
+        self._frames = np.ndarray((n, self.height, self.width, 3), dtype=np.uint8, buffer=buf)
+        self._grays = np.ndarray((n, self.height, self.width), dtype=np.uint8, buffer=buf,
+                                 offset=n * self._frame_bytes)
+        self._meta = np.ndarray((n,), dtype=SLOT_META, buffer=buf, offset=self._meta_offset)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ("_shm", "_frames", "_grays", "_meta"):
+            state.pop(key)
+        state["_owner"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._layout()
+        self._shm = shared_memory.SharedMemory(name=self.name)
+        self._attach_views()
+
+    # --- producer side ---
+
+    def acquire(self, timeout=None):
+        """Block until a slot is free; returns its number."""
+        return self._free.get(timeout=timeout)
+
+    def write(self, slot, frame, gray=None):
+        """Copy a BGR frame (and optionally its gray plane) into `slot`."""
+        import cv2
+
+        if frame.shape[:2] != (self.height, self.width):
+            frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+            gray = None
+        self._frames[slot] = frame
+        if gray is None:
+            cv2.cvtColor(self._frames[slot], cv2.COLOR_BGR2GRAY, dst=self._grays[slot])
+        else:
+            self._grays[slot] = gray
+
+    def publish(self, slot, position, consumers):
+        """Hand `slot` to the given consumer indices (it is freed again once all release it)."""
+        consumers = list(consumers)
+        if not consumers:
+            self._free.put(slot)
+            return
+        self._meta[slot] = (self._seq, position)
+        self._seq += 1
+        with self._pending.get_lock():
+            self._pending[slot] = len(consumers)
+        for c in consumers:
+            self._queues[c].put(slot)
+
+    def signal(self, consumer, message):
+        """Send a control message (any negative int, or None) to one consumer, in order with frames."""
+        self._queues[consumer].put(message)
+
+    # --- consumer side ---
+
+    def get(self, consumer, timeout=None):
+        """Next slot number (>= 0) or control message for `consumer`."""
+        return self._queues[consumer].get(timeout=timeout)
+
+    def frame(self, slot):
+        """Zero-copy view of the slot's BGR frame; valid until release(slot)."""
+        return self._frames[slot]
+
+    def gray(self, slot):
+        return self._grays[slot]
+
+    def position(self, slot):
+        return int(self._meta[slot]["position"])
+
+    def release(self, slot):
+        with self._pending.get_lock():
+            self._pending[slot] -= 1
+            done = self._pending[slot] == 0
+        if done:
+            self._free.put(slot)
+
+    def close(self, unlink=None):
+        """Detach this process's mapping; the owner also unlinks the block by default."""
+        self._frames = self._grays = self._meta = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # a caller still holds a view from frame()/gray(); the mapping goes with the process
+            pass
+        if unlink if unlink is not None else self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
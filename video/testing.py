@@ -1,15 +1,227 @@
-# main.py
+# testing.py
+"""
+Batch scanner for folders of videos.
+
+    python -m video.testing /archive -o results.jsonl --workers 8
+
+Walks the folder recursively, analyzes files in a process pool and appends one
+JSON line per file to the output as soon as it finishes. Re-running with the same
+output skips files already recorded there. A summary goes to stderr at the end.
+With --features DIR raw detector features are stored per file content (see
+video/features.py); files already in the store are scored from it without decoding.
+"""
 import argparse
 import json
-import time
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+
+# Per-process state, built once by _init_worker instead of once per file
+_pre = None
+_detector = None
+_store = None
+
+
+def _init_worker(decoder, anytime, features_dir=None):
+    global _pre, _detector, _store
+    import cv2
+    from video.preprocessor import VideoPreprocessor
+    from video.detectors import VideoDetector
+
+    # One OpenCV thread per process; the pool already uses every core
+    cv2.setNumThreads(1)
+    _pre = VideoPreprocessor(decoder=decoder)  # default parameters otherwise
+    if features_dir:
+        from video.features import FeatureStore
+
+        # stored features must come from full (not early-exit) runs
+        _store = FeatureStore(features_dir)
+        _detector = VideoDetector(keep_features=True)
+    else:
+        _detector = VideoDetector(anytime=anytime)
+
+
+def failed_row(video_path, details):
+    """Row for a file whose worker raised or died instead of returning one."""
+    return {
+        "video_file": os.path.basename(video_path),
+        "video_path": video_path,
+        "status": "error",
+        "details": details,
+        "decode_sec": None,
+        "detect_sec": None,
+        "processing_time": None,
+    }
+
+
+def run_isolated(video_path, initargs):
+    """
+    Analyze one file in a worker process of its own, so that if the decoder crashes
+    on it only this file is recorded as failed.
+    """
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs) as pool:
+        try:
+            return pool.submit(analyze_file, video_path).result()
+        except BrokenProcessPool:
+            return failed_row(video_path, "Worker process died while analyzing this file")
+        except Exception as e:
+            return failed_row(video_path, f"Worker error: {e}")
+
+
+def analyze_file(video_path):
+    start = time.time()
+    output = {
+        "video_file": os.path.basename(video_path),
+        "video_path": video_path,
+        "status": "error",
+        "details": "",
+        "decode_sec": None,
+        "detect_sec": None,
+        "processing_time": None,
+    }
+    try:
+        if _store is not None:
+            return _analyze_with_store(video_path, output, start)
+        res, msg = _pre.process(video_path)
+        decoded = time.time()
+        output["decode_sec"] = round(decoded - start, 3)
+        if res is None:
+            output.update({"details": msg, "processing_time": round(time.time() - start, 3)})
+            return output
+
+        frames, metadata = res
+        result = _detector.run_detection(frames, cuts=metadata.get("scene_cuts"))
+        output.update({
+            "status": "success",
+            "ai_probability": result["ai_probability"],
+            "confidence": result["confidence"],
+            "explanation": result.get("explanation", ""),
+            "scene_cuts": result.get("scene_cuts", 0),
+            "detect_sec": round(time.time() - decoded, 3),
+            "processing_time": round(time.time() - start, 3)
+        })
+    except Exception as e:
+        output.update({
+            "status": "error",
+            "details": str(e),
+            "processing_time": round(time.time() - start, 3)
+        })
+    return output
+
+
+def _analyze_with_store(video_path, output, start):
+    from video.features import content_hash, extract
+
+    key = content_hash(video_path)
+    output["feature_key"] = key
+    if _store.has(key):
+        row = _store.score(key)
+        output.update({
+            "status": "success",
+            "ai_probability": round(float(row["ai_probability"]), 3),
+            "confidence": round(float(row["confidence"]), 3),
+            "from_store": True,
+            "processing_time": round(time.time() - start, 3),
+        })
+        return output
+    _, result, error = extract(video_path, _store, _pre, _detector, key=key)
+    if result is None:
+        output.update({"details": error, "processing_time": round(time.time() - start, 3)})
+        return output
+    output.update({
+        "status": "success",
+        "ai_probability": result["ai_probability"],
+        "confidence": result["confidence"],
+        "explanation": result.get("explanation", ""),
+        "scene_cuts": result.get("scene_cuts", 0),
+        "from_store": False,
+        "processing_time": round(time.time() - start, 3),
+    })
+    return output
+
+
+def find_videos(folder_path):
+    for root, dirs, files in os.walk(folder_path):
+        dirs.sort()
+        for f in sorted(files):
+            if f.lower().endswith(VIDEO_EXTS):
+                yield os.path.abspath(os.path.join(root, f))
+
+
+def load_done(output_path, retry_errors=False):
+    """Paths already recorded in an existing JSONL output."""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # partially written last line
+            if retry_errors and row.get("status") != "success":
+                continue
+            if row.get("video_path"):
+                done.add(row["video_path"])
+    return done
+
+
+def open_output(output_path):
+    """
+    Open the JSONL output for appending. A run that was killed mid-write leaves a
+    partial last line (load_done skips it); it is cut off first so the next row
+    starts on a line of its own.
+    """
+    if os.path.exists(output_path):
+        with open(output_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                nl = f.read(step).rfind(b"\n")
+                if nl >= 0:
+                    pos = pos - step + nl + 1
+                    break
+                pos -= step
+            if pos < size:
+                f.truncate(pos)
+    return open(output_path, "a")
+
+
+def summarize(rows, skipped, wall):
+    ok = [r for r in rows if r["status"] == "success"]
+    summary = {
+        "files": len(rows),
+        "success": len(ok),
+        "errors": len(rows) - len(ok),
+        "skipped": skipped,
+        "wall_sec": round(wall, 3),
+        "files_per_sec": round(len(rows) / wall, 3) if wall > 0 else None,
+    }
+    for stage in ("decode_sec", "detect_sec", "processing_time"):
+        values = [r[stage] for r in rows if r.get(stage) is not None]
+        summary[stage] = {
+            "total": round(sum(values), 3),
+            "mean": round(sum(values) / len(values), 3) if values else None,
+            "max": max(values) if values else None,
+        }
+    return summary
 
-from preprocessor import VideoPreprocessor
-from detectors import VideoDetector
 
 def main():
     parser = argparse.ArgumentParser(description="AI-Generated Video Detector for Folder of Videos")
-    parser.add_argument("folder_path", help="Path to folder containing video files")
+    parser.add_argument("folder_path", help="Path to folder containing video files (searched recursively)")
+    parser.add_argument("-o", "--output", help="JSONL file to append results to (enables resume)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--decoder", default="opencv", choices=("opencv", "keyframes"))
+    parser.add_argument("--anytime", action="store_true", help="Stop scoring early on decisive clips")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-run files recorded with an error")
+    parser.add_argument("--features", help="Feature store directory (decode each file's content once)")
     args = parser.parse_args()
 
     folder_path = args.folder_path
@@ -17,53 +229,81 @@ def main():
         print(json.dumps({"status": "error", "details": "Folder not found"}))
         return
 
-    video_files = [f for f in os.listdir(folder_path) if f.lower().endswith((".mp4", ".mov", ".avi", ".mkv"))]
-    if not video_files:
+    done = load_done(args.output, args.retry_errors)
+    skipped = 0
+    todo = []
+    for path in find_videos(folder_path):
+        if path in done:
+            skipped += 1
+        else:
+            todo.append(path)
+    if not todo and not skipped:
         print(json.dumps({"status": "error", "details": "No video files found in folder"}))
         return
 
-    results = []
+    out = open_output(args.output) if args.output else sys.stdout
+    rows = []
+    start = time.time()
+    workers = max(1, args.workers)
+    initargs = (args.decoder, args.anytime, args.features)
 
-    for video_file in video_files:
-        video_path = os.path.join(folder_path, video_file)
-        start = time.time()
-        output = {"video_file": video_file, "status": "error", "details": "", "processing_time": None}
+    def record(row):
+        rows.append(row)
+        out.write(json.dumps(row) + "\n")
+        out.flush()
 
-        try:
-            pre = VideoPreprocessor()  # default parameters
-            res, msg = pre.process(video_path)
-            if res is None:
-                output.update({
-                    "status": "error",
-                    "details": msg,
-                    "processing_time": round(time.time() - start, 3)
-                })
-                results.append(output)
-                continue
+    pool = None
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+        # Keep a bounded number of files in flight so huge archives don't queue everything
+        pending = {}  # future -> path
+        paths = iter(todo)
 
-            frames, _ = res
-            detector = VideoDetector()
-            result = detector.run_detection(frames)
-
-            output.update({
-                "status": "success",
-                "ai_probability": result["ai_probability"],
-                "confidence": result["confidence"],
-                "explanation": result.get("explanation", ""),
-                "processing_time": round(time.time() - start, 3)
-            })
-        except Exception as e:
-            output.update({
-                "status": "error",
-                "details": str(e),
-                "processing_time": round(time.time() - start, 3)
-            })
+        def refill():
+            while len(pending) < workers * 4:
+                nxt = next(paths, None)
+                if nxt is None:
+                    return
+                pending[pool.submit(analyze_file, nxt)] = nxt
+
+        refill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            suspects = []
+            for fut in finished:
+                path = pending.pop(fut)
+                try:
+                    record(fut.result())
+                except BrokenProcessPool:
+                    suspects.append(path)
+                except Exception as e:
+                    record(failed_row(path, f"Worker error: {e}"))
+            if suspects:
+                # A worker died (e.g. the decoder crashed on a corrupt file) and took the
+                # pool with it: every in-flight file is a suspect. Retry each alone to find
+                # the culprit, then carry on with a fresh pool.
+                for fut in list(pending):
+                    try:
+                        record(fut.result())
+                    except Exception:
+                        suspects.append(pending[fut])
+                pending.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                print(f"Worker pool broke; retrying {len(suspects)} in-flight files one at a time", file=sys.stderr)
+                for path in suspects:
+                    record(run_isolated(path, initargs))
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+            refill()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if out is not sys.stdout:
+            out.close()
 
-        results.append(output)
+    summary = summarize(rows, skipped, time.time() - start)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return summary
 
-    # Print results as JSON array
-    print(results)
-    return json.dumps(results, indent=2)
 
 if __name__ == "__main__":
     main()
@@ -54,3 +54,34 @@ def generate_explanation(frame_score, temporal_score, confidence, face_present):
         return f"This video is {verdict} with {cert} confidence based on {source}: {reason}."
     except Exception:
         return "No explanation available."
+
+def coarse_to_fine(n):
+    """
+    Indices 0..n-1 ordered so that every prefix is spread evenly over the range:
+    0, n/2, n/4, 3n/4, n/8, ... Used to process samples progressively.
+    """
+    order = []
+    seen = set()
+    stride = 1 << max(0, (n - 1).bit_length())
+    while stride >= 1:
+        for i in range(0, n, stride):
+            if i not in seen:
+                seen.add(i)
+                order.append(i)
+        stride //= 2
+    return order
+
+def mean_and_se(values, population):
+    """
+    Mean and standard error of `values`, a sample drawn without replacement
+    from `population` items (finite population correction applied).
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, float("inf")
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float("inf")
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    fpc = (population - n) / (population - 1) if population > n else 0.0
+    return mean, math.sqrt(var / n * fpc)